@@ -6,13 +6,29 @@
 
 import tkinter as tk
 from tkinter import messagebox, simpledialog
-import threading
+import os
+import sys
 import socket
-import json
 import random
 import time
 from enum import Enum
 
+# Network framing is shared with the headless tools in python_backup/
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "python_backup"))
+from match_recorder import MatchRecorder
+from net_loop import NetworkLoop
+from net_protocol import MessageType
+from problem_generator import ProblemSchedule
+from round_timer import RoundTimer
+from ui_events import UiEventQueue
+
+# Rounds in a multiplayer match
+MATCH_ROUNDS = 20
+# How often the Tk thread drains events and repaints (~60 fps)
+UI_FRAME_MS = 16
+# Default countdown refresh; the time shown always comes from the deadline
+TIMER_REFRESH_MS = 100
+
 class Difficulty(Enum):
     EASY = 1
     MEDIUM = 2
@@ -24,7 +40,7 @@ class GameMode(Enum):
     CLIENT = 3
 
 class MathBlat:
-    def __init__(self):
+    def __init__(self, timer_refresh_ms=TIMER_REFRESH_MS, record_path=None):
         self.root = tk.Tk()
         self.root.title("MathBlat - Math Duel Game")
         self.root.geometry("800x600")
@@ -38,20 +54,58 @@ class MathBlat:
         self.options = []
         self.correct_answer = 0
         self.timer = 0
+        self.round_timer = RoundTimer()
+        self.timer_refresh_ms = timer_refresh_ms
+        # Multiplayer: both peers generate problems from the host's schedule
+        self.schedule = None
+        self.round = 0
+        # Multiplayer matches are recorded for review; the disk writes
+        # happen on the recorder's own thread
+        self.recorder = MatchRecorder(record_path)
+        self.recording = None
         self.server_socket = None
-        self.client_socket = None
+        self.connection = None
+        # One network thread for the whole app; messages arrive as events
+        self.network = NetworkLoop()
+        # Other threads never touch Tk: they post here and pump_events()
+        # applies the batch and repaints once per frame
+        self.events = UiEventQueue()
+        self.dirty = set()
+        self.repaints = 0
         self.running = False
         
         self.setup_ui()
         self.show_menu()
+        self.root.after(UI_FRAME_MS, self.pump_events)
+        self.root.after(self.timer_refresh_ms, self.timer_tick)
     
     def setup_ui(self):
         # Title
         self.title_label = tk.Label(self.root, text="MATHBLAT", font=("Arial", 48, "bold"), fg='cyan', bg='black')
         self.title_label.pack(pady=20)
         
-        # Menu frame
+        # Menu frame - every screen's widgets are built once here and
+        # only packed/unpacked or reconfigured afterwards
         self.menu_frame = tk.Frame(self.root, bg='black')
+        tk.Button(self.menu_frame, text="Single Player", font=("Arial", 20), bg='blue', fg='white',
+                  command=self.start_single).pack(pady=10)
+        tk.Button(self.menu_frame, text="Host Multiplayer Game", font=("Arial", 20), bg='green', fg='white',
+                  command=self.start_host).pack(pady=10)
+        tk.Button(self.menu_frame, text="Join Multiplayer (Connect)", font=("Arial", 20), bg='orange', fg='white',
+                  command=self.start_client).pack(pady=10)
+        tk.Button(self.menu_frame, text="Quit", font=("Arial", 20), bg='red', fg='white',
+                  command=self.root.quit).pack(pady=10)
+        
+        # Difficulty frame
+        self.difficulty_frame = tk.Frame(self.root, bg='black')
+        tk.Button(self.difficulty_frame, text="Easy", font=("Arial", 24), bg='green', fg='white',
+                  command=lambda: self.start_game(Difficulty.EASY)).pack(pady=10, fill='x')
+        tk.Button(self.difficulty_frame, text="Medium", font=("Arial", 24), bg='yellow', fg='black',
+                  command=lambda: self.start_game(Difficulty.MEDIUM)).pack(pady=10, fill='x')
+        tk.Button(self.difficulty_frame, text="Hard", font=("Arial", 24), bg='red', fg='white',
+                  command=lambda: self.start_game(Difficulty.HARD)).pack(pady=10, fill='x')
+        tk.Button(self.difficulty_frame, text="Back", font=("Arial", 20),
+                  command=self.show_menu).pack(pady=20)
         
         # Scores frame
         self.score_frame = tk.Frame(self.root, bg='black')
@@ -62,40 +116,50 @@ class MathBlat:
         self.problem_frame = tk.Frame(self.root, bg='black')
         self.problem_label = tk.Label(self.problem_frame, text="", font=("Arial", 36, "bold"), fg='white', bg='black')
         
-        # Options frame
+        # Options frame - a pool of answer buttons, grown if a problem
+        # ever has more options than buttons
         self.options_frame = tk.Frame(self.root, bg='black')
+        self.option_buttons = []
+        self.visible_options = 0
+        self.ensure_option_buttons(4)
         
         # Timer label
         self.timer_label = tk.Label(self.root, text="", font=("Arial", 28, "bold"), fg='yellow', bg='black')
         
         # Status label
         self.status_label = tk.Label(self.root, text="", font=("Arial", 20), fg='white', bg='black')
+        
+        # Last options applied to each widget, so renders only touch what changed
+        self.shown = {}
+        self.screen = None
+    
+    def ensure_option_buttons(self, count):
+        while len(self.option_buttons) < count:
+            index = len(self.option_buttons)
+            self.option_buttons.append(tk.Button(self.options_frame, text="", font=("Arial", 24, "bold"),
+                                                 bg='purple', fg='white', width=8, height=2,
+                                                 command=lambda i=index: self.select_option(i)))
+    
+    def configure_changed(self, widget, **options):
+        # Reconfigure only the options that differ from what's on screen
+        shown = self.shown.setdefault(widget, {})
+        changed = {key: value for key, value in options.items() if shown.get(key) != value}
+        if changed:
+            widget.config(**changed)
+            shown.update(changed)
     
     def show_menu(self):
         self.clear_ui()
         self.title_label.pack(pady=20)
-        
-        single_btn = tk.Button(self.menu_frame, text="Single Player", font=("Arial", 20), bg='blue', fg='white', 
-                               command=lambda: self.start_single())
-        single_btn.pack(pady=10)
-        
-        host_btn = tk.Button(self.menu_frame, text="Host Multiplayer Game", font=("Arial", 20), bg='green', fg='white',
-                             command=lambda: self.start_host())
-        host_btn.pack(pady=10)
-        
-        client_btn = tk.Button(self.menu_frame, text="Join Multiplayer (Connect)", font=("Arial", 20), bg='orange', fg='white',
-                               command=self.start_client)
-        client_btn.pack(pady=10)
-        
-        quit_btn = tk.Button(self.menu_frame, text="Quit", font=("Arial", 20), bg='red', fg='white',
-                             command=self.root.quit)
-        quit_btn.pack(pady=10)
-        
         self.menu_frame.pack(expand=True)
+        self.screen = 'menu'
     
     def clear_ui(self):
         for widget in self.root.winfo_children():
             widget.pack_forget()
+        self.screen = None
+        # Drop renders queued for the screen being left
+        self.dirty.clear()
     
     def start_single(self):
         self.mode = GameMode.SINGLE
@@ -118,35 +182,40 @@ class MathBlat:
     def show_difficulty_menu(self):
         self.clear_ui()
         self.title_label.pack(pady=20)
-        
-        tk.Button(self.root, text="Easy", font=("Arial", 24), bg='green', fg='white',
-                  command=lambda: self.start_game(Difficulty.EASY)).pack(pady=10, fill='x', padx=100)
-        tk.Button(self.root, text="Medium", font=("Arial", 24), bg='yellow', fg='black',
-                  command=lambda: self.start_game(Difficulty.MEDIUM)).pack(pady=10, fill='x', padx=100)
-        tk.Button(self.root, text="Hard", font=("Arial", 24), bg='red', fg='white',
-                  command=lambda: self.start_game(Difficulty.HARD)).pack(pady=10, fill='x', padx=100)
-        
-        tk.Button(self.root, text="Back", font=("Arial", 20), command=self.show_menu).pack(pady=20)
+        self.difficulty_frame.pack(fill='x', padx=100)
+        self.screen = 'difficulty'
     
     def start_game(self, diff):
+        if self.mode == GameMode.HOST:
+            self.schedule = ProblemSchedule.new(diff.name, rounds=MATCH_ROUNDS)
+            self.send_schedule()
+        elif self.mode == GameMode.CLIENT:
+            if self.schedule is None:
+                # The host's schedule decides difficulty and problems
+                self.clear_ui()
+                self.title_label.pack(pady=20)
+                self.configure_changed(self.status_label, text="Waiting for the host to start...", fg='white')
+                self.status_label.pack()
+                return
+            diff = Difficulty[self.schedule.difficulty]
         self.difficulty = diff
         self.my_score = 0
         self.opponent_score = 0
+        self.round = 0
         self.running = True
+        if self.schedule:
+            self.start_recording()
         self.update_scores()
         self.next_problem()
-        threading.Thread(target=self.game_loop, daemon=True).start()
-    
-    def game_loop(self):
-        while self.running:
-            time.sleep(0.1)
-            if self.mode != GameMode.SINGLE:
-                self.check_network()
     
     def next_problem(self):
         if not self.running:
             return
         
+        if self.schedule:
+            self.next_scheduled_problem()
+            return
+        
         num1, num2 = self.generate_numbers()
         op = random.choice(['+', '-', '*', '/'])
         if op == '/':
@@ -175,10 +244,42 @@ class MathBlat:
         self.options += wrong
         random.shuffle(self.options)
         
-        self.timer = 15  # 15 seconds per problem
+        self.round += 1
+        self.start_round_timer(15)  # 15 seconds per problem
         self.update_ui()
         self.send_problem_to_opponent()
     
+    def next_scheduled_problem(self):
+        # Generated locally from the shared seed - no network round trip
+        self.round += 1
+        if self.schedule.rounds and self.round > self.schedule.rounds:
+            self.end_match()
+            return
+        problem = self.schedule.problem(self.round)
+        self.current_problem = problem['problem_text']
+        self.correct_answer = problem['correct_answer']
+        self.options = list(problem['options'])
+        if self.recording:
+            self.recording.problem(self.round, problem)
+        self.start_round_timer(self.schedule.round_time)
+        self.update_ui()
+    
+    def start_round_timer(self, duration):
+        self.round_timer.start(self.round, duration)
+        self.timer = self.round_timer.seconds_left()
+    
+    def end_match(self):
+        self.running = False
+        self.round_timer.stop()
+        self.end_recording("finished")
+        if self.my_score > self.opponent_score:
+            result = "You win!"
+        elif self.my_score < self.opponent_score:
+            result = "You lose!"
+        else:
+            result = "It's a draw!"
+        self.configure_changed(self.status_label, text=f"Match over! {result}", fg='cyan')
+    
     def generate_numbers(self):
         d = self.difficulty.value
         if d == 1:  # Easy
@@ -189,10 +290,60 @@ class MathBlat:
             return random.randint(1, 100), random.randint(1, 100)
     
     def update_ui(self):
-        self.root.after(0, self._update_ui)
+        # Rendered by the next pump_events(), however often it's requested
+        self.dirty.add('game')
+    
+    def pump_events(self):
+        # The one Tk callback for everything other threads produced since
+        # the last frame: apply every event, then repaint once. The next
+        # frame is scheduled whatever happens, so one bad event can't stop it
+        try:
+            for kind, payload in self.events.drain():
+                if kind == 'message':
+                    self.handle_message(*payload)
+                elif kind == 'accepted':
+                    self.handle_accepted(*payload)
+                elif kind == 'disconnect':
+                    self.handle_disconnect(payload)
+            self.render()
+        finally:
+            self.root.after(UI_FRAME_MS, self.pump_events)
+    
+    def render(self):
+        dirty, self.dirty = self.dirty, set()
+        if not dirty:
+            return
+        if 'game' in dirty:
+            self._update_ui()
+        if 'scores' in dirty:
+            self._update_scores()
+        if 'timer' in dirty and 'game' not in dirty:
+            self.configure_changed(self.timer_label, text=f"Time: {self.timer}s")
+        self.repaints += 1
     
     def _update_ui(self):
-        self.clear_ui_except_frames()
+        self.show_game_screen()
+        
+        self.configure_changed(self.problem_label, text=self.current_problem)
+        self.configure_changed(self.timer_label, text=f"Time: {self.timer}s")
+        
+        count = len(self.options)
+        self.ensure_option_buttons(count)
+        for button, opt in zip(self.option_buttons, self.options):
+            self.configure_changed(button, text=str(opt))
+        if count != self.visible_options:
+            # Repack only when the number of options changes
+            for index, button in enumerate(self.option_buttons):
+                button.pack_forget()
+                if index < count:
+                    button.pack(pady=5)
+            self.visible_options = count
+    
+    def show_game_screen(self):
+        # Lay the game screen out once; later renders only reconfigure
+        if self.screen == 'game':
+            return
+        self.clear_ui()
         
         self.title_label.pack(pady=20)
         self.score_frame.pack(pady=10)
@@ -200,53 +351,87 @@ class MathBlat:
         self.opp_score_label.pack()
         
         self.problem_frame.pack(pady=20)
-        self.problem_label.config(text=self.current_problem)
         self.problem_label.pack()
         
-        self.timer_label.config(text=f"Time: {self.timer}s")
         self.timer_label.pack(pady=10)
         
-        for opt in self.options:
-            btn = tk.Button(self.options_frame, text=str(opt), font=("Arial", 24, "bold"), 
-                            bg='purple', fg='white', width=8, height=2,
-                            command=lambda o=opt: self.select_answer(o))
-            btn.pack(pady=5)
-        
         self.options_frame.pack(pady=20)
         self.status_label.pack()
+        self.screen = 'game'
     
-    def clear_ui_except_frames(self):
-        # Hide all but keep frames ready
-        for child in self.root.winfo_children():
-            child.pack_forget()
+    def select_option(self, index):
+        if index < len(self.options):
+            self.select_answer(self.options[index])
     
     def select_answer(self, selected):
-        if not self.running:
+        # One answer per round, and none after it timed out
+        if not self.running or not self.round_timer.running:
             return
+        reaction = self.round_timer.duration - self.round_timer.remaining()
+        self.round_timer.stop()
+        if self.recording:
+            self.recording.answer(self.round, self.local_player(), selected, selected == self.correct_answer,
+                                  reaction=reaction)
         
         if selected == self.correct_answer:
             self.my_score += 10 * self.difficulty.value
-            self.status_label.config(text="Correct! +10 points", fg='green')
+            self.configure_changed(self.status_label, text="Correct! +10 points", fg='green')
             self.send_answer(True)
         else:
-            self.status_label.config(text="Wrong!", fg='red')
+            self.configure_changed(self.status_label, text="Wrong!", fg='red')
             self.send_answer(False)
         
         self.update_scores()
         self.root.after(1000, self.next_problem)
     
     def update_scores(self):
-        self.my_score_label.config(text=f"Your Score: {self.my_score}")
-        self.opp_score_label.config(text=f"Opponent: {self.opponent_score}")
+        self.dirty.add('scores')
+    
+    # Match recording: players are ["Host", "Guest"] on both peers, and the
+    # schedule's seed is the match id, so both recordings line up
+    def local_player(self):
+        return 0 if self.mode == GameMode.HOST else 1
+    
+    def recorded_scores(self):
+        scores = [self.opponent_score, self.opponent_score]
+        scores[self.local_player()] = self.my_score
+        return scores
+    
+    def start_recording(self):
+        self.end_recording("abandoned")
+        s = self.schedule
+        self.recording = self.recorder.start_match(["Host", "Guest"], s.difficulty, s.seed, s.rounds,
+                                                   s.round_time, match_id=s.seed)
+    
+    def end_recording(self, reason):
+        if self.recording:
+            self.recording.end(reason, self.recorded_scores())
+            self.recording = None
+    
+    def _update_scores(self):
+        self.configure_changed(self.my_score_label, text=f"Your Score: {self.my_score}")
+        self.configure_changed(self.opp_score_label, text=f"Opponent: {self.opponent_score}")
     
     def timer_tick(self):
-        if self.timer > 0:
-            self.timer -= 1
-            self.root.after(1000, self.timer_tick)
-            self.update_ui()
-        else:
-            self.status_label.config(text="Time up!", fg='orange')
-            self.root.after(1000, self.next_problem)
+        # Runs every timer_refresh_ms for the app's lifetime. The time left
+        # is read from the round's monotonic deadline, so late or slow
+        # ticks never add up to drift.
+        if self.running and self.round_timer.running:
+            left = self.round_timer.seconds_left()
+            if left != self.timer:
+                self.timer = left
+                self.dirty.add('timer')
+            timed_out = self.round_timer.poll()
+            if timed_out is not None:
+                self.on_round_timeout(timed_out)
+        self.root.after(self.timer_refresh_ms, self.timer_tick)
+    
+    def on_round_timeout(self, round_id):
+        # poll() reports each round's timeout exactly once
+        if round_id != self.round:
+            return
+        self.configure_changed(self.status_label, text="Time up!", fg='orange')
+        self.root.after(1000, self.next_problem)
     
     # Network functions
     def host_server(self, port):
@@ -254,67 +439,111 @@ class MathBlat:
         self.server_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         self.server_socket.bind(('0.0.0.0', port))
         self.server_socket.listen(1)
-        threading.Thread(target=self.accept_client, args=(port,), daemon=True).start()
+        self.network.add_listener(self.server_socket, self.accept_client)
         messagebox.showinfo("Host", f"Hosting on port {port}. Share your IP: {socket.gethostbyname(socket.gethostname())}:{port}")
     
-    def accept_client(self, port):
-        conn, addr = self.server_socket.accept()
-        self.client_socket = conn
+    def accept_client(self, conn, addr):
+        # Runs on the network thread
+        self.events.post('accepted', (conn, addr))
+    
+    def handle_accepted(self, conn, addr):
+        if self.connection and not self.connection.closed:
+            conn.close()
+            return
+        self.connection = self.network.add_connection(conn, self.on_network_message, self.on_disconnect)
         print(f"Client connected from {addr}")
+        # The host may have started before the client joined
+        if self.running:
+            self.send_schedule()
     
     def connect_client(self, ip, port):
-        self.client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         try:
-            self.client_socket.connect((ip, port))
+            sock = socket.create_connection((ip, port), timeout=10)
+            self.connection = self.network.add_connection(sock, self.on_network_message, self.on_disconnect)
             messagebox.showinfo("Connected", "Connected to host!")
         except:
             messagebox.showerror("Error", "Failed to connect!")
             self.mode = GameMode.SINGLE
     
     def send_problem_to_opponent(self):
-        if self.client_socket:
-            try:
-                data = {'type': 'problem', 'problem': self.current_problem, 'options': self.options}
-                self.client_socket.send(json.dumps(data).encode())
-            except:
-                pass
+        # Scheduled matches never send problems
+        if self.connection and self.schedule is None:
+            self.connection.send(MessageType.PROBLEM, {'problem': self.current_problem, 'options': self.options})
+    
+    def send_schedule(self):
+        if self.connection and self.schedule:
+            self.connection.send(MessageType.SCHEDULE, self.schedule.to_dict())
     
     def send_answer(self, correct):
-        if self.client_socket:
-            try:
-                data = {'type': 'answer', 'correct': correct, 'score': self.my_score}
-                self.client_socket.send(json.dumps(data).encode())
-            except:
-                pass
-    
-    def check_network(self):
-        if self.client_socket:
-            try:
-                data = self.client_socket.recv(1024).decode()
-                if data:
-                    msg = json.loads(data)
-                    if msg['type'] == 'problem':
-                        self.current_problem = msg['problem']
-                        self.options = msg['options']
-                        self.update_ui()
-                    elif msg['type'] == 'answer':
-                        if msg['correct']:
-                            self.opponent_score += 10 * self.difficulty.value
-                            self.update_scores()
-            except:
-                pass
+        if self.connection:
+            self.connection.send(MessageType.ANSWER, {'round': self.round, 'correct': correct, 'score': self.my_score})
+    
+    def on_network_message(self, msg_type, msg):
+        # Runs on the network thread the moment a message arrives; Tk work
+        # has to happen on the main thread. Only the newest problem matters.
+        coalesce = 'problem' if msg_type == MessageType.PROBLEM else None
+        self.events.post('message', (msg_type, msg), coalesce=coalesce)
+    
+    def on_disconnect(self, error):
+        self.events.post('disconnect', error)
+    
+    def handle_disconnect(self, error):
+        if error:
+            print(f"Opponent disconnected: {error}")
+        if self.running and self.mode != GameMode.SINGLE:
+            self.configure_changed(self.status_label, text="Opponent disconnected", fg='orange')
+    
+    def handle_message(self, msg_type, msg):
+        # Peer payloads are untrusted: check them before touching game state
+        if not isinstance(msg, dict):
+            print(f"WARNING: Ignoring malformed {msg_type.name} message")
+            return
+        if msg_type == MessageType.SCHEDULE:
+            if self.mode == GameMode.CLIENT:
+                try:
+                    schedule = ProblemSchedule.from_dict(msg)
+                except ValueError as e:
+                    print(f"WARNING: {e}")
+                    return
+                difficulty = Difficulty.__members__.get(schedule.difficulty)
+                if difficulty is None:
+                    print(f"WARNING: Unsupported difficulty {schedule.difficulty}")
+                    return
+                self.schedule = schedule
+                self.start_game(difficulty)
+        elif msg_type == MessageType.PROBLEM:
+            problem, options = msg.get('problem'), msg.get('options')
+            if not isinstance(problem, str) or not isinstance(options, list):
+                print("WARNING: Ignoring malformed PROBLEM message")
+                return
+            self.current_problem = problem
+            self.options = options
+            self.update_ui()
+        elif msg_type == MessageType.ANSWER:
+            correct = msg.get('correct') is True
+            if self.recording:
+                self.recording.answer(msg.get('round', self.round), 1 - self.local_player(), None, correct)
+            if correct:
+                self.opponent_score += 10 * self.difficulty.value
+                self.update_scores()
     
     def quit_game(self):
         self.running = False
+        self.round_timer.stop()
+        self.end_recording("quit")
+        self.schedule = None
         if self.server_socket:
-            self.server_socket.close()
-        if self.client_socket:
-            self.client_socket.close()
+            self.network.remove_listener(self.server_socket)
+            self.server_socket = None
+        if self.connection:
+            self.connection.close()
+            self.connection = None
         self.show_menu()
     
     def run(self):
         self.root.protocol("WM_DELETE_WINDOW", self.quit_game)
         self.root.mainloop()
+        self.recorder.close()
 
 if __name__ == "__main__":
     import sys
@@ -21,16 +21,25 @@ Usage:
     if backup.is_available():
         problem = backup.generate_problem("MEDIUM")
         backup.save_score("Player", 100, "MEDIUM")
+    
+    # Scores, settings and profiles in one SQLite database; the end-of-game
+    # update (score + stats + settings + profile) is a single commit
+    backup = BackupSystem(score_storage="sqlite")
+    backup.record_game("Player", 100, "MEDIUM")
 """
 
 import sys
+import threading
+from contextlib import nullcontext
+from datetime import date
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
 
 # Import backup modules
 from problem_generator import ProblemGenerator, Difficulty
 from score_manager import ScoreManager
 from config_manager import ConfigManager
+from data_store import DataStore
 
 # Teacher mode is optional - import but don't require
 try:
@@ -49,12 +58,32 @@ class BackupSystem:
     Implements lazy-loading for optional features like teacher mode.
     """
     
-    def __init__(self):
+    # DataStore namespace for per-player profiles
+    PROFILE_NAMESPACE = "profiles"
+    
+    def __init__(self, shared_scores: bool = False, score_storage: str = "json",
+                 config_overrides: Optional[Dict[str, Any]] = None, data_dir: Optional[str] = None):
         """Initialize all backup systems with error handling.
         
         Sets up core systems: problem generator, score manager, and config manager.
         Teacher mode is lazy-loaded on first use for performance.
+        
+        Args:
+            shared_scores: Use multi-process safe score writes (see ScoreManager)
+            score_storage: "json", "binary" or "sqlite" score history (see
+                           ScoreManager). "sqlite" also keeps settings and
+                           player profiles in the same DataStore.
+            config_overrides: Command-line config layer, {"Category.Key": value}
+                              (see parse_cli_overrides)
+            data_dir: Directory for scores, config and the data store
+                      (default ~/.mathblat)
         """
+        self.shared_scores = shared_scores
+        self.score_storage = score_storage
+        self.config_overrides = config_overrides
+        self.data_dir = Path(data_dir) if data_dir else None
+        self.data_store = None
+        
         # Core backup systems
         self.problem_gen = None
         self.score_manager = None
@@ -65,6 +94,7 @@ class BackupSystem:
         self.initialized = False
         self.errors = []
         self._teacher_mode_initialized = False
+        self._teacher_mode_lock = threading.Lock()
         
         self._initialize_systems()
     
@@ -72,8 +102,17 @@ class BackupSystem:
         """Initialize all backup systems with error handling"""
         try:
             self.problem_gen = ProblemGenerator(difficulty="MEDIUM")
-            self.score_manager = ScoreManager()
-            self.config_manager = ConfigManager()
+            data_dir = self.data_dir or ScoreManager.DEFAULT_SCORES_DIR
+            if self.score_storage == "sqlite":
+                self.data_store = DataStore(data_dir / DataStore.DEFAULT_DB_FILE.name)
+            self.score_manager = ScoreManager(
+                data_dir / ScoreManager.DEFAULT_SCORES_FILE.name, shared=self.shared_scores,
+                storage=self.score_storage, data_store=self.data_store,
+            )
+            self.config_manager = ConfigManager(
+                data_dir / ConfigManager.DEFAULT_CONFIG_FILE.name, overrides=self.config_overrides,
+                data_store=self.data_store,
+            )
             
             self.initialized = True
             print("✅ Backup systems initialized successfully")
@@ -88,14 +127,18 @@ class BackupSystem:
         if self._teacher_mode_initialized or not TEACHER_MODE_AVAILABLE:
             return
         
-        self._teacher_mode_initialized = True
-        
-        try:
-            self.teacher_mode = TeacherMode()
-            print("✅ Teacher mode initialized successfully")
-        except Exception as te:
-            self.teacher_mode = None
-            self._log_error(f"Teacher mode initialization failed: {te}")
+        with self._teacher_mode_lock:
+            # Another thread may have loaded it while we waited
+            if self._teacher_mode_initialized:
+                return
+            
+            try:
+                self.teacher_mode = TeacherMode()
+                print("✅ Teacher mode initialized successfully")
+            except Exception as te:
+                self.teacher_mode = None
+                self._log_error(f"Teacher mode initialization failed: {te}")
+            self._teacher_mode_initialized = True
     
     def is_available(self) -> bool:
         """Check if backup systems are available"""
@@ -118,8 +161,8 @@ class BackupSystem:
                 self.errors.append("Problem generator not initialized")
                 return None
             
-            self.problem_gen.set_difficulty(difficulty)
-            return self.problem_gen.generate_problem()
+            # Per-call difficulty - the generator is shared between threads
+            return self.problem_gen.generate_problem(difficulty)
         
         except Exception as e:
             self.errors.append(f"Problem generation failed: {e}")
@@ -131,8 +174,7 @@ class BackupSystem:
             if not self.problem_gen:
                 return []
             
-            self.problem_gen.set_difficulty(difficulty)
-            return self.problem_gen.generate_batch(count)
+            return self.problem_gen.generate_batch(count, difficulty)
         
         except Exception as e:
             self.errors.append(f"Batch problem generation failed: {e}")
@@ -162,6 +204,27 @@ class BackupSystem:
             self.errors.append(f"Score save failed: {e}")
             return False
     
+    def save_scores(self, entries) -> int:
+        """
+        Save many scores at once using Python backup.
+        
+        Args:
+            entries: Iterable of score entries, or path to a CSV/JSONL file
+        
+        Returns:
+            Number of entries saved
+        """
+        try:
+            if not self.score_manager:
+                self.errors.append("Score manager not initialized")
+                return 0
+            
+            return self.score_manager.save_scores(entries)
+        
+        except Exception as e:
+            self.errors.append(f"Bulk score save failed: {e}")
+            return 0
+    
     def load_scores(self) -> list:
         """Get all high scores"""
         try:
@@ -186,6 +249,31 @@ class BackupSystem:
             self.errors.append(f"Top scores retrieval failed: {e}")
             return []
     
+    def get_leaderboard(self, window: str = "daily", difficulty: Optional[str] = None,
+                        count: int = 10) -> list:
+        """Get top scores for "daily", "weekly" or "all" time"""
+        try:
+            if not self.score_manager:
+                return []
+            
+            return self.score_manager.get_windowed_scores(window, difficulty, count)
+        
+        except Exception as e:
+            self.errors.append(f"Leaderboard retrieval failed: {e}")
+            return []
+    
+    def get_percentile(self, score: int, difficulty: str) -> float:
+        """Percentage of all saved scores at a difficulty that `score` beats"""
+        try:
+            if not self.score_manager:
+                return 0.0
+            
+            return self.score_manager.get_percentile(score, difficulty)
+        
+        except Exception as e:
+            self.errors.append(f"Percentile lookup failed: {e}")
+            return 0.0
+    
     def is_high_score(self, score: int) -> bool:
         """Check if score qualifies for high scores"""
         try:
@@ -223,6 +311,98 @@ class BackupSystem:
             self.errors.append(f"Setting save failed {category}.{key}: {e}")
             return False
     
+    def save_settings(self, settings: Dict[str, Dict]) -> bool:
+        """
+        Save several settings with one validated, atomic config write.
+        
+        Args:
+            settings: {category: {key: value}} mapping
+        
+        Returns:
+            True if every setting was saved, False if none were
+        """
+        try:
+            if not self.config_manager:
+                return False
+            
+            with self.config_manager.transaction():
+                for category, values in settings.items():
+                    for key, value in values.items():
+                        self.config_manager.save_setting(category, key, value)
+            return True
+        
+        except Exception as e:
+            self.errors.append(f"Batch settings save failed: {e}")
+            return False
+    
+    def record_game(self, player_name: str, score: int, difficulty: str,
+                    settings: Optional[Dict[str, Dict]] = None) -> bool:
+        """
+        Save everything that changes at the end of a game together.
+        
+        Saves the score, updates the Player stats (games played, total
+        score, last played date), applies `settings` and, with a data store,
+        updates the player's profile. With score_storage="sqlite" all of it
+        is one transaction and one fsync, and nothing is saved if any part
+        fails; otherwise it is one score write plus one config write.
+        
+        Args:
+            player_name: Player name
+            score: Score achieved
+            difficulty: Difficulty level
+            settings: Optional {category: {key: value}} settings to save
+        
+        Returns:
+            True if everything was saved
+        """
+        try:
+            if not self.score_manager or not self.config_manager:
+                self.errors.append("Backup systems not initialized")
+                return False
+            
+            config = self.config_manager
+            with self.data_store.transaction() if self.data_store else nullcontext():
+                if not self.score_manager.save_score(player_name, score, difficulty):
+                    raise RuntimeError("score was not saved")
+                
+                with config.transaction():
+                    config.save_setting("Player", "TotalGamesPlayed", config.player.total_games_played + 1)
+                    config.save_setting("Player", "TotalScore", config.player.total_score + int(score))
+                    config.save_setting("Player", "LastPlayedDate", date.today().isoformat())
+                    for category, values in (settings or {}).items():
+                        for key, value in values.items():
+                            config.save_setting(category, key, value)
+                
+                if self.data_store:
+                    profile = self.get_profile(player_name)
+                    profile["games"] = profile.get("games", 0) + 1
+                    profile["total_score"] = profile.get("total_score", 0) + int(score)
+                    profile["best"] = max(profile.get("best", 0), int(score))
+                    profile["last_played"] = date.today().isoformat()
+                    self.data_store.put(self.PROFILE_NAMESPACE, player_name, profile)
+            return True
+        
+        except Exception as e:
+            self.errors.append(f"End-of-game save failed: {e}")
+            # The transaction rolled back, but the managers had already
+            # updated their in-memory state - re-read what was committed
+            if self.data_store:
+                self.score_manager.load_scores()
+                config.load_config()
+            return False
+    
+    def get_profile(self, player_name: str) -> Dict:
+        """Get a player's profile (empty without score_storage="sqlite")"""
+        try:
+            if not self.data_store:
+                return {}
+            
+            return self.data_store.get(self.PROFILE_NAMESPACE, player_name, {})
+        
+        except Exception as e:
+            self.errors.append(f"Profile load failed: {e}")
+            return {}
+    
     def get_config(self, category: str) -> Dict:
         """Get all settings in a category"""
         try:
@@ -303,8 +483,7 @@ class BackupSystem:
             return {}
         
         try:
-            self.teacher_mode.set_difficulty(difficulty)
-            return self.teacher_mode.generate_pemdas_problem()
+            return self.teacher_mode.generate_pemdas_problem(difficulty)
         except Exception as e:
             self._log_error(f"PEMDAS generation failed: {e}")
             return {}
@@ -333,8 +512,7 @@ class BackupSystem:
             return {}
         
         try:
-            self.teacher_mode.set_difficulty(difficulty)
-            return self.teacher_mode.generate_square_root_problem()
+            return self.teacher_mode.generate_square_root_problem(difficulty)
         except Exception as e:
             self._log_error(f"Square root generation failed: {e}")
             return {}
@@ -363,8 +541,7 @@ class BackupSystem:
             return {}
         
         try:
-            self.teacher_mode.set_difficulty(difficulty)
-            return self.teacher_mode.generate_long_division_problem()
+            return self.teacher_mode.generate_long_division_problem(difficulty)
         except Exception as e:
             self._log_error(f"Long division generation failed: {e}")
             return {}
@@ -391,14 +568,12 @@ class BackupSystem:
             return {}
         
         try:
-            self.teacher_mode.set_difficulty(difficulty)
-            
             if problem_type == "PEMDAS":
-                return self.teacher_mode.generate_pemdas_problem()
+                return self.teacher_mode.generate_pemdas_problem(difficulty)
             elif problem_type == "SQUARE_ROOT":
-                return self.teacher_mode.generate_square_root_problem()
+                return self.teacher_mode.generate_square_root_problem(difficulty)
             elif problem_type == "LONG_DIVISION":
-                return self.teacher_mode.generate_long_division_problem()
+                return self.teacher_mode.generate_long_division_problem(difficulty)
             else:
                 self._log_error(f"Unknown problem type: {problem_type}")
                 return {}
@@ -409,13 +584,20 @@ class BackupSystem:
 
 # Global instance for easy access
 _backup_instance = None
+_backup_instance_lock = threading.Lock()
 
 
 def get_backup_system() -> BackupSystem:
-    """Get or create the global backup system instance"""
+    """Get or create the global backup system instance.
+    
+    Safe to call from several threads: exactly one instance is created,
+    and once it exists the lock is skipped.
+    """
     global _backup_instance
     if _backup_instance is None:
-        _backup_instance = BackupSystem()
+        with _backup_instance_lock:
+            if _backup_instance is None:
+                _backup_instance = BackupSystem()
     return _backup_instance
 
 
@@ -0,0 +1,574 @@
+#!/usr/bin/env python3
+"""
+MathBlat Benchmarks - Python Backup
+Throughput and correctness benchmarks for the backup systems.
+
+Usage:
+    python3 benchmarks.py concurrent-writers --writers 1 2 4 8 --scores 200
+    python3 benchmarks.py threaded-access --readers 8 --writers 2
+    python3 benchmarks.py end-of-game --games 200
+    python3 benchmarks.py lock-order --games 200
+    python3 benchmarks.py problem-generation --threads 1 2 4 8
+    python3 benchmarks.py net-throughput --messages 50000
+    python3 benchmarks.py net-latency --messages 50
+    python3 benchmarks.py spectators --spectators 0 20 --stalled 2
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import multiprocessing
+import random
+import socket
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Sequence
+
+from backup_system import BackupSystem
+from load_tester import run_bots
+from match_server import MatchServer
+from net_loop import NetworkLoop
+from net_protocol import FrameReader, MessageType, encode_message, send_message
+from problem_generator import Difficulty, ProblemGenerator
+from score_manager import ScoreManager
+
+
+def _writer_process(scores_file: str, writer_id: int, count: int, start_event) -> None:
+    """Save `count` uniquely identifiable scores from one process"""
+    manager = ScoreManager(scores_file, shared=True)
+    start_event.wait()
+    for i in range(count):
+        manager.save_score(f"w{writer_id}-{i}", writer_id * count + i, "MEDIUM")
+
+
+def bench_concurrent_writers(writers: int, scores_per_writer: int) -> Dict:
+    """Run `writers` processes saving scores into one shared scores file.
+
+    Checks that every submitted score reached the history log exactly once
+    and that the final top-10 matches the top-10 of everything submitted.
+
+    Returns:
+        Dictionary with throughput figures and lost-update counts
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        scores_file = str(Path(tmp) / "high_scores.json")
+        ScoreManager(scores_file, shared=True)
+
+        start_event = multiprocessing.Event()
+        procs = [
+            multiprocessing.Process(
+                target=_writer_process,
+                args=(scores_file, w, scores_per_writer, start_event),
+            )
+            for w in range(writers)
+        ]
+        for p in procs:
+            p.start()
+
+        started = time.perf_counter()
+        start_event.set()
+        for p in procs:
+            p.join()
+        elapsed = time.perf_counter() - started
+
+        manager = ScoreManager(scores_file, shared=True)
+        with open(manager.history_file, 'r', encoding='utf-8') as f:
+            logged = [json.loads(line)["name"] for line in f]
+
+        expected_names = {f"w{w}-{i}" for w in range(writers) for i in range(scores_per_writer)}
+        total = writers * scores_per_writer
+        expected_top = sorted(range(total), reverse=True)[:ScoreManager.MAX_HIGH_SCORES]
+        actual_top = [entry["score"] for entry in manager.get_high_scores()]
+
+        return {
+            "writers": writers,
+            "saves": total,
+            "seconds": elapsed,
+            "saves_per_sec": total / elapsed if elapsed > 0 else 0.0,
+            "lost_history": len(expected_names - set(logged)),
+            "duplicate_history": len(logged) - len(set(logged)),
+            "top_scores_ok": actual_top == expected_top,
+        }
+
+
+def run_concurrent_writers(writer_counts: Sequence[int], scores_per_writer: int) -> List[Dict]:
+    """Run the concurrent writer benchmark for each writer count and print a table"""
+    results = []
+    print(f"{'writers':>8} {'saves':>8} {'seconds':>8} {'saves/s':>10} {'lost':>5} {'dup':>5} {'top10':>6}")
+    for writers in writer_counts:
+        r = bench_concurrent_writers(writers, scores_per_writer)
+        results.append(r)
+        print(f"{r['writers']:>8} {r['saves']:>8} {r['seconds']:>8.2f} {r['saves_per_sec']:>10.0f} "
+              f"{r['lost_history']:>5} {r['duplicate_history']:>5} {'ok' if r['top_scores_ok'] else 'FAIL':>6}")
+    return results
+
+
+def bench_threaded_access(readers: int, writers: int, scores_per_writer: int) -> Dict:
+    """Hammer one ScoreManager from reader and writer threads.
+
+    Every snapshot a reader sees must be sorted and within MAX_HIGH_SCORES,
+    and the final list must be the top of everything written.
+
+    Returns:
+        Dictionary with read/write counts and the number of bad snapshots
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = ScoreManager(str(Path(tmp) / "high_scores.json"))
+        done = threading.Event()
+        reads = [0] * readers
+        bad = [0] * readers
+
+        def reader(index):
+            while not done.is_set():
+                snapshot = manager.get_high_scores()
+                values = [entry["score"] for entry in snapshot]
+                if values != sorted(values, reverse=True) or len(values) > ScoreManager.MAX_HIGH_SCORES:
+                    bad[index] += 1
+                reads[index] += 1
+                # Yield the GIL so writers aren't starved by spinning readers
+                time.sleep(0)
+
+        def writer(index):
+            for i in range(scores_per_writer):
+                manager.save_score(f"t{index}-{i}", index * scores_per_writer + i, "MEDIUM")
+
+        reader_threads = [threading.Thread(target=reader, args=(r,)) for r in range(readers)]
+        writer_threads = [threading.Thread(target=writer, args=(w,)) for w in range(writers)]
+        started = time.perf_counter()
+        for t in reader_threads + writer_threads:
+            t.start()
+        for t in writer_threads:
+            t.join()
+        done.set()
+        for t in reader_threads:
+            t.join()
+        elapsed = time.perf_counter() - started
+
+        total = writers * scores_per_writer
+        expected_top = sorted(range(total), reverse=True)[:ScoreManager.MAX_HIGH_SCORES]
+        return {
+            "readers": readers,
+            "writers": writers,
+            "seconds": elapsed,
+            "reads_per_sec": sum(reads) / elapsed if elapsed > 0 else 0.0,
+            "writes_per_sec": total / elapsed if elapsed > 0 else 0.0,
+            "bad_snapshots": sum(bad),
+            "top_scores_ok": [e["score"] for e in manager.get_high_scores()] == expected_top,
+        }
+
+
+def bench_problem_generation(threads: int, problems_per_thread: int) -> Dict:
+    """Generate problems from one shared ProblemGenerator on several threads.
+
+    Each thread asks for its own difficulty. A problem whose operands fall
+    outside that difficulty's range means another thread's difficulty
+    leaked into it.
+
+    Returns:
+        Dictionary with throughput and the number of leaked problems
+    """
+    generator = ProblemGenerator()
+    levels = list(Difficulty)
+    leaked = [0] * threads
+
+    def worker(index):
+        level = levels[index % len(levels)]
+        limit = ProblemGenerator.DIFFICULTY_RANGES[level]["max"]
+        for _ in range(problems_per_thread):
+            problem = generator.generate_problem(level.value)
+            if max(problem["operand1"], problem["operand2"]) > limit:
+                leaked[index] += 1
+
+    workers = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    started = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    elapsed = time.perf_counter() - started
+
+    total = threads * problems_per_thread
+    return {
+        "threads": threads,
+        "problems": total,
+        "problems_per_sec": total / elapsed if elapsed > 0 else 0.0,
+        "leaked": sum(leaked),
+        "counted_ok": generator.problems_generated == total,
+    }
+
+
+def bench_net_throughput(messages: int, payload_size: int) -> Dict:
+    """Send numbered ANSWER messages over localhost TCP and check every one arrives.
+
+    The sender uses one sendall() per message, so the receiver sees the
+    stream split and coalesced however the kernel likes.
+
+    Returns:
+        Dictionary with messages/sec and lost / out-of-order counts
+    """
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(1)
+    received: List[int] = []
+
+    def receive():
+        conn, _ = listener.accept()
+        reader = FrameReader()
+        with conn:
+            while True:
+                try:
+                    batch = reader.read_from(conn)
+                except ConnectionError:
+                    return
+                received.extend(payload["seq"] for _, payload in batch)
+
+    receiver = threading.Thread(target=receive)
+    receiver.start()
+    padding = "x" * payload_size
+    started = time.perf_counter()
+    with socket.create_connection(listener.getsockname()) as sender:
+        for seq in range(messages):
+            send_message(sender, MessageType.ANSWER, {"seq": seq, "correct": True, "pad": padding})
+    receiver.join()
+    elapsed = time.perf_counter() - started
+    listener.close()
+
+    return {
+        "messages": messages,
+        "payload_size": payload_size,
+        "seconds": elapsed,
+        "messages_per_sec": messages / elapsed if elapsed > 0 else 0.0,
+        "lost": messages - len(set(received)),
+        "out_of_order": sum(1 for a, b in zip(received, received[1:]) if b != a + 1),
+    }
+
+
+def bench_net_latency(mode: str, messages: int, poll_interval: float = 0.1) -> Dict:
+    """Time from send() to the receiver's callback for opponent ANSWER messages.
+
+    Messages are sent at random moments, like real answers. "poll" is the
+    old game loop (sleep, then a blocking recv); "event" is NetworkLoop.
+
+    Returns:
+        Dictionary with average, median and worst notification latency (ms)
+    """
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(1)
+    latencies: List[float] = []
+    done = threading.Event()
+
+    def on_message(msg_type, payload):
+        latencies.append(time.perf_counter() - payload["sent"])
+        if len(latencies) == messages:
+            done.set()
+
+    loop = None
+    sender = socket.create_connection(listener.getsockname())
+    sender.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    conn, _ = listener.accept()
+    if mode == "event":
+        loop = NetworkLoop()
+        loop.add_connection(conn, on_message)
+    else:
+        def poll():
+            reader = FrameReader()
+            while not done.is_set():
+                time.sleep(poll_interval)
+                try:
+                    for msg_type, payload in reader.read_from(conn):
+                        on_message(msg_type, payload)
+                except ConnectionError:
+                    return
+        threading.Thread(target=poll, daemon=True).start()
+
+    rng = random.Random(0)
+    for _ in range(messages):
+        time.sleep(rng.uniform(0, 2 * poll_interval))
+        send_message(sender, MessageType.ANSWER, {"correct": True, "sent": time.perf_counter()})
+    done.wait(10 + messages * poll_interval)
+    sender.close()
+    listener.close()
+    if loop:
+        loop.stop()
+    else:
+        conn.close()
+
+    ordered = sorted(latencies) or [0.0]
+    return {
+        "mode": mode,
+        "messages": len(latencies),
+        "avg_ms": sum(ordered) / len(ordered) * 1000,
+        "median_ms": ordered[len(ordered) // 2] * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def bench_spectators(spectators: int, stalled: int, bots: int, seconds: float) -> Dict:
+    """Bot RTT on a busy match server while spectators watch every room.
+
+    Reading spectators count the events they get and the gaps in "seq";
+    stalled ones connect, send WATCH and never read again.
+
+    Returns:
+        Dictionary with bot RTT percentiles and the spectator hub's counters
+    """
+    async def run() -> Dict:
+        server = MatchServer("127.0.0.1", 0, rounds=5, round_time=3, round_gap=0.1, ping_interval=0.5)
+        port = await server.start()
+        received = [0] * spectators
+        gaps = [0] * spectators
+
+        async def spectate(index: int) -> None:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(encode_message(MessageType.WATCH))
+            frames = FrameReader()
+            last = None
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    return
+                for _, payload in frames.feed(data):
+                    received[index] += 1
+                    if last is not None and payload["event"] != "snapshot" and payload["seq"] != last + 1:
+                        gaps[index] += 1
+                    last = payload["seq"]
+
+        stuck = []
+        for _ in range(stalled):
+            sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+            sock.connect(("127.0.0.1", port))
+            send_message(sock, MessageType.WATCH)
+            stuck.append(sock)
+        watchers = [asyncio.ensure_future(spectate(i)) for i in range(spectators)]
+        counters = await run_bots("127.0.0.1", port, 0, bots, bots, seconds, 1.0, 0.8, "exponential", 0.5,
+                                  "MIXED", 0.5, 1)
+        hub = server.spectators.stats()
+        await server.close()
+        await asyncio.wait(watchers, timeout=5) if watchers else None
+        for sock in stuck:
+            sock.close()
+        rtts = sorted(counters["rtts"]) or [0.0]
+        return {
+            "spectators": spectators,
+            "stalled": stalled,
+            "rtt_p50_ms": rtts[len(rtts) // 2] * 1000,
+            "rtt_p99_ms": rtts[min(len(rtts) - 1, int(len(rtts) * 0.99))] * 1000,
+            "events": hub["events"],
+            "frames_sent": hub["frames_sent"],
+            "frames_skipped": hub["frames_skipped"],
+            "snapshots": hub["snapshots"],
+            "spectator_gaps": sum(gaps),
+            "min_received": min(received) if received else 0,
+        }
+
+    return asyncio.run(run())
+
+
+def bench_round_clock(bots: int, seconds: float) -> Dict:
+    """How closely the bots' round countdowns follow the server's.
+
+    Server and bots share one process, so their time.monotonic() clocks
+    are the same and every bot's ClockSync offset should come out as 0;
+    its size is the synced countdown's error. A countdown started when the
+    PROBLEM arrived would instead end late by the delivery delay.
+
+    Returns:
+        Dictionary with offset and delivery-delay percentiles in ms
+    """
+    async def run() -> Dict:
+        server = MatchServer("127.0.0.1", 0, rounds=5, round_time=2, round_gap=0.1, ping_interval=0.25)
+        port = await server.start()
+        # Think times around the round time, so some bots run out of time
+        counters = await run_bots("127.0.0.1", port, 0, bots, bots, seconds, 1.0, 0.8, "exponential", 1.0,
+                                  "MIXED", 0.25, 1)
+        await server.close()
+        return counters
+
+    counters = asyncio.run(run())
+    offsets = sorted(abs(offset) * 1000 for offset in counters["clock_offsets"]) or [0.0]
+    # problem_delays are measured against the synced clock; take the
+    # estimated offset back off to get the true delay on the shared clock
+    delays = sorted((delay - offset) * 1000
+                    for delay, offset in zip(counters["problem_delays"], counters["clock_offsets"])) or [0.0]
+    return {
+        "bots": bots,
+        "problems": len(counters["problem_delays"]),
+        "offset_p50_ms": offsets[len(offsets) // 2],
+        "offset_p99_ms": offsets[min(len(offsets) - 1, int(len(offsets) * 0.99))],
+        "delay_p50_ms": delays[len(delays) // 2],
+        "delay_p99_ms": delays[min(len(delays) - 1, int(len(delays) * 0.99))],
+        "answers": counters["answers"],
+        "missed_deadlines": counters["missed_deadlines"],
+    }
+
+
+def bench_lock_order(games: int, timeout: float = 30.0) -> Dict:
+    """record_game racing save_score and a config reload on other threads.
+
+    With score_storage="sqlite" all three take the data store's lock and a
+    manager lock; if any path took them in a different order this would
+    deadlock, so every thread is run with a deadline.
+
+    Returns:
+        Dictionary with games and saves completed and whether any thread hung
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        with contextlib.redirect_stdout(io.StringIO()):
+            backup = BackupSystem(score_storage="sqlite", data_dir=tmp)
+        config = backup.config_manager
+        done = {"games": 0, "saves": 0, "reloads": 0}
+
+        def play():
+            for i in range(games):
+                done["games"] += backup.record_game(f"p{i % 10}", i, "MEDIUM")
+
+        def save():
+            for i in range(games):
+                done["saves"] += backup.score_manager.save_score(f"q{i % 10}", i, "HARD")
+
+        def reload():
+            for _ in range(games):
+                # Force a full reload, as the watcher does after an external edit
+                config._file_stamp = None
+                done["reloads"] += config.check_for_changes()
+
+        threads = [threading.Thread(target=fn, daemon=True) for fn in (play, save, reload)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(max(0.0, timeout - (time.perf_counter() - started)))
+        hung = sum(thread.is_alive() for thread in threads)
+        result = dict(done, hung_threads=hung, seconds=time.perf_counter() - started)
+        if hung:
+            # The hung threads still hold the database open; leave it behind
+            return result
+        backup.data_store.close()
+        return result
+
+
+def bench_end_of_game(storage: str, games: int) -> Dict:
+    """Time BackupSystem.record_game (score + stats + settings) per game.
+
+    With "sqlite" every game is one durable commit; the JSON backends
+    rewrite the scores, sketch and config files without fsync.
+
+    Returns:
+        Dictionary with per-game latency and files left in the data directory
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        # BackupSystem prints its status on startup
+        with contextlib.redirect_stdout(io.StringIO()):
+            backup = BackupSystem(score_storage=storage, data_dir=tmp)
+        started = time.perf_counter()
+        for i in range(games):
+            backup.record_game(f"p{i % 20}", i, "MEDIUM", {"Audio": {"MasterVolume": (i % 10) / 10}})
+        elapsed = time.perf_counter() - started
+        return {
+            "storage": storage,
+            "games": games,
+            "ms_per_game": elapsed / games * 1000 if games else 0.0,
+            "files": sorted(p.name for p in Path(tmp).iterdir()),
+            "errors": len(backup.get_errors()),
+        }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MathBlat backup system benchmarks")
+    sub = parser.add_subparsers(dest="benchmark", required=True)
+
+    writers_parser = sub.add_parser("concurrent-writers", help="N processes sharing one scores file")
+    writers_parser.add_argument("--writers", type=int, nargs="+", default=[1, 2, 4, 8])
+    writers_parser.add_argument("--scores", type=int, default=200, help="Scores saved per writer")
+
+    threads_parser = sub.add_parser("threaded-access", help="Reader and writer threads on one ScoreManager")
+    threads_parser.add_argument("--readers", type=int, default=8)
+    threads_parser.add_argument("--writers", type=int, default=2)
+    threads_parser.add_argument("--scores", type=int, default=200, help="Scores saved per writer")
+
+    game_parser = sub.add_parser("end-of-game", help="record_game latency per storage backend")
+    game_parser.add_argument("--games", type=int, default=200)
+    game_parser.add_argument("--storage", nargs="+", default=list(ScoreManager.STORAGE_FORMATS))
+
+    clock_parser = sub.add_parser("round-clock", help="Bot countdowns synced to the server's clock")
+    clock_parser.add_argument("--bots", type=int, nargs="+", default=[20, 400])
+    clock_parser.add_argument("--seconds", type=float, default=6.0)
+
+    order_parser = sub.add_parser("lock-order", help="record_game vs save_score vs config reload on three threads")
+    order_parser.add_argument("--games", type=int, default=200)
+
+    gen_parser = sub.add_parser("problem-generation", help="Threads sharing one ProblemGenerator")
+    gen_parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    gen_parser.add_argument("--problems", type=int, default=20000, help="Problems per thread")
+
+    net_parser = sub.add_parser("net-throughput", help="Framed messages over localhost TCP")
+    net_parser.add_argument("--messages", type=int, default=50000)
+    net_parser.add_argument("--payload", type=int, nargs="+", default=[16, 2000], help="Padding bytes per message")
+
+    latency_parser = sub.add_parser("net-latency", help="Opponent-message latency, polling vs event loop")
+    latency_parser.add_argument("--messages", type=int, default=50)
+    latency_parser.add_argument("--mode", nargs="+", default=["poll", "event"], choices=["poll", "event"])
+
+    spectators_parser = sub.add_parser("spectators", help="Bot RTT with reading and stalled spectators")
+    spectators_parser.add_argument("--spectators", type=int, nargs="+", default=[0, 20])
+    spectators_parser.add_argument("--stalled", type=int, default=2)
+    spectators_parser.add_argument("--bots", type=int, default=200)
+    spectators_parser.add_argument("--seconds", type=float, default=8.0)
+
+    args = parser.parse_args()
+
+    if args.benchmark == "concurrent-writers":
+        run_concurrent_writers(args.writers, args.scores)
+    elif args.benchmark == "threaded-access":
+        r = bench_threaded_access(args.readers, args.writers, args.scores)
+        print(f"{r['readers']} readers, {r['writers']} writers: {r['reads_per_sec']:.0f} reads/s, "
+              f"{r['writes_per_sec']:.0f} writes/s, bad snapshots {r['bad_snapshots']}, "
+              f"top10 {'ok' if r['top_scores_ok'] else 'FAIL'}")
+    elif args.benchmark == "problem-generation":
+        print(f"{'threads':>8} {'problems':>9} {'problems/s':>11} {'leaked':>7} {'count':>6}")
+        for threads in args.threads:
+            r = bench_problem_generation(threads, args.problems)
+            print(f"{r['threads']:>8} {r['problems']:>9} {r['problems_per_sec']:>11.0f} {r['leaked']:>7} "
+                  f"{'ok' if r['counted_ok'] else 'FAIL':>6}")
+    elif args.benchmark == "net-throughput":
+        print(f"{'payload':>8} {'messages':>9} {'seconds':>8} {'msgs/s':>9} {'lost':>5} {'reordered':>10}")
+        for size in args.payload:
+            r = bench_net_throughput(args.messages, size)
+            print(f"{r['payload_size']:>8} {r['messages']:>9} {r['seconds']:>8.2f} {r['messages_per_sec']:>9.0f} "
+                  f"{r['lost']:>5} {r['out_of_order']:>10}")
+    elif args.benchmark == "net-latency":
+        print(f"{'mode':>6} {'messages':>9} {'avg ms':>8} {'median':>8} {'max':>8}")
+        for mode in args.mode:
+            r = bench_net_latency(mode, args.messages)
+            print(f"{r['mode']:>6} {r['messages']:>9} {r['avg_ms']:>8.3f} {r['median_ms']:>8.3f} {r['max_ms']:>8.3f}")
+    elif args.benchmark == "spectators":
+        print(f"{'watching':>9} {'stalled':>8} {'RTT p50':>8} {'p99':>7} {'events':>7} {'sent':>8} "
+              f"{'skipped':>8} {'gaps':>5} {'min recv':>9}")
+        for count in args.spectators:
+            r = bench_spectators(count, args.stalled if count else 0, args.bots, args.seconds)
+            print(f"{r['spectators']:>9} {r['stalled']:>8} {r['rtt_p50_ms']:>8.2f} {r['rtt_p99_ms']:>7.2f} "
+                  f"{r['events']:>7} {r['frames_sent']:>8} {r['frames_skipped']:>8} {r['spectator_gaps']:>5} "
+                  f"{r['min_received']:>9}")
+    elif args.benchmark == "round-clock":
+        print(f"{'bots':>5} {'problems':>9} {'|offset| p50':>13} {'p99':>7} {'delay p50':>10} {'p99':>7} "
+              f"{'answers':>8} {'too late':>9}")
+        for count in args.bots:
+            r = bench_round_clock(count, args.seconds)
+            print(f"{r['bots']:>5} {r['problems']:>9} {r['offset_p50_ms']:>13.2f} {r['offset_p99_ms']:>7.2f} "
+                  f"{r['delay_p50_ms']:>10.2f} {r['delay_p99_ms']:>7.2f} {r['answers']:>8} "
+                  f"{r['missed_deadlines']:>9}")
+    elif args.benchmark == "lock-order":
+        r = bench_lock_order(args.games)
+        print(f"{r['games']} games, {r['saves']} saves, {r['reloads']} reloads in {r['seconds']:.2f} s: "
+              f"{'DEADLOCK (' + str(r['hung_threads']) + ' threads hung)' if r['hung_threads'] else 'ok'}")
+    elif args.benchmark == "end-of-game":
+        for storage in args.storage:
+            r = bench_end_of_game(storage, args.games)
+            print(f"{r['storage']:>7}: {r['ms_per_game']:.2f} ms/game, errors {r['errors']}, "
+                  f"files {', '.join(r['files'])}")
@@ -8,12 +8,148 @@ Usage:
     config = ConfigManager()
     config.save_setting("Game", "Difficulty", "HARD")
     difficulty = config.load_setting("Game", "Difficulty", "EASY")
+
+    # Several changes, one file write
+    with config.transaction():
+        config.save_setting("Audio", "MasterVolume", 0.7)
+        config.save_setting("Audio", "MusicVolume", 0.5)
+
+    # Pick up edits made by Godot or an admin tool
+    config = ConfigManager(auto_reload=True)
+    config.add_change_listener(on_volume, "Audio", "MasterVolume")
+
+    # Lab overrides: MATHBLAT_AUDIO_ENABLESOUND=false, or on the command line
+    overrides, argv = parse_cli_overrides(sys.argv[1:])  # --config Audio.EnableSound=false
+    config = ConfigManager(overrides=overrides)
+    config.get_provenance("Audio", "EnableSound")          # "default" / "file" / "env" / "cli"
+
+    # Typed accessors (values are validated against config_schema on save)
+    config.audio.master_volume = 0.5
+    if config.audio.enable_sound: ...
+
+    # Settings in the SQLite data store shared with scores and profiles
+    config = ConfigManager(data_store=store)
 """
 
 import json
 import os
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Mapping
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict, Optional
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from config_schema import CONFIG_SCHEMA
+from data_store import DataStore
+
+# Callback signature for change listeners: (category, key, old, new)
+ChangeListener = Callable[[str, str, Any, Any], None]
+# Marks a setting that didn't exist before / after a change
+MISSING = object()
+# Returned for categories that don't exist
+EMPTY_CATEGORY = MappingProxyType({})
+# Environment overrides are named MATHBLAT_<CATEGORY>_<KEY>
+ENV_PREFIX = "MATHBLAT_"
+# Config layers, lowest precedence first
+LAYERS = ("default", "file", "env", "cli")
+_TRUE_STRINGS = {"1", "true", "yes", "on"}
+_FALSE_STRINGS = {"0", "false", "no", "off"}
+
+
+def freeze(value: Any) -> Any:
+    """Read-only view of a config value: dicts become MappingProxyType, lists tuples.
+    
+    Already-frozen mappings are returned as-is, so unchanged parts of a
+    snapshot are shared rather than copied.
+    """
+    if isinstance(value, MappingProxyType):
+        return value
+    if isinstance(value, Mapping):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+def thaw(value: Any) -> Any:
+    """Plain, mutable copy of a frozen config value"""
+    if isinstance(value, Mapping):
+        return {k: thaw(v) for k, v in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(v) for v in value]
+    return value
+
+
+def parse_override_value(text: str, like: Any = None) -> Any:
+    """
+    Convert an override string to the type of the setting it replaces.
+    
+    Args:
+        text: Raw value from the environment or command line
+        like: Current value of the setting; its type decides the conversion.
+              Without one, JSON literals are accepted and anything else is
+              kept as a string.
+    
+    Raises:
+        ValueError: If the text doesn't fit the setting's type
+    """
+    if isinstance(like, bool):
+        lowered = text.strip().lower()
+        if lowered in _TRUE_STRINGS:
+            return True
+        if lowered in _FALSE_STRINGS:
+            return False
+        raise ValueError(f"expected true/false, got '{text}'")
+    if isinstance(like, int):
+        return int(text)
+    if isinstance(like, float):
+        return float(text)
+    if isinstance(like, str):
+        return text
+    try:
+        return freeze(json.loads(text))
+    except ValueError:
+        return text
+
+
+def parse_cli_overrides(argv: List[str]) -> Tuple[Dict[str, str], List[str]]:
+    """
+    Pull `--config Category.Key=value` flags out of an argument list.
+    
+    Both `--config Audio.EnableSound=false` and `--config=Audio.EnableSound=false`
+    are accepted, and the flag may be repeated.
+    
+    Returns:
+        ({"Category.Key": "value"}, remaining arguments)
+    """
+    overrides: Dict[str, str] = {}
+    remaining: List[str] = []
+    args = iter(argv)
+    for arg in args:
+        if arg == "--config":
+            item = next(args, "")
+        elif arg.startswith("--config="):
+            item = arg[len("--config="):]
+        else:
+            remaining.append(arg)
+            continue
+        name, sep, value = item.partition("=")
+        if not sep or "." not in name:
+            print(f"WARNING: Ignoring malformed config override '{item}' (expected Category.Key=value)")
+            continue
+        overrides[name] = value
+    return overrides, remaining
+
+
+def _json_default(value: Any) -> Any:
+    """Let json.dump write frozen mappings without thawing them first"""
+    if isinstance(value, Mapping):
+        return dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
 
 
 class ConfigManager:
@@ -22,44 +158,93 @@ class ConfigManager:
     Provides a centralized configuration system for all game settings including
     audio, graphics, gameplay, and localization. Automatically merges loaded
     configs with defaults to ensure all required keys exist.
+    
+    The config is held as an immutable snapshot (MappingProxyType categories,
+    tuples for lists). get_all() and get_category() hand it out directly
+    without copying; every change builds a new snapshot that copies only the
+    root and the changed category and shares everything else.
+    
+    Changes made inside transaction() are staged, validated and written with
+    a single atomic file write when the block exits, or discarded if it raises.
+    
+    Settings resolve through layers: DEFAULT_CONFIG, then the config file,
+    then MATHBLAT_<CATEGORY>_<KEY> environment variables, then overrides
+    passed in (usually from the command line via parse_cli_overrides()).
+    Environment and command-line overrides are never written to the file.
+    Every change recomputes a flat "Category.Key" table of effective values
+    and where each came from, so load_setting() is a single dict lookup.
+    
+    Built-in settings are checked and coerced against config_schema when
+    they are loaded, saved or overridden: invalid file values fall back to
+    the default, and invalid saves are rejected. Each category is also
+    available as a typed section, e.g. config.audio.master_volume.
+    
+    With a data_store, settings are kept in its "config" namespace (one row
+    per category) instead of config.json, and a save rewrites only the
+    categories that changed. An existing config.json is carried over the
+    first time.
+    
+    Edits made to the file by other programs are picked up by
+    check_for_changes(), which only stats the file unless it changed. With
+    auto_reload, reads call it at most once per reload_interval; with
+    start_watching(), a background thread does. Listeners registered with
+    add_change_listener() are called for every setting whose value changes.
     """
     
     # Default storage directory (~/.mathblat/)
     DEFAULT_CONFIG_DIR = Path.home() / ".mathblat"
     # Default configuration file location
     DEFAULT_CONFIG_FILE = DEFAULT_CONFIG_DIR / "config.json"
+    # DataStore namespace holding one row per category
+    STORE_NAMESPACE = "config"
     
+    # Types, ranges and allowed values for built-in settings
+    SCHEMA = CONFIG_SCHEMA
     # Default configuration structure (provides fallback values)
-    DEFAULT_CONFIG = {
-        "Game": {
-            "Difficulty": "EASY",
-            "LastPlayerName": "Player",
-            "Volume": 1.0,
-        },
-        "Audio": {
-            "MasterVolume": 1.0,
-            "MusicVolume": 0.8,
-            "SFXVolume": 1.0,
-            "EnableSound": True,
-        },
-        "Graphics": {
-            "Brightness": 1.0,
-            "ShowParticles": True,
-            "AnimationsEnabled": True,
-        },
-        "Localization": {
-            "Language": "EN",
-            "DateFormat": "YYYY-MM-DD",
-        },
-        "Player": {
-            "TotalGamesPlayed": 0,
-            "TotalScore": 0,
-            "LastPlayedDate": "",
-        },
-    }
-    
-    def __init__(self, config_file: Optional[str] = None):
-        """Initialize config manager with optional custom file path"""
+    DEFAULT_CONFIG = SCHEMA.defaults()
+    # Accessor class per category: config.audio, config.game, ...
+    SECTIONS = SCHEMA.section_classes()
+    
+    def __init__(self, config_file: Optional[str] = None, auto_reload: bool = False,
+                 reload_interval: float = 1.0, overrides: Optional[Mapping[str, Any]] = None,
+                 environ: Optional[Mapping[str, str]] = None, data_store: Optional[DataStore] = None):
+        """Initialize config manager with optional custom file path.
+        
+        Args:
+            config_file: Custom file path for config. If None, uses default.
+            auto_reload: Check for external edits on reads
+            reload_interval: Minimum seconds between auto_reload checks
+            overrides: Command-line layer, {"Category.Key": value}. String
+                       values are converted to the setting's type.
+            environ: Environment to read MATHBLAT_* overrides from
+                     (defaults to os.environ)
+            data_store: Keep settings in this DataStore instead of the file
+        """
+        self.data_store = data_store
+        # Snapshot last written to the data store, to skip unchanged categories
+        self._written: Mapping = EMPTY_CATEGORY
+        self.auto_reload = auto_reload
+        self.reload_interval = reload_interval
+        self._listeners: List[Tuple[Optional[str], Optional[str], ChangeListener]] = []
+        # (mtime_ns, size) of the config file as last read or written
+        self._file_stamp: Optional[Tuple[int, int]] = None
+        self._next_check = 0.0
+        self._watch_thread: Optional[threading.Thread] = None
+        self._watch_stop = threading.Event()
+        # Serializes writes and reloads across threads (e.g. the watcher)
+        self._lock = threading.RLock()
+        self._defaults = freeze(self.DEFAULT_CONFIG)
+        # Persisted settings (defaults + file) and the effective settings
+        # (with env / CLI overrides applied on top)
+        self.config: Mapping = EMPTY_CATEGORY
+        self.effective: Mapping = EMPTY_CATEGORY
+        # "Category.Key" -> effective value, and -> layer it came from
+        self._resolved: Dict[str, Any] = {}
+        self._provenance: Dict[str, str] = {}
+        # "Category.Key" -> (value, layer) for env and CLI overrides
+        self._overrides: Dict[str, Tuple[Any, str]] = {}
+        for attr, section in self.SECTIONS.items():
+            setattr(self, attr, section(self))
         try:
             if config_file:
                 self.config_file = Path(config_file)
@@ -69,55 +254,385 @@ class ConfigManager:
             # Create directory if needed
             self.config_file.parent.mkdir(parents=True, exist_ok=True)
             
-            self.config: Dict = {}
+            self._collect_overrides(os.environ if environ is None else environ, overrides or {})
+            # Staged transaction changes: category -> {key: value}
+            self._pending: Optional[Dict[str, Dict]] = None
+            # Categories replaced wholesale inside the transaction
+            self._pending_replaced: set = set()
+            self._transaction_depth = 0
             self.load_config()
         
         except Exception as e:
             print(f"WARNING: Failed to initialize ConfigManager: {e}")
-            self.config = self.DEFAULT_CONFIG.copy()
+            self._set_config(self._defaults)
     
     def load_config(self) -> bool:
         """
         Load configuration from file.
         
+        Only the first load falls back to defaults. If a reload fails (say
+        the file is corrupt or half written) the last good config is kept
+        and no change listeners fire.
+        
         Returns:
-            True if loaded successfully, False if using defaults
+            True if loaded successfully, False if using defaults or the
+            last good config
         """
-        try:
-            if not self.config_file.exists():
-                # First time setup
-                self.config = self._deep_copy(self.DEFAULT_CONFIG)
-                self.save_config()
+        with self._locked():
+            # Reloading over a config we already have (check_for_changes)
+            reloading = self.config is not EMPTY_CATEGORY
+            stamp = None
+            try:
+                stamp = self._stat_config_file()
+                loaded_config = self._read_stored_config()
+                if loaded_config is None:
+                    # First time setup, or the file was deleted - write it (back) out
+                    if not reloading:
+                        self._set_config(self._defaults)
+                    self.save_config()
+                    return True
+                
+                self._file_stamp = stamp
+                
+                # Merge with defaults to ensure all keys exist
+                self._set_config(self._merge_configs(self._defaults, loaded_config))
                 return True
             
-            with open(self.config_file, 'r', encoding='utf-8') as f:
-                loaded_config = json.load(f)
+            except json.JSONDecodeError:
+                problem = "Config file corrupted"
             
-            # Merge with defaults to ensure all keys exist
-            self.config = self._merge_configs(self.DEFAULT_CONFIG, loaded_config)
-            return True
-        
-        except json.JSONDecodeError:
-            print("WARNING: Config file corrupted, using defaults")
-            self.config = self._deep_copy(self.DEFAULT_CONFIG)
+            except Exception as e:
+                problem = f"Failed to load config: {e}"
+            
+            if reloading:
+                # Don't retry until the file changes again
+                self._file_stamp = stamp
+                print(f"WARNING: {problem}, keeping the current settings")
+            else:
+                print(f"WARNING: {problem}, using defaults")
+                self._set_config(self._defaults)
             return False
+    
+    def _read_stored_config(self) -> Optional[Dict]:
+        """Raw saved config from the data store or config.json, None if there is none"""
+        if self.data_store is not None:
+            stored = self.data_store.get_namespace(self.STORE_NAMESPACE)
+            if stored:
+                self._written = EMPTY_CATEGORY
+                return stored
+            # Nothing stored yet - carry over config.json if there is one
+        
+        if not self.config_file.exists():
+            return None
+        with open(self.config_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    
+    def check_for_changes(self) -> bool:
+        """
+        Reload the config file if another program changed it.
+        
+        Costs one stat() call when nothing changed. Change listeners fire for
+        every setting whose value differs after the reload.
+        
+        Returns:
+            True if the file changed and was reloaded
+        """
+        try:
+            if self._stat_config_file() == self._file_stamp:
+                return False
+            with self._locked():
+                if self._stat_config_file() == self._file_stamp:
+                    return False
+                return self.load_config()
         
         except Exception as e:
-            print(f"WARNING: Failed to load config: {e}")
-            self.config = self._deep_copy(self.DEFAULT_CONFIG)
+            print(f"WARNING: Failed to check config for changes: {e}")
             return False
     
+    def start_watching(self, interval: float = 1.0) -> bool:
+        """
+        Poll the config file for changes from a background thread.
+        
+        Args:
+            interval: Seconds between checks
+        
+        Returns:
+            True if the watcher is running
+        """
+        if self._watch_thread and self._watch_thread.is_alive():
+            return True
+        
+        def watch():
+            while not self._watch_stop.wait(interval):
+                self.check_for_changes()
+        
+        self._watch_stop.clear()
+        self._watch_thread = threading.Thread(target=watch, name="ConfigWatcher", daemon=True)
+        self._watch_thread.start()
+        return True
+    
+    def stop_watching(self) -> None:
+        """Stop the background watcher started by start_watching()"""
+        self._watch_stop.set()
+        if self._watch_thread:
+            self._watch_thread.join()
+            self._watch_thread = None
+    
+    def add_change_listener(self, callback: ChangeListener, category: Optional[str] = None,
+                            key: Optional[str] = None) -> ChangeListener:
+        """
+        Call `callback(category, key, old, new)` when a setting changes.
+        
+        Fires for changes from this manager and for external edits picked up
+        by check_for_changes(). Added or removed settings pass None for the
+        missing side.
+        
+        Args:
+            callback: Function to call
+            category: Only report changes in this category
+            key: Only report changes to this key
+        
+        Returns:
+            The callback, for remove_change_listener()
+        """
+        self._listeners.append((category, key, callback))
+        return callback
+    
+    def remove_change_listener(self, callback: ChangeListener) -> None:
+        """Stop calling a listener added with add_change_listener()"""
+        self._listeners = [entry for entry in self._listeners if entry[2] is not callback]
+    
+    def _stat_config_file(self) -> Optional[Tuple[int, int]]:
+        # The data store's version counter moves when another process commits
+        if self.data_store is not None:
+            return (self.data_store.data_version(), 0)
+        try:
+            st = self.config_file.stat()
+            return (st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            return None
+    
+    def _maybe_reload(self) -> None:
+        """auto_reload hook for reads - at most one stat per reload_interval"""
+        now = time.monotonic()
+        if now >= self._next_check:
+            self._next_check = now + self.reload_interval
+            self.check_for_changes()
+    
+    def _collect_overrides(self, environ: Mapping[str, str], cli: Mapping[str, Any]) -> None:
+        """Read the env and CLI layers, converting values to each setting's type"""
+        # MATHBLAT_AUDIO_ENABLESOUND -> "Audio.EnableSound", for built-in settings
+        env_names = {
+            f"{ENV_PREFIX}{category}_{key}".upper(): f"{category}.{key}"
+            for category, settings in self._defaults.items()
+            for key in settings
+        }
+        layers = (
+            ("env", {env_names[name.upper()]: text for name, text in environ.items()
+                     if name.startswith(ENV_PREFIX) and name.upper() in env_names}),
+            ("cli", cli),
+        )
+        for layer, values in layers:
+            for name, value in values.items():
+                category, _, key = name.partition(".")
+                try:
+                    if isinstance(value, str):
+                        value = parse_override_value(value, self._defaults.get(category, EMPTY_CATEGORY).get(key))
+                    value = self.SCHEMA.validate(category, key, value)
+                except ValueError as e:
+                    print(f"WARNING: Ignoring {layer} override {name}: {e}")
+                    continue
+                self._overrides[name] = (freeze(value), layer)
+    
+    def _resolve(self) -> None:
+        """Apply overrides to the persisted config and rebuild the flat lookup tables"""
+        effective = self.config
+        if self._overrides:
+            categories: Dict[str, Dict] = {}
+            for name, (value, _) in self._overrides.items():
+                category, _, key = name.partition(".")
+                if category not in categories:
+                    current = effective.get(category)
+                    categories[category] = dict(current) if isinstance(current, Mapping) else {}
+                categories[category][key] = value
+            effective = MappingProxyType({
+                **effective, **{c: MappingProxyType(s) for c, s in categories.items()}
+            })
+        
+        resolved: Dict[str, Any] = {}
+        provenance: Dict[str, str] = {}
+        for category, settings in effective.items():
+            if not isinstance(settings, Mapping):
+                continue
+            defaults = self._defaults.get(category, EMPTY_CATEGORY)
+            for key, value in settings.items():
+                name = f"{category}.{key}"
+                resolved[name] = value
+                default = defaults.get(key, MISSING)
+                if name in self._overrides:
+                    provenance[name] = self._overrides[name][1]
+                elif type(default) is type(value) and default == value:
+                    provenance[name] = "default"
+                else:
+                    provenance[name] = "file"
+        
+        self.effective = effective
+        self._provenance = provenance
+        self._resolved = resolved
+    
+    def _set_config(self, new_config: Mapping) -> None:
+        """Publish a new config snapshot and notify listeners of changed settings"""
+        old_effective = self.effective
+        self.config = freeze(new_config)
+        self._resolve()
+        if self._listeners:
+            for category, key, old, new in self._diff_configs(old_effective, self.effective):
+                self._notify(category, key, old, new)
+    
+    def _notify(self, category: str, key: str, old: Any, new: Any) -> None:
+        old = None if old is MISSING else old
+        new = None if new is MISSING else new
+        for want_category, want_key, callback in list(self._listeners):
+            if want_category not in (None, category) or want_key not in (None, key):
+                continue
+            try:
+                callback(category, key, old, new)
+            except Exception as e:
+                print(f"WARNING: Config change listener failed for {category}.{key}: {e}")
+    
+    @staticmethod
+    def _diff_configs(old: Mapping, new: Mapping) -> Iterator[Tuple[str, str, Any, Any]]:
+        """Yield (category, key, old, new) for every setting that differs"""
+        for category in set(old) | set(new):
+            old_settings = old.get(category, EMPTY_CATEGORY)
+            new_settings = new.get(category, EMPTY_CATEGORY)
+            # Shared between snapshots, so nothing in it changed
+            if old_settings is new_settings:
+                continue
+            if not isinstance(old_settings, Mapping) or not isinstance(new_settings, Mapping):
+                if old_settings != new_settings:
+                    yield category, "", old_settings, new_settings
+                continue
+            for key in set(old_settings) | set(new_settings):
+                before = old_settings.get(key, MISSING)
+                after = new_settings.get(key, MISSING)
+                if before is not after and before != after:
+                    yield category, key, before, after
+    
     def save_config(self) -> bool:
         """Save current configuration to file"""
         try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=2, ensure_ascii=False)
+            self._write_config_file(self.config)
             return True
         
         except Exception as e:
             print(f"WARNING: Failed to save config: {e}")
             return False
     
+    def _write_config_file(self, config: Mapping) -> None:
+        """Write config to a temporary file and rename it into place.
+        
+        Records the new file stamp so our own write isn't seen as an
+        external change. With a data store, writes only the categories that
+        aren't shared with the last written snapshot, in one commit.
+        """
+        if self.data_store is not None:
+            changed = {c: s for c, s in config.items() if self._written.get(c) is not s}
+            removed = [c for c in self._written if c not in config]
+            with self.data_store.transaction(), self._lock:
+                if changed:
+                    self.data_store.put_many(self.STORE_NAMESPACE, changed)
+                for category in removed:
+                    self.data_store.delete(self.STORE_NAMESPACE, category)
+                self._written = config
+                self._file_stamp = self._stat_config_file()
+            return
+        
+        fd, tmp_path = tempfile.mkstemp(
+            dir=self.config_file.parent, prefix=self.config_file.name, suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(config, f, indent=2, ensure_ascii=False, default=_json_default)
+            os.replace(tmp_path, self.config_file)
+            self._file_stamp = self._stat_config_file()
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+    
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Take our lock, after the data store's (see DataStore.lock)"""
+        if self.data_store is None:
+            with self._lock:
+                yield
+            return
+        with self.data_store.lock, self._lock:
+            yield
+    
+    @contextmanager
+    def transaction(self) -> Iterator["ConfigManager"]:
+        """
+        Batch several setting changes into one validated, atomic write.
+        
+        save_setting and set_category calls inside the block are staged (and
+        visible to load_setting) until it exits: all changes are validated,
+        applied to the in-memory config together and written to disk once. If the block
+        raises, or validation or the write fails, nothing is applied and the
+        exception propagates. Nested transactions join the outermost one.
+        
+        Example:
+            with config.transaction():
+                config.save_setting("Audio", "MasterVolume", 0.7)
+                config.set_category("Graphics", {"Brightness": 0.9})
+        """
+        with self._locked():
+            yield from self._transaction()
+    
+    def _transaction(self) -> Iterator["ConfigManager"]:
+        if self._transaction_depth:
+            self._transaction_depth += 1
+            try:
+                yield self
+            finally:
+                self._transaction_depth -= 1
+            return
+        
+        self._pending = {}
+        self._pending_replaced = set()
+        self._transaction_depth = 1
+        try:
+            yield self
+            self._commit_pending()
+        finally:
+            self._pending = None
+            self._pending_replaced = set()
+            self._transaction_depth = 0
+    
+    def _commit_pending(self) -> None:
+        """Validate staged changes, write them once, then apply them in memory"""
+        if not self._pending:
+            return
+        
+        # Copy the root and the touched categories only
+        new_config = dict(self.config)
+        for category, settings in self._pending.items():
+            current = new_config.get(category)
+            if category in self._pending_replaced or not isinstance(current, Mapping):
+                current = EMPTY_CATEGORY
+            valid, errors = self.SCHEMA.clean(category, settings)
+            if errors:
+                key, error = next(iter(errors.items()))
+                raise ValueError(f"Invalid value for {category}.{key}: {error}")
+            new_config[category] = MappingProxyType({**current, **freeze(valid)})
+        
+        # Every value must survive the JSON round trip the config file takes
+        json.dumps(new_config, default=_json_default)
+        
+        self._write_config_file(new_config)
+        self._set_config(new_config)
+    
     def load_setting(self, category: str, key: str, default: Any = None) -> Any:
         """
         Load a specific setting.
@@ -131,9 +646,20 @@ class ConfigManager:
             Setting value or default
         """
         try:
-            if category in self.config and key in self.config[category]:
-                return self.config[category][key]
-            return default
+            if self.auto_reload:
+                self._maybe_reload()
+            
+            name = f"{category}.{key}"
+            # Inside a transaction, staged values shadow the committed file
+            # values (but not env / CLI overrides)
+            if self._pending is not None and name not in self._overrides:
+                staged = self._pending.get(category)
+                if staged is not None and key in staged:
+                    return staged[key]
+                if category in self._pending_replaced:
+                    return default
+            
+            return self._resolved.get(name, default)
         
         except Exception as e:
             print(f"WARNING: Failed to load setting {category}.{key}: {e}")
@@ -152,29 +678,70 @@ class ConfigManager:
             True if saved successfully
         """
         try:
-            if category not in self.config:
-                self.config[category] = {}
-            
-            self.config[category][key] = value
-            return self.save_config()
+            with self._locked():
+                if self._pending is not None:
+                    # Invalid values are staged as-is and rejected on commit
+                    try:
+                        value = self.SCHEMA.validate(category, key, value)
+                    except ValueError:
+                        pass
+                    self._pending.setdefault(category, {})[key] = value
+                    return True
+                
+                value = self.SCHEMA.validate(category, key, value)
+                # Path copy: new root and category, everything else shared
+                current = self.config.get(category)
+                settings = dict(current) if isinstance(current, Mapping) else {}
+                settings[key] = freeze(value)
+                new_config = dict(self.config)
+                new_config[category] = MappingProxyType(settings)
+                self._set_config(new_config)
+                return self.save_config()
         
         except Exception as e:
             print(f"WARNING: Failed to save setting {category}.{key}: {e}")
             return False
     
-    def get_category(self, category: str) -> Dict:
-        """Get all settings in a category"""
+    def get_provenance(self, category: str, key: str) -> Optional[str]:
+        """
+        Which layer a setting's effective value comes from.
+        
+        Returns:
+            "default", "file", "env" or "cli" (see LAYERS), or None if the
+            setting doesn't exist. "default" means the value matches
+            DEFAULT_CONFIG, whether or not the file repeats it.
+        """
+        return self._provenance.get(f"{category}.{key}")
+    
+    def get_resolved(self) -> Mapping:
+        """Flat read-only view of every effective setting, {"Category.Key": value}"""
+        return MappingProxyType(self._resolved)
+    
+    def get_category(self, category: str) -> Mapping:
+        """Get all effective settings in a category (read-only, not copied)"""
         try:
-            return self.config.get(category, {})
+            return self.effective.get(category, EMPTY_CATEGORY)
         
         except Exception:
-            return {}
+            return EMPTY_CATEGORY
     
     def set_category(self, category: str, settings: Dict) -> bool:
         """Set all settings in a category"""
         try:
-            self.config[category] = settings
-            return self.save_config()
+            with self._locked():
+                if self._pending is not None:
+                    self._pending[category] = dict(settings)
+                    self._pending_replaced.add(category)
+                    return True
+                
+                valid, errors = self.SCHEMA.clean(category, settings)
+                if errors:
+                    key, error = next(iter(errors.items()))
+                    raise ValueError(f"invalid value for {key}: {error}")
+                new_config = dict(self.config)
+                new_config[category] = freeze(valid)
+                self._set_config(new_config)
+                return self.save_config()
         
         except Exception as e:
             print(f"WARNING: Failed to set category {category}: {e}")
@@ -183,8 +750,9 @@ class ConfigManager:
     def reset_to_defaults(self) -> bool:
         """Reset all configuration to defaults"""
         try:
-            self.config = self._deep_copy(self.DEFAULT_CONFIG)
-            return self.save_config()
+            with self._locked():
+                self._set_config(self._defaults)
+                return self.save_config()
         
         except Exception as e:
             print(f"WARNING: Failed to reset config: {e}")
@@ -194,7 +762,7 @@ class ConfigManager:
         """Export configuration to a file"""
         try:
             with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(self.config, f, indent=2, ensure_ascii=False)
+                json.dump(self.config, f, indent=2, ensure_ascii=False, default=_json_default)
             return True
         
         except Exception as e:
@@ -207,43 +775,44 @@ class ConfigManager:
             with open(filepath, 'r', encoding='utf-8') as f:
                 imported = json.load(f)
             
-            self.config = self._merge_configs(self.DEFAULT_CONFIG, imported)
-            return self.save_config()
+            with self._locked():
+                self._set_config(self._merge_configs(self._defaults, imported))
+                return self.save_config()
         
         except Exception as e:
             print(f"WARNING: Failed to import config: {e}")
             return False
     
-    def get_all(self) -> Dict:
-        """Get entire configuration"""
-        return self._deep_copy(self.config)
-    
-    @staticmethod
-    def _deep_copy(obj: Dict) -> Dict:
-        """Create a deep copy of a dictionary"""
-        try:
-            return json.loads(json.dumps(obj))
-        except Exception:
-            return obj.copy()
+    def get_all(self) -> Mapping:
+        """Get entire effective configuration (read-only snapshot, not copied)
+        
+        Includes env / CLI overrides. Use thaw() for a mutable copy.
+        """
+        return self.effective
     
-    @staticmethod
-    def _merge_configs(defaults: Dict, loaded: Dict) -> Dict:
-        """Merge loaded config with defaults, preserving structure"""
+    def _merge_configs(self, defaults: Mapping, loaded: Dict) -> Mapping:
+        """Merge loaded config over frozen defaults, sharing untouched categories.
+        
+        Settings that fail schema validation are dropped (with a warning) so
+        their defaults apply.
+        """
         try:
-            merged = ConfigManager._deep_copy(defaults)
+            merged = dict(defaults)
             
             for category, settings in loaded.items():
-                if isinstance(settings, dict):
-                    if category not in merged:
-                        merged[category] = {}
-                    merged[category].update(settings)
+                current = merged.get(category)
+                if isinstance(settings, dict) and isinstance(current, Mapping):
+                    valid, errors = self.SCHEMA.clean(category, settings)
+                    for key, error in errors.items():
+                        print(f"WARNING: Ignoring invalid setting {category}.{key}: {error}")
+                    merged[category] = MappingProxyType({**current, **freeze(valid)})
                 else:
-                    merged[category] = settings
+                    merged[category] = freeze(settings)
             
-            return merged
+            return MappingProxyType(merged)
         
         except Exception:
-            return defaults
+            return freeze(defaults)
 
 
 if __name__ == "__main__":
@@ -270,3 +839,17 @@ if __name__ == "__main__":
     print(f"  Language: {config.load_setting('Localization', 'Language')}")
     
     print(f"\nConfig file: {config.config_file}")
+    
+    # Layered overrides: env beats file, CLI beats env
+    lab = ConfigManager(
+        config.config_file,
+        overrides=parse_cli_overrides(["--config", "Game.Difficulty=EASY"])[0],
+        environ={"MATHBLAT_AUDIO_ENABLESOUND": "false"},
+    )
+    print("\nWith lab overrides:")
+    for category, key in (("Game", "Difficulty"), ("Audio", "EnableSound"), ("Audio", "MasterVolume"), ("Graphics", "Brightness")):
+        print(f"  {category}.{key} = {lab.load_setting(category, key)!r} ({lab.get_provenance(category, key)})")
+    
+    # Typed accessors, validated on save
+    print(f"\nconfig.audio.master_volume = {config.audio.master_volume}")
+    print(f"Saving Audio.MasterVolume = 'loud': {config.save_setting('Audio', 'MasterVolume', 'loud')}")
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+MathBlat Config Schema - Python Backup
+Declarative types, ranges and allowed values for every built-in setting.
+
+The schema is compiled once into one validator per setting, so values are
+checked and coerced when they are loaded or saved instead of every time game
+code reads them. It also generates the typed section classes behind
+ConfigManager's `config.audio.master_volume` style accessors.
+
+Usage:
+    from config_schema import CONFIG_SCHEMA
+    volume = CONFIG_SCHEMA.validate("Audio", "MasterVolume", "0.5")  # 0.5
+    CONFIG_SCHEMA.validate("Audio", "MasterVolume", "loud")          # ValueError
+"""
+
+import re
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+# Matches problem_generator.Difficulty
+DIFFICULTIES = ("EASY", "MEDIUM", "HARD")
+# Matches the languages in localization_manager.gd
+LANGUAGES = ("EN", "ES", "FR")
+
+_TRUE_STRINGS = {"1", "true", "yes", "on"}
+_FALSE_STRINGS = {"0", "false", "no", "off"}
+
+Validator = Callable[[Any], Any]
+
+
+class Field:
+    """Spec for one setting: its default plus optional range or allowed values"""
+
+    __slots__ = ("default", "type", "minimum", "maximum", "choices")
+
+    def __init__(self, default: Any, minimum: Optional[float] = None, maximum: Optional[float] = None,
+                 choices: Optional[Iterable[str]] = None):
+        """
+        Args:
+            default: Default value; its type is the setting's type
+            minimum: Smallest allowed value (numbers)
+            maximum: Largest allowed value (numbers)
+            choices: Allowed values (strings, matched case-insensitively)
+        """
+        self.default = default
+        self.type = type(default)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.choices = tuple(choices) if choices else None
+
+
+def snake_case(name: str) -> str:
+    """Attribute name for a setting or category: "SFXVolume" -> "sfx_volume" """
+    return re.sub(r"(?<=[a-z0-9])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])", "_", name).lower()
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    if isinstance(value, str):
+        lowered = value.strip().lower()
+        if lowered in _TRUE_STRINGS:
+            return True
+        if lowered in _FALSE_STRINGS:
+            return False
+    raise ValueError(f"expected true/false, got {value!r}")
+
+
+def _to_int(value: Any) -> int:
+    if isinstance(value, bool):
+        raise ValueError(f"expected an integer, got {value!r}")
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, str):
+        return int(value.strip())
+    raise ValueError(f"expected an integer, got {value!r}")
+
+
+def _to_float(value: Any) -> float:
+    if isinstance(value, bool):
+        raise ValueError(f"expected a number, got {value!r}")
+    if isinstance(value, (int, float, str)):
+        return float(value)
+    raise ValueError(f"expected a number, got {value!r}")
+
+
+def _to_str(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    raise ValueError(f"expected a string, got {value!r}")
+
+
+_CONVERTERS = {bool: _to_bool, int: _to_int, float: _to_float, str: _to_str}
+
+
+def compile_field(field: Field) -> Validator:
+    """
+    Build the validator for one setting.
+
+    The returned function converts a value to the setting's type (so "0.5"
+    becomes 0.5 and "off" becomes False), checks the range or allowed values,
+    and returns the result. Choices come back in their canonical spelling.
+
+    Raises:
+        ValueError: (from the validator) if the value doesn't fit
+    """
+    convert = _CONVERTERS.get(field.type)
+    if convert is None:
+        raise TypeError(f"Unsupported setting type {field.type.__name__}")
+    minimum, maximum = field.minimum, field.maximum
+
+    if field.choices:
+        canonical = {choice.upper(): choice for choice in field.choices}
+
+        def validate(value: Any) -> Any:
+            choice = canonical.get(convert(value).upper())
+            if choice is None:
+                raise ValueError(f"expected one of {', '.join(field.choices)}, got {value!r}")
+            return choice
+    elif minimum is not None or maximum is not None:
+        def validate(value: Any) -> Any:
+            number = convert(value)
+            if number != number or (minimum is not None and number < minimum) \
+                    or (maximum is not None and number > maximum):
+                raise ValueError(f"expected a value from {minimum} to {maximum}, got {value!r}")
+            return number
+    else:
+        validate = convert
+    return validate
+
+
+class ConfigSchema:
+    """A compiled schema: one validator per "Category.Key" setting.
+
+    Settings that aren't in the schema (extra keys written by Godot or a
+    teacher tool) pass through unchanged.
+    """
+
+    def __init__(self, fields: Dict[str, Dict[str, Field]]):
+        self.fields = fields
+        self.validators: Dict[str, Validator] = {}
+        for category, settings in fields.items():
+            for key, field in settings.items():
+                validate = compile_field(field)
+                # Catch typos in the schema itself at import time
+                validate(field.default)
+                self.validators[f"{category}.{key}"] = validate
+
+    def defaults(self) -> Dict[str, Dict[str, Any]]:
+        """Default config built from the schema"""
+        return {
+            category: {key: field.default for key, field in settings.items()}
+            for category, settings in self.fields.items()
+        }
+
+    def validate(self, category: str, key: str, value: Any) -> Any:
+        """
+        Check and coerce one setting.
+
+        Returns:
+            The coerced value (unchanged for settings not in the schema)
+
+        Raises:
+            ValueError: If the value doesn't fit the setting
+        """
+        validate = self.validators.get(f"{category}.{key}")
+        return value if validate is None else validate(value)
+
+    def clean(self, category: str, settings: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        """
+        Coerce every setting in a category, dropping invalid ones.
+
+        Returns:
+            (valid settings, {key: error message} for the dropped ones)
+        """
+        valid: Dict[str, Any] = {}
+        errors: Dict[str, str] = {}
+        for key, value in settings.items():
+            try:
+                valid[key] = self.validate(category, key, value)
+            except (TypeError, ValueError) as e:
+                errors[key] = str(e)
+        return valid, errors
+
+    def section_classes(self) -> Dict[str, type]:
+        """
+        Generate one accessor class per category, keyed by attribute name.
+
+        Each class has a property per setting (`master_volume` for
+        "MasterVolume") whose "Category.Key" lookup name and default are
+        bound when the class is built. Instances hold only the manager
+        they read from (`__slots__`).
+        """
+        classes = {}
+        for category, settings in self.fields.items():
+            namespace = {"__slots__": ("_manager",), "__doc__": f"Typed access to {category} settings"}
+            for key, field in settings.items():
+                namespace[snake_case(key)] = _setting_property(category, key, field)
+            classes[snake_case(category)] = type(f"{category}Settings", (_Section,), namespace)
+        return classes
+
+
+class _Section:
+    __slots__ = ()
+
+    def __init__(self, manager):
+        self._manager = manager
+
+    def __repr__(self) -> str:
+        names = [n for n in dir(type(self)) if isinstance(getattr(type(self), n), property)]
+        return f"{type(self).__name__}({', '.join(f'{n}={getattr(self, n)!r}' for n in names)})"
+
+
+def _setting_property(category: str, key: str, field: Field) -> property:
+    name = f"{category}.{key}"
+    default = field.default
+
+    def get(section):
+        manager = section._manager
+        # Staged transaction values and auto_reload go through the slow path
+        if manager.auto_reload or manager._pending is not None:
+            return manager.load_setting(category, key, default)
+        return manager._resolved.get(name, default)
+
+    def set(section, value):
+        if not section._manager.save_setting(category, key, value):
+            raise ValueError(f"Invalid value for {name}: {value!r}")
+
+    return property(get, set, doc=f"{name} ({field.type.__name__})")
+
+
+CONFIG_SCHEMA = ConfigSchema({
+    "Game": {
+        "Difficulty": Field("EASY", choices=DIFFICULTIES),
+        "LastPlayerName": Field("Player"),
+        "Volume": Field(1.0, 0.0, 1.0),
+    },
+    "Audio": {
+        "MasterVolume": Field(1.0, 0.0, 1.0),
+        "MusicVolume": Field(0.8, 0.0, 1.0),
+        "SFXVolume": Field(1.0, 0.0, 1.0),
+        "EnableSound": Field(True),
+    },
+    "Graphics": {
+        "Brightness": Field(1.0, 0.0, 2.0),
+        "ShowParticles": Field(True),
+        "AnimationsEnabled": Field(True),
+    },
+    "Localization": {
+        "Language": Field("EN", choices=LANGUAGES),
+        "DateFormat": Field("YYYY-MM-DD"),
+    },
+    "Player": {
+        "TotalGamesPlayed": Field(0, 0),
+        "TotalScore": Field(0, 0),
+        "LastPlayedDate": Field(""),
+    },
+})
+
+
+if __name__ == "__main__":
+    print("=== MathBlat Config Schema (Python Backup) ===\n")
+
+    for category, key, value in [("Audio", "MasterVolume", "0.5"), ("Audio", "EnableSound", "off"),
+                                 ("Game", "Difficulty", "hard"), ("Game", "Volume", "loud"),
+                                 ("Audio", "SFXVolume", 1.5), ("Localization", "Language", "DE")]:
+        try:
+            print(f"{category}.{key} = {value!r} -> {CONFIG_SCHEMA.validate(category, key, value)!r}")
+        except ValueError as e:
+            print(f"{category}.{key} = {value!r} -> rejected: {e}")
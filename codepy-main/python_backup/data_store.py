@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+MathBlat Data Store - Python Backup
+One SQLite database shared by scores, settings and player profiles.
+
+Each subsystem used to rewrite its own JSON file on every change. Through
+the data store, an end-of-game update (score, player stats, settings,
+profile) is a single transaction: one write-ahead-log append and one fsync,
+however many subsystems it touches.
+
+Tables:
+    kv      (namespace, key) -> JSON value, for settings, profiles, stats
+    scores  every saved score in arrival order, indexed by score
+
+Usage:
+    from data_store import DataStore
+    store = DataStore()
+    with store.transaction():
+        store.scores.append([{"name": "Alice", "score": 150, "difficulty": "HARD",
+                              "date": "2026-01-20 14:03:00"}])
+        store.put("profiles", "Alice", {"games": 12, "best": 150})
+        store.put("config", "Audio", {"MasterVolume": 0.7})
+"""
+
+import json
+import sqlite3
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Union
+
+from score_export import export_entries
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (
+    namespace TEXT NOT NULL,
+    key       TEXT NOT NULL,
+    value     TEXT NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS scores (
+    id         INTEGER PRIMARY KEY,
+    name       TEXT NOT NULL,
+    score      INTEGER NOT NULL,
+    difficulty TEXT NOT NULL,
+    date       TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS scores_by_score ON scores (score DESC, id);
+CREATE INDEX IF NOT EXISTS scores_by_difficulty ON scores (difficulty, score DESC, id);
+"""
+
+# Internal bookkeeping lives in its own namespace
+META_NAMESPACE = "_meta"
+
+
+def _json_default(value: Any) -> Any:
+    """Accept read-only mappings (e.g. frozen config categories)"""
+    if isinstance(value, Mapping):
+        return dict(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=_json_default)
+
+
+class DataStore:
+    """SQLite-backed key-value and score store.
+
+    The database runs in WAL mode with synchronous=FULL, so every commit
+    is durable and costs one fsync of the log (plus an occasional
+    checkpoint). Writes made outside transaction() commit on their own;
+    inside it they all commit together, and nested transactions join the
+    outermost one.
+
+    One connection is shared by every thread and serialized by a lock.
+    Other processes may open the same file; SQLite's own locking keeps
+    their transactions apart.
+    """
+
+    # Default storage directory (~/.mathblat/)
+    DEFAULT_DB_DIR = Path.home() / ".mathblat"
+    # Default database location
+    DEFAULT_DB_FILE = DEFAULT_DB_DIR / "mathblat.db"
+    # Seconds to wait for another process's write transaction
+    BUSY_TIMEOUT = 10.0
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        """Open (creating if needed) the database.
+
+        Args:
+            path: Database file. If None, uses ~/.mathblat/mathblat.db.
+        """
+        self.path = Path(path) if path else self.DEFAULT_DB_FILE
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._depth = 0
+        # isolation_level=None: transactions are begun and ended explicitly
+        self._conn = sqlite3.connect(str(self.path), timeout=self.BUSY_TIMEOUT,
+                                     isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(SCHEMA)
+        self.scores = ScoreTable(self)
+
+    @contextmanager
+    def transaction(self) -> Iterator["DataStore"]:
+        """
+        Group writes into one atomic, durable commit.
+
+        Takes the database write lock up front (BEGIN IMMEDIATE), so the
+        reads inside the block see a state no other process can change
+        before it commits. If the block raises, everything is rolled back.
+        """
+        with self._lock:
+            if self._depth:
+                self._depth += 1
+                try:
+                    yield self
+                finally:
+                    self._depth -= 1
+                return
+
+            self._conn.execute("BEGIN IMMEDIATE")
+            self._depth = 1
+            try:
+                yield self
+            except BaseException:
+                self._depth = 0
+                self._conn.execute("ROLLBACK")
+                raise
+            self._depth = 0
+            self._conn.execute("COMMIT")
+
+    @property
+    def lock(self) -> threading.RLock:
+        """The store's re-entrant lock.
+
+        Lock order: code that holds its own lock while using the store must
+        take this one (or transaction()) first and its own lock second, so
+        that two such callers can never wait on each other.
+        """
+        return self._lock
+
+    @property
+    def in_transaction(self) -> bool:
+        """True while inside transaction()"""
+        return self._depth > 0
+
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        """Get one value, or `default` if it isn't stored"""
+        rows = self._query("SELECT value FROM kv WHERE namespace = ? AND key = ?", (namespace, key))
+        return json.loads(rows[0][0]) if rows else default
+
+    def get_namespace(self, namespace: str) -> Dict[str, Any]:
+        """Get every key in a namespace as a dict"""
+        rows = self._query("SELECT key, value FROM kv WHERE namespace = ?", (namespace,))
+        return {key: json.loads(value) for key, value in rows}
+
+    def put(self, namespace: str, key: str, value: Any) -> None:
+        """Store one JSON-serializable value"""
+        self.put_many(namespace, {key: value})
+
+    def put_many(self, namespace: str, values: Mapping[str, Any]) -> None:
+        """Store several values in one commit"""
+        rows = [(namespace, key, _dumps(value)) for key, value in values.items()]
+        with self.transaction():
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO kv (namespace, key, value) VALUES (?, ?, ?)", rows
+            )
+
+    def delete(self, namespace: str, key: Optional[str] = None) -> None:
+        """Delete one key, or a whole namespace if key is None"""
+        with self.transaction():
+            if key is None:
+                self._conn.execute("DELETE FROM kv WHERE namespace = ?", (namespace,))
+            else:
+                self._conn.execute("DELETE FROM kv WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def data_version(self) -> int:
+        """
+        Counter that changes when another connection commits.
+
+        Our own commits don't change it, which makes it a cheap way to
+        notice edits from other processes.
+        """
+        return self._query("PRAGMA data_version")[0][0]
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    def _query(self, sql: str, params: Iterable = ()) -> List[tuple]:
+        """Run a read and fetch every row while holding the lock"""
+        with self._lock:
+            return self._conn.execute(sql, tuple(params)).fetchall()
+
+
+class ScoreTable:
+    """Score history in a DataStore.
+
+    Has the same interface as BinaryScoreStore (top, iter_entries, snapshot,
+    append, clear, generation), so ScoreManager can use either. Row ids follow
+    arrival order and restart at 1 after clear(), which bumps the
+    generation.
+    """
+
+    def __init__(self, store: DataStore):
+        self._store = store
+
+    def __len__(self) -> int:
+        return self._store._query("SELECT COALESCE(MAX(id), 0) FROM scores")[0][0]
+
+    @property
+    def generation(self) -> int:
+        return self._store.get(META_NAMESPACE, "score_generation", 0)
+
+    def top(self, count: int = 10, difficulty: Optional[str] = None) -> List[Dict]:
+        """
+        Get the highest scores through the score index.
+
+        Args:
+            count: Maximum number of entries
+            difficulty: Optional difficulty filter
+
+        Returns:
+            List of score entries, best first
+        """
+        if difficulty:
+            rows = self._store._query(
+                "SELECT name, score, difficulty, date FROM scores WHERE difficulty = ? "
+                "ORDER BY score DESC, id LIMIT ?", (difficulty, count))
+        else:
+            rows = self._store._query(
+                "SELECT name, score, difficulty, date FROM scores ORDER BY score DESC, id LIMIT ?", (count,))
+        return [self._to_entry(row) for row in rows]
+
+    def iter_entries(self, start: int = 0, stop: Optional[int] = None,
+                     chunk_size: int = 4096) -> Iterator[Dict]:
+        """
+        Stream entries in arrival order, from entry `start` up to `stop`.
+
+        Reads `chunk_size` rows per query, so the lock is never held for
+        the whole scan.
+        """
+        if stop is None:
+            stop = len(self)
+        position = start
+        while position < stop:
+            rows = self._store._query(
+                "SELECT name, score, difficulty, date FROM scores WHERE id > ? AND id <= ? ORDER BY id",
+                (position, min(position + chunk_size, stop)))
+            for row in rows:
+                yield self._to_entry(row)
+            position += chunk_size
+
+    def snapshot(self) -> Iterator[Dict]:
+        """Stream the entries present at this call, in arrival order (see iter_entries)"""
+        return self.iter_entries(0, len(self))
+
+    def iter_sorted(self, chunk_size: int = 4096) -> Iterator[Dict]:
+        """Stream every entry best first, one page of `chunk_size` rows per query"""
+        last = None
+        while True:
+            if last is None:
+                rows = self._store._query(
+                    "SELECT name, score, difficulty, date, id FROM scores "
+                    "ORDER BY score DESC, id LIMIT ?", (chunk_size,))
+            else:
+                rows = self._store._query(
+                    "SELECT name, score, difficulty, date, id FROM scores "
+                    "WHERE score < ? OR (score = ? AND id > ?) "
+                    "ORDER BY score DESC, id LIMIT ?", (last[1], last[1], last[4], chunk_size))
+            if not rows:
+                return
+            for row in rows:
+                yield self._to_entry(row[:4])
+            last = rows[-1]
+
+    def append(self, entries: Iterable[Dict]) -> int:
+        """Append entries in one commit. Returns the number appended"""
+        rows = [
+            (str(e.get("name", ""))[:50], int(e.get("score", 0)), str(e.get("difficulty", "")), str(e.get("date", "")))
+            for e in entries
+        ]
+        with self._store.transaction():
+            self._store._conn.executemany(
+                "INSERT INTO scores (name, score, difficulty, date) VALUES (?, ?, ?, ?)", rows
+            )
+        return len(rows)
+
+    def clear(self) -> None:
+        """Delete every score and start a new generation"""
+        with self._store.transaction():
+            generation = self.generation
+            self._store._conn.execute("DELETE FROM scores")
+            self._store.put(META_NAMESPACE, "score_generation", generation + 1)
+
+    def close(self) -> None:
+        """Nothing to release - the DataStore owns the connection"""
+
+    def export_scores(self, filepath: str, **options) -> bool:
+        """Export the full history, best first, via score_export.export_entries"""
+        try:
+            export_entries(self.iter_sorted(), filepath, ranked=True, **options)
+            return True
+
+        except Exception as e:
+            print(f"WARNING: Failed to export scores: {e}")
+            return False
+
+    @staticmethod
+    def _to_entry(row) -> Dict:
+        name, score, difficulty, date = row
+        return {"name": name, "score": score, "difficulty": difficulty, "date": date}
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+    import time
+    from datetime import datetime
+
+    print("=== MathBlat Data Store (Python Backup) ===\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = DataStore(os.path.join(tmp, "mathblat.db"))
+        now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        games = 200
+        started = time.perf_counter()
+        for i in range(games):
+            with store.transaction():
+                store.scores.append([{"name": f"Player {i % 7}", "score": i, "difficulty": "MEDIUM", "date": now}])
+                store.put("profiles", f"Player {i % 7}", {"games": i // 7 + 1, "last": now})
+                store.put("config", "Player", {"TotalGamesPlayed": i + 1, "LastPlayedDate": now[:10]})
+        elapsed = time.perf_counter() - started
+
+        print(f"{games} end-of-game commits: {elapsed / games * 1000:.2f} ms each")
+        print(f"Top 3: {[(e['name'], e['score']) for e in store.scores.top(3)]}")
+        print(f"Profile: {store.get('profiles', 'Player 3')}")
+        store.close()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+MathBlat Windowed Leaderboards - Python Backup
+Rolling daily / weekly / all-time leaderboards for score entries.
+
+Scores are bucketed by epoch day and epoch week as they arrive, so "top
+scores today" is a lookup of one small pre-sorted bucket rather than a scan
+over every entry. Old buckets are dropped lazily the first time the
+leaderboard is touched on a new day.
+
+Daily buckets are keyed by the same "YYYY-MM-DD" date string that
+daily_challenge_manager.gd uses to record completed challenges, so the
+leaderboard for a daily challenge is simply the daily bucket for its date.
+
+Usage:
+    from leaderboards import WindowedLeaderboard
+    boards = WindowedLeaderboard()
+    boards.add({"name": "Alice", "score": 150, "difficulty": "HARD",
+                "date": "2026-01-20 14:03:00"})
+    today = boards.top("daily")
+"""
+
+import heapq
+from bisect import insort
+from datetime import date, datetime
+from itertools import count, islice
+from typing import Dict, List, Optional, Tuple
+
+# Day 0 of the epoch-day numbering (1970-01-01 was a Thursday)
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+# Shift that makes epoch weeks start on Monday
+WEEK_OFFSET = 3
+
+
+def epoch_day(day: date) -> int:
+    """Days since 1970-01-01 for a calendar date"""
+    return day.toordinal() - EPOCH_ORDINAL
+
+
+def epoch_week(day_number: int) -> int:
+    """Monday-based week number for an epoch day"""
+    return (day_number + WEEK_OFFSET) // 7
+
+
+def parse_entry_day(date_str: str) -> Optional[int]:
+    """Epoch day of a score entry's "YYYY-MM-DD[ HH:MM:SS]" date string"""
+    try:
+        return epoch_day(date.fromisoformat(date_str[:10]))
+    except (TypeError, ValueError):
+        return None
+
+
+class WindowedLeaderboard:
+    """Incrementally maintained daily, weekly and all-time top-N lists.
+
+    Each bucket is keyed by (period number, difficulty) and holds at most
+    `capacity` entries kept sorted by score, so adding an entry is a bisect
+    insert into a short list and a query merges at most one bucket per
+    difficulty.
+    """
+
+    WINDOWS = ("daily", "weekly", "all")
+
+    def __init__(self, capacity: int = 10, daily_retention: int = 7, weekly_retention: int = 4):
+        """Initialize empty leaderboards.
+
+        Args:
+            capacity: Entries kept per bucket (per difficulty)
+            daily_retention: Days of daily buckets kept, including today
+            weekly_retention: Weeks of weekly buckets kept, including this week
+        """
+        self.capacity = capacity
+        self.daily_retention = daily_retention
+        self.weekly_retention = weekly_retention
+
+        # Bucket lists hold (-score, sequence, entry) so they sort by score
+        # descending and then by arrival order
+        self._buckets: Dict[str, Dict[Tuple[int, str], List[Tuple[int, int, Dict]]]] = {
+            window: {} for window in self.WINDOWS
+        }
+        self._sequence = count()
+        self._pruned_day: Optional[int] = None
+
+    def add(self, entry: Dict, today: Optional[date] = None) -> bool:
+        """
+        Add a score entry to every window it falls in.
+
+        Args:
+            entry: Score entry with score, difficulty and date keys
+            today: Override for the current date (defaults to date.today())
+
+        Returns:
+            True if the entry was added, False if its date is unparseable
+        """
+        day = parse_entry_day(entry.get("date", ""))
+        if day is None:
+            return False
+
+        current = self._prune(today)
+        difficulty = entry.get("difficulty", "")
+        item = (-int(entry.get("score", 0)), next(self._sequence), entry)
+
+        self._insert("all", (0, difficulty), item)
+        if day > current - self.daily_retention:
+            self._insert("daily", (day, difficulty), item)
+        if epoch_week(day) > epoch_week(current) - self.weekly_retention:
+            self._insert("weekly", (epoch_week(day), difficulty), item)
+        return True
+
+    def top(self, window: str = "daily", difficulty: Optional[str] = None,
+            count: int = 10, today: Optional[date] = None) -> List[Dict]:
+        """
+        Get the top entries for the current day, week, or all time.
+
+        Args:
+            window: "daily", "weekly" or "all"
+            difficulty: Optional difficulty filter
+            count: Maximum number of entries to return
+            today: Override for the current date (defaults to date.today())
+
+        Returns:
+            List of score entries, best first
+        """
+        current = self._prune(today)
+        if window == "daily":
+            period = current
+        elif window == "weekly":
+            period = epoch_week(current)
+        elif window == "all":
+            period = 0
+        else:
+            raise ValueError(f"Unknown leaderboard window '{window}'")
+        return self._top(window, period, difficulty, count)
+
+    def top_for_day(self, day: str, difficulty: Optional[str] = None,
+                    count: int = 10, today: Optional[date] = None) -> List[Dict]:
+        """
+        Get the top entries for a specific "YYYY-MM-DD" day.
+
+        Uses the same date key as daily_challenge_manager.gd, so this is the
+        leaderboard for that day's daily challenge. Days older than the
+        daily retention return an empty list.
+        """
+        self._prune(today)
+        day_number = parse_entry_day(day)
+        if day_number is None:
+            return []
+        return self._top("daily", day_number, difficulty, count)
+
+    def clear(self) -> None:
+        """Drop every bucket"""
+        for buckets in self._buckets.values():
+            buckets.clear()
+
+    def _insert(self, window: str, key: Tuple[int, str], item: Tuple[int, int, Dict]) -> None:
+        """Insert into one bucket, keeping it sorted and within capacity"""
+        bucket = self._buckets[window].setdefault(key, [])
+        if len(bucket) >= self.capacity and item >= bucket[-1]:
+            return
+        insort(bucket, item)
+        if len(bucket) > self.capacity:
+            bucket.pop()
+
+    def _top(self, window: str, period: int, difficulty: Optional[str], count: int) -> List[Dict]:
+        """Merge the matching difficulty buckets for one period"""
+        buckets = self._buckets[window]
+        if difficulty:
+            lists = [buckets.get((period, difficulty), [])]
+        else:
+            lists = [b for (p, _), b in buckets.items() if p == period]
+        return [entry for _, _, entry in islice(heapq.merge(*lists), count)]
+
+    def _prune(self, today: Optional[date] = None) -> int:
+        """Drop expired buckets, at most once per day. Returns today's epoch day"""
+        current = epoch_day(today or date.today())
+        if self._pruned_day != current:
+            self._pruned_day = current
+            oldest_day = current - self.daily_retention
+            oldest_week = epoch_week(current) - self.weekly_retention
+            daily = self._buckets["daily"]
+            for key in [k for k in daily if k[0] <= oldest_day]:
+                del daily[key]
+            weekly = self._buckets["weekly"]
+            for key in [k for k in weekly if k[0] <= oldest_week]:
+                del weekly[key]
+        return current
+
+
+if __name__ == "__main__":
+    print("=== MathBlat Windowed Leaderboards (Python Backup) ===\n")
+
+    boards = WindowedLeaderboard()
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    for name, score, difficulty in [("Alice", 150, "HARD"), ("Bob", 120, "MEDIUM"), ("Eve", 90, "MEDIUM")]:
+        boards.add({"name": name, "score": score, "difficulty": difficulty, "date": now})
+    boards.add({"name": "Old", "score": 999, "difficulty": "HARD", "date": "2020-01-01 00:00:00"})
+
+    for window in WindowedLeaderboard.WINDOWS:
+        print(f"{window}: {[(e['name'], e['score']) for e in boards.top(window)]}")
+    print(f"MEDIUM today: {[(e['name'], e['score']) for e in boards.top('daily', 'MEDIUM')]}")
@@ -0,0 +1,549 @@
+#!/usr/bin/env python3
+"""
+MathBlat Load Test - Python Backup
+Simulated bot players against the match server.
+
+Starts match_server.py in its own process (or targets a running one) and
+connects N headless bots speaking the real wire protocol. Bots queue for
+matches, answer each PROBLEM after a think time drawn from a chosen
+distribution with a chosen accuracy, echo the server's PINGs, and ping the
+server themselves to measure round trips. Like a real client, each bot
+keeps a round_timer countdown started at the PROBLEM's server_time
+(through a ClockSync fed by the server_time in its PONGs) and doesn't
+answer once it has run out. At the end it reports:
+
+- messages/sec in each direction
+- round-trip latency percentiles (bot PING -> server PONG)
+- answers given up on because the bot's countdown ran out first
+- dropped messages (PINGs never answered, rounds without a RESULT, skipped
+  round numbers) and garbled ones (undecodable frames, malformed payloads)
+- server CPU and memory, sampled from outside the server process
+  (psutil if installed, else /proc on Linux)
+- the bots' own CPU use; bots can be spread over several processes with
+  --processes when one process can't keep up
+
+Usage:
+    python3 load_tester.py --bots 1000 --duration 30
+    python3 load_tester.py --bots 200 --accuracy 0.6 --think exponential --think-mean 2
+    python3 load_tester.py --bots 5000 --processes 4
+    python3 load_tester.py --server 10.0.0.5:12345 --bots 500
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from match_server import raise_open_file_limit
+from net_protocol import RECV_SIZE, FrameReader, MessageType, ProtocolError, encode_message
+from round_engine import percentile
+from round_timer import ClockSync, RoundTimer
+
+try:
+    import psutil
+    HAS_PSUTIL = True
+except ImportError:
+    HAS_PSUTIL = False
+
+THINK_DISTRIBUTIONS = ("fixed", "uniform", "exponential", "lognormal")
+DIFFICULTIES = ("EASY", "MEDIUM", "HARD")
+
+
+def think_time_sampler(kind: str, mean: float, rng: random.Random) -> Callable[[], float]:
+    """
+    Build a think-time sampler with the given mean (seconds).
+
+    fixed: always `mean`; uniform: 0 to 2*mean; exponential: memoryless,
+    many quick answers and a long tail; lognormal: a typical human
+    reaction-time shape (sigma 0.5).
+    """
+    if kind == "fixed":
+        return lambda: mean
+    if kind == "uniform":
+        return lambda: rng.uniform(0, 2 * mean)
+    if kind == "exponential":
+        return lambda: rng.expovariate(1 / mean) if mean > 0 else 0.0
+    if kind == "lognormal":
+        sigma = 0.5
+        mu = math.log(mean) - sigma ** 2 / 2 if mean > 0 else 0.0
+        return lambda: rng.lognormvariate(mu, sigma) if mean > 0 else 0.0
+    raise ValueError(f"Unknown think-time distribution '{kind}'")
+
+
+def solve(problem_text: str) -> Optional[int]:
+    """Answer a "a op b = ?" problem the way ProblemGenerator computes it"""
+    try:
+        left, operation, right = problem_text.split()[:3]
+        a, b = int(left), int(right)
+    except ValueError:
+        return None
+    if operation == "+":
+        return a + b
+    if operation == "-":
+        return a - b
+    if operation == "*":
+        return a * b
+    if operation == "/" and b:
+        return a // b
+    return None
+
+
+class LoadStats:
+    """Counters shared by every bot (all on one event loop, so no locks)"""
+
+    def __init__(self):
+        self.sent: Dict[str, int] = {}
+        self.received: Dict[str, int] = {}
+        self.rtts: List[float] = []
+        # Per PROBLEM, once the bot's clock is synced: the estimated offset
+        # to the server's clock and how long after server_time it arrived
+        self.clock_offsets: List[float] = []
+        self.problem_delays: List[float] = []
+        self.connected = 0
+        self.connect_failures = 0
+        self.disconnects = 0
+        self.matches_started = 0
+        self.matches_finished = 0
+        self.rounds = 0
+        self.rounds_won = 0
+        self.answers = 0
+        self.correct_answers = 0
+        self.missed_deadlines = 0
+        self.lost_pongs = 0
+        self.lost_results = 0
+        self.round_gaps = 0
+        self.garbled = 0
+
+    def count(self, table: Dict[str, int], msg_type: MessageType) -> None:
+        table[msg_type.name] = table.get(msg_type.name, 0) + 1
+
+
+class Bot:
+    """One simulated player"""
+
+    def __init__(self, index: int, host: str, port: int, stats: LoadStats, rng: random.Random,
+                 think: Callable[[], float], accuracy: float, difficulty: str, ping_interval: float):
+        self.name = f"bot{index}"
+        self.host = host
+        self.port = port
+        self.stats = stats
+        self.rng = rng
+        self.think = think
+        self.accuracy = accuracy
+        self.difficulty = difficulty
+        self.ping_interval = ping_interval
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.pending_pings: Dict[int, float] = {}
+        self.ping_seq = 0
+        self.sync = ClockSync()
+        self.timer = RoundTimer()
+        self.open_rounds = set()
+        self.last_round = 0
+        self.stopping = False
+
+    def send(self, msg_type: MessageType, payload: Optional[Dict] = None) -> None:
+        if self.writer is None or self.writer.is_closing():
+            return
+        self.writer.write(encode_message(msg_type, payload))
+        self.stats.count(self.stats.sent, msg_type)
+
+    async def run(self, start_delay: float, stop_at: float) -> None:
+        await asyncio.sleep(start_delay)
+        try:
+            reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        except OSError:
+            self.stats.connect_failures += 1
+            return
+        self.stats.connected += 1
+        self.send(MessageType.HELLO, {"name": self.name, "difficulty": self.difficulty})
+        loop = asyncio.get_running_loop()
+        pinger = loop.create_task(self.ping_loop(stop_at))
+        loop.call_at(loop.time() + max(0.0, stop_at - time.monotonic()), self.stop)
+        frames = FrameReader()
+        try:
+            while True:
+                data = await reader.read(RECV_SIZE)
+                if not data:
+                    break
+                try:
+                    messages = frames.feed(data)
+                except ProtocolError:
+                    self.stats.garbled += 1
+                    break
+                for msg_type, payload in messages:
+                    self.stats.count(self.stats.received, msg_type)
+                    self.handle(msg_type, payload)
+        except ConnectionError:
+            pass
+        finally:
+            pinger.cancel()
+            if not self.stopping:
+                self.stats.disconnects += 1
+            self.stats.lost_pongs += len(self.pending_pings)
+            self.writer.close()
+
+    async def ping_loop(self, stop_at: float) -> None:
+        # Stop a little early so the last PONGs can still arrive
+        await asyncio.sleep(self.rng.uniform(0, self.ping_interval))
+        while time.monotonic() < stop_at - 1.0:
+            self.ping_seq += 1
+            self.pending_pings[self.ping_seq] = time.perf_counter()
+            self.send(MessageType.PING, {"seq": self.ping_seq, "t": self.pending_pings[self.ping_seq]})
+            await asyncio.sleep(self.ping_interval)
+
+    def stop(self) -> None:
+        """Leave the match, then hang up once the last PONGs had time to arrive"""
+        self.stopping = True
+        self.send(MessageType.BYE)
+        if self.writer and not self.writer.is_closing():
+            asyncio.get_running_loop().call_later(1.0, self.writer.close)
+
+    def handle(self, msg_type: MessageType, payload: Dict) -> None:
+        stats = self.stats
+        if msg_type == MessageType.PING:
+            self.send(MessageType.PONG, payload)
+        elif msg_type == MessageType.PONG:
+            sent = self.pending_pings.pop(payload.get("seq"), None)
+            if sent is None:
+                stats.garbled += 1
+            else:
+                rtt = time.perf_counter() - sent
+                stats.rtts.append(rtt)
+                if isinstance(payload.get("server_time"), (int, float)):
+                    self.sync.update(payload["server_time"], time.monotonic(), rtt)
+        elif msg_type == MessageType.MATCH:
+            stats.matches_started += 1
+            self.last_round = 0
+        elif msg_type == MessageType.PROBLEM:
+            number = payload.get("round")
+            options = payload.get("options")
+            if not isinstance(number, int) or not isinstance(options, list) or len(options) < 2 \
+                    or not isinstance(payload.get("problem"), str) \
+                    or not isinstance(payload.get("time"), (int, float)) \
+                    or not isinstance(payload.get("server_time"), (int, float)):
+                stats.garbled += 1
+                return
+            if number != self.last_round + 1:
+                stats.round_gaps += 1
+            self.last_round = number
+            self.open_rounds.add(number)
+            self.timer.start_at_server_time(number, payload["time"], payload["server_time"], self.sync)
+            if self.sync.offset is not None:
+                stats.clock_offsets.append(self.sync.offset)
+                stats.problem_delays.append(time.monotonic() - self.sync.to_local(payload["server_time"]))
+            asyncio.get_running_loop().call_later(self.think(), self.answer, number,
+                                                  payload["problem"], options)
+        elif msg_type == MessageType.RESULT:
+            number = payload.get("round")
+            if not isinstance(number, int) or not isinstance(payload.get("you"), int):
+                stats.garbled += 1
+                return
+            self.open_rounds.discard(number)
+            stats.rounds += 1
+            if payload.get("winner") == "you":
+                stats.rounds_won += 1
+        elif msg_type == MessageType.BYE:
+            # A finished match owes a RESULT for every round; a match cut
+            # short by the opponent leaving doesn't
+            if payload.get("reason") == "finished":
+                stats.matches_finished += 1
+                stats.lost_results += len(self.open_rounds)
+            self.open_rounds.clear()
+            if not self.stopping:
+                self.send(MessageType.HELLO, {"name": self.name, "difficulty": self.difficulty})
+
+    def answer(self, number: int, problem: str, options: List) -> None:
+        if self.stopping or number != self.last_round:
+            return
+        if self.timer.poll() == number:
+            self.stats.missed_deadlines += 1
+            return
+        self.timer.stop()
+        correct = solve(problem)
+        wrong = [option for option in options if option != correct]
+        if correct in options and (self.rng.random() < self.accuracy or not wrong):
+            choice = correct
+            self.stats.correct_answers += 1
+        else:
+            choice = self.rng.choice(wrong or options)
+        self.stats.answers += 1
+        self.send(MessageType.ANSWER, {"round": number, "answer": choice})
+
+
+class ProcessMonitor:
+    """Samples another process's CPU use and resident memory on a thread"""
+
+    def __init__(self, pid: int, interval: float = 0.5):
+        self.pid = pid
+        self.interval = interval
+        self.cpu_samples: List[float] = []
+        self.peak_rss = 0
+        self.available = HAS_PSUTIL or Path(f"/proc/{pid}/stat").exists()
+        self._process = psutil.Process(pid) if HAS_PSUTIL else None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> "ProcessMonitor":
+        if self.available:
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _read(self):
+        """(cpu seconds, rss bytes) or None if the process is gone"""
+        try:
+            if self._process is not None:
+                times = self._process.cpu_times()
+                return times.user + times.system, self._process.memory_info().rss
+            with open(f"/proc/{self.pid}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+            ticks = os.sysconf("SC_CLK_TCK")
+            cpu = (int(fields[11]) + int(fields[12])) / ticks
+            rss = int(fields[21]) * os.sysconf("SC_PAGE_SIZE")
+            return cpu, rss
+        except Exception:
+            return None
+
+    def _run(self) -> None:
+        last = self._read()
+        last_time = time.monotonic()
+        while last is not None and not self._stop.wait(self.interval):
+            sample = self._read()
+            now = time.monotonic()
+            if sample is None:
+                return
+            self.cpu_samples.append((sample[0] - last[0]) / (now - last_time) * 100)
+            self.peak_rss = max(self.peak_rss, sample[1])
+            last, last_time = sample, now
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(port: int, rounds: int, round_time: float, round_gap: float) -> subprocess.Popen:
+    """Run match_server.py in its own process and wait until it accepts connections"""
+    server = subprocess.Popen(
+        [sys.executable, str(Path(__file__).with_name("match_server.py")), "--host", "127.0.0.1",
+         "--port", str(port), "--rounds", str(rounds), "--round-time", str(round_time),
+         "--round-gap", str(round_gap), "--stats-interval", "0"],
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 10
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return server
+        except OSError:
+            if server.poll() is not None:
+                break
+            time.sleep(0.05)
+    server.kill()
+    raise RuntimeError("Match server did not start")
+
+
+async def run_bots(host: str, port: int, first: int, count: int, total: int, duration: float, ramp: float,
+                   accuracy: float, think: str, think_mean: float, difficulty: str, ping_interval: float,
+                   seed: Optional[int]) -> Dict:
+    """
+    Run bots number `first` to `first + count - 1` (of `total`) until the test ends.
+
+    Returns:
+        Raw counters from this process, including every RTT sample
+    """
+    stats = LoadStats()
+    rng = random.Random(None if seed is None else seed * 1_000_003 + first)
+    cpu_started = time.process_time()
+    stop_at = time.monotonic() + ramp + duration
+    tasks = []
+    for i in range(first, first + count):
+        bot_rng = random.Random(rng.getrandbits(64))
+        bot = Bot(i, host, port, stats, bot_rng, think_time_sampler(think, think_mean, bot_rng), accuracy,
+                  rng.choice(DIFFICULTIES) if difficulty == "MIXED" else difficulty, ping_interval)
+        # Connections are spread evenly over the ramp across all processes
+        tasks.append(asyncio.ensure_future(bot.run(ramp * i / max(1, total), stop_at)))
+    await asyncio.wait(tasks, timeout=ramp + duration + 10)
+    counters = dict(vars(stats))
+    counters["cpu_seconds"] = time.process_time() - cpu_started
+    return counters
+
+
+def _bot_process(kwargs: Dict) -> Dict:
+    raise_open_file_limit()
+    return asyncio.run(run_bots(**kwargs))
+
+
+def merge_counters(parts: List[Dict]) -> Dict:
+    """Add up the counters from several bot processes"""
+    merged: Dict = {}
+    for part in parts:
+        for key, value in part.items():
+            if isinstance(value, dict):
+                table = merged.setdefault(key, {})
+                for name, n in value.items():
+                    table[name] = table.get(name, 0) + n
+            elif isinstance(value, list):
+                merged.setdefault(key, []).extend(value)
+            else:
+                merged[key] = merged.get(key, 0) + value
+    return merged
+
+
+def run_load(host: str, port: int, bots: int, duration: float, ramp: float = 2.0, accuracy: float = 0.8,
+             think: str = "lognormal", think_mean: float = 1.5, difficulty: str = "MIXED",
+             ping_interval: float = 1.0, server_pid: Optional[int] = None, seed: Optional[int] = None,
+             processes: int = 1) -> Dict:
+    """
+    Run `bots` bots for `duration` seconds (after `ramp`) and build the report.
+
+    Args:
+        processes: Bot processes; use more when one process's CPU is the
+                   bottleneck (see "generator_cpu_percent" in the report)
+
+    Returns:
+        Dictionary of throughput, latency, loss and server resource figures
+    """
+    processes = max(1, min(processes, bots))
+    shares = [bots // processes + (1 if i < bots % processes else 0) for i in range(processes)]
+    jobs = []
+    first = 0
+    for share in shares:
+        jobs.append(dict(host=host, port=port, first=first, count=share, total=bots, duration=duration,
+                         ramp=ramp, accuracy=accuracy, think=think, think_mean=think_mean,
+                         difficulty=difficulty, ping_interval=ping_interval, seed=seed))
+        first += share
+
+    monitor = ProcessMonitor(server_pid).start() if server_pid else None
+    started = time.monotonic()
+    if processes == 1:
+        parts = [asyncio.run(run_bots(**jobs[0]))]
+    else:
+        with multiprocessing.Pool(processes) as pool:
+            parts = pool.map(_bot_process, jobs)
+    elapsed = time.monotonic() - started
+    if monitor:
+        monitor.stop()
+
+    stats = merge_counters(parts)
+    sent = sum(stats["sent"].values())
+    received = sum(stats["received"].values())
+    rtts_ms = [rtt * 1000 for rtt in stats["rtts"]]
+    answers = stats["answers"]
+    report = {
+        "bots": bots,
+        "processes": processes,
+        "connected": stats["connected"],
+        "connect_failures": stats["connect_failures"],
+        "seconds": elapsed,
+        "sent_per_sec": sent / elapsed,
+        "received_per_sec": received / elapsed,
+        "messages_sent": dict(sorted(stats["sent"].items())),
+        "messages_received": dict(sorted(stats["received"].items())),
+        "rtt_ms": {q: percentile(rtts_ms, p) for q, p in
+                   (("p50", 50), ("p90", 90), ("p99", 99), ("max", 100))},
+        "rtt_samples": len(rtts_ms),
+        "matches_started": stats["matches_started"],
+        "matches_finished": stats["matches_finished"],
+        "rounds": stats["rounds"],
+        "answers": answers,
+        "accuracy": stats["correct_answers"] / answers if answers else 0.0,
+        "missed_deadlines": stats["missed_deadlines"],
+        "dropped": {"pongs": stats["lost_pongs"], "results": stats["lost_results"],
+                    "round_gaps": stats["round_gaps"]},
+        "garbled": stats["garbled"],
+        "unexpected_disconnects": stats["disconnects"],
+        # Per bot process; near 100% means the bots, not the server, limit the numbers
+        "generator_cpu_percent": stats["cpu_seconds"] / elapsed / processes * 100,
+    }
+    if monitor and monitor.available:
+        cpu = monitor.cpu_samples or [0.0]
+        report["server_cpu_percent"] = {"avg": sum(cpu) / len(cpu), "peak": max(cpu)}
+        report["server_peak_rss_mb"] = monitor.peak_rss / (1 << 20)
+    return report
+
+
+def format_report(report: Dict) -> str:
+    rtt = report["rtt_ms"]
+    dropped = report["dropped"]
+    lines = [
+        f"Bots:       {report['connected']}/{report['bots']} connected "
+        f"({report['connect_failures']} failed, {report['unexpected_disconnects']} dropped by server) "
+        f"from {report['processes']} process(es) at {report['generator_cpu_percent']:.0f}% CPU each",
+        f"Throughput: {report['sent_per_sec']:.0f} msgs/s to server, "
+        f"{report['received_per_sec']:.0f} msgs/s from server over {report['seconds']:.1f} s",
+        f"RTT:        p50 {rtt['p50']:.2f} ms, p90 {rtt['p90']:.2f} ms, p99 {rtt['p99']:.2f} ms, "
+        f"max {rtt['max']:.2f} ms ({report['rtt_samples']} samples)",
+        f"Play:       {report['matches_finished']}/{report['matches_started']} matches finished, "
+        f"{report['rounds']} round results, {report['answers']} answers "
+        f"({report['accuracy']:.0%} correct), {report['missed_deadlines']} past the bot's countdown",
+        f"Lost:       {dropped['pongs']} PONGs, {dropped['results']} RESULTs, "
+        f"{dropped['round_gaps']} skipped rounds; {report['garbled']} garbled",
+    ]
+    if "server_cpu_percent" in report:
+        cpu = report["server_cpu_percent"]
+        lines.append(f"Server:     CPU avg {cpu['avg']:.0f}% peak {cpu['peak']:.0f}%, "
+                     f"peak RSS {report['server_peak_rss_mb']:.1f} MB")
+    else:
+        lines.append("Server:     CPU/memory not sampled (external server or no psutil//proc)")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the MathBlat match server with bot players")
+    parser.add_argument("--bots", type=int, default=200)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of play after the ramp-up")
+    parser.add_argument("--ramp", type=float, default=2.0, help="Seconds over which bots connect")
+    parser.add_argument("--accuracy", type=float, default=0.8, help="Chance a bot answers correctly")
+    parser.add_argument("--think", choices=THINK_DISTRIBUTIONS, default="lognormal")
+    parser.add_argument("--think-mean", type=float, default=1.5, help="Mean think time, seconds")
+    parser.add_argument("--difficulty", default="MIXED", choices=DIFFICULTIES + ("MIXED",))
+    parser.add_argument("--ping-interval", type=float, default=1.0, help="Seconds between bot PINGs")
+    parser.add_argument("--server", help="HOST:PORT of a running server (default: start one)")
+    parser.add_argument("--server-pid", type=int, help="PID to sample when using --server")
+    parser.add_argument("--rounds", type=int, default=10, help="Rounds per match (started server)")
+    parser.add_argument("--round-time", type=float, default=15.0, help="Seconds per round (started server)")
+    parser.add_argument("--round-gap", type=float, default=0.5, help="Seconds between rounds (started server)")
+    parser.add_argument("--processes", type=int, default=1, help="Bot processes (for thousands of bots)")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    raise_open_file_limit()
+    server = None
+    if args.server:
+        host, _, port = args.server.rpartition(":")
+        port = int(port)
+        pid = args.server_pid
+    else:
+        host, port = "127.0.0.1", free_port()
+        server = start_server(port, args.rounds, args.round_time, args.round_gap)
+        pid = server.pid
+
+    try:
+        result = run_load(host, port, args.bots, args.duration, args.ramp, args.accuracy, args.think,
+                          args.think_mean, args.difficulty, args.ping_interval, pid, args.seed, args.processes)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    print(json.dumps(result, indent=2) if args.json else format_report(result))
+    if result["generator_cpu_percent"] > 90:
+        print(f"WARNING: bot processes were at {result['generator_cpu_percent']:.0f}% CPU; latency figures "
+              f"include bot-side queueing, try --processes {args.processes * 2}")
@@ -0,0 +1,645 @@
+#!/usr/bin/env python3
+"""
+MathBlat Match Recorder - Python Backup
+Compact binary match recordings for reviewing duels afterwards.
+
+Every round event of a match - the problem and its options, each player's
+answer with reaction time and RTT, the round result and the match result -
+is packed into a small binary record and appended to one recordings file.
+Callers only pack bytes into a buffer; a background thread writes the
+buffer out in batches, so recording never blocks the Tk thread or the
+server's event loop on disk I/O.
+
+The reader streams the file record by record, so replaying or summarising
+thousands of matches needs memory for the matches still open at that point
+of the file, not for the whole file. A record cut short by a crash ends the
+stream cleanly, and is cut off the file the next time a recorder opens it,
+so new records are never appended after a torn one.
+
+File layout:
+    header   magic, version (8 bytes, once)
+    records  length, kind, match id, ms since match start, then the body
+
+Record bodies:
+    MATCH_START  seed, difficulty code, rounds, round time, epoch start, player names
+    PROBLEM      round, correct answer, points, problem text, options
+    ANSWER       round, player, answer, correct, reaction ms, RTT ms
+    ROUND_END    round, winner (-1: nobody), scores
+    MATCH_END    reason, scores
+
+Usage:
+    from match_recorder import MatchRecorder, iter_matches, summarize
+    with MatchRecorder("~/.mathblat/matches.mbr") as recorder:
+        match = recorder.start_match(["Alice", "Bob"], "HARD", seed=schedule.seed, rounds=10)
+        match.problem(1, problem)
+        match.answer(1, player=0, answer=42, correct=True, reaction=1.9, rtt=0.04)
+        match.round_end(1, winner=0, scores=[30, 0])
+        match.end("finished", [30, 0])
+
+    for match in iter_matches("~/.mathblat/matches.mbr"):
+        ...
+    summarize("~/.mathblat/matches.mbr")
+
+    python3 match_recorder.py summary ~/.mathblat/matches.mbr
+    python3 match_recorder.py replay ~/.mathblat/matches.mbr --match 1234
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import struct
+import threading
+import time
+from collections import namedtuple
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+
+from score_store import DIFFICULTY_CODES, DIFFICULTY_NAMES, normalize_difficulty
+
+DEFAULT_PATH = Path.home() / ".mathblat" / "matches.mbr"
+
+# magic, version, reserved
+FILE_HEADER = struct.Struct("<4sHH")
+MAGIC = b"MBMR"
+VERSION = 1
+# body length, kind, match id, ms since match start
+RECORD_HEADER = struct.Struct("<HBQI")
+
+MATCH_START = 1
+PROBLEM = 2
+ANSWER = 3
+ROUND_END = 4
+MATCH_END = 5
+KIND_NAMES = {MATCH_START: "match_start", PROBLEM: "problem", ANSWER: "answer",
+              ROUND_END: "round_end", MATCH_END: "match_end"}
+
+# seed, difficulty code, rounds (0: unlimited), round time, epoch start
+_MATCH_START = struct.Struct("<QBHfd")
+# round, correct answer, points
+_PROBLEM = struct.Struct("<HiH")
+# round, player, answer, correct, reaction ms, RTT ms
+_ANSWER = struct.Struct("<HBiBff")
+# round, winner
+_ROUND_END = struct.Struct("<Hb")
+
+# Stands in for an answer that is unknown (the opponent's, in a P2P game) or not an int32
+NO_ANSWER = -(1 << 31)
+_MAX_MS = (1 << 32) - 1
+_MAX_SEED = (1 << 64) - 1
+
+Record = namedtuple("Record", ["kind", "match_id", "t_ms", "data"])
+
+
+def _int32(value) -> int:
+    if isinstance(value, int) and not isinstance(value, bool) and NO_ANSWER < value < (1 << 31):
+        return value
+    return NO_ANSWER
+
+
+def _text(value: str) -> bytes:
+    """u8 length-prefixed UTF-8, cut to 255 bytes"""
+    data = str(value).encode("utf-8")[:255]
+    return bytes([len(data)]) + data
+
+
+def _ints(values: Sequence) -> bytes:
+    """u8 count-prefixed int32s"""
+    values = list(values)[:255]
+    return struct.pack(f"<B{len(values)}i", len(values), *(_int32(v) for v in values))
+
+
+def _ms(seconds: Optional[float]) -> float:
+    return math.nan if seconds is None else seconds * 1000
+
+
+def _complete_size(f) -> int:
+    """Bytes up to the end of the last complete record in an open recordings file"""
+    end = FILE_HEADER.size
+    f.seek(end)
+    while True:
+        head = f.read(RECORD_HEADER.size)
+        if len(head) < RECORD_HEADER.size:
+            return end
+        length = RECORD_HEADER.unpack(head)[0]
+        if f.seek(length, os.SEEK_CUR) > os.fstat(f.fileno()).st_size:
+            return end
+        end += RECORD_HEADER.size + length
+
+
+class MatchRecording:
+    """Records one match's events; get one from MatchRecorder.start_match()"""
+
+    __slots__ = ("recorder", "match_id", "started", "ended")
+
+    def __init__(self, recorder: "MatchRecorder", match_id: int, started: float):
+        self.recorder = recorder
+        self.match_id = match_id
+        self.started = started
+        self.ended = False
+
+    def _record(self, kind: int, body: bytes, at: Optional[float]) -> bool:
+        t_ms = int(((time.monotonic() if at is None else at) - self.started) * 1000)
+        header = RECORD_HEADER.pack(len(body), kind, self.match_id, min(max(t_ms, 0), _MAX_MS))
+        return self.recorder._append(header + body)
+
+    def problem(self, number: int, problem: Dict, at: Optional[float] = None) -> bool:
+        """
+        Record a round's problem.
+
+        Args:
+            number: Round number
+            problem: Dict with problem_text, options, correct_answer and points
+            at: When it was shown/sent, time.monotonic() (default: now)
+
+        Returns:
+            False if the recorder dropped it (closed or backlog full)
+        """
+        body = (_PROBLEM.pack(number, _int32(problem.get("correct_answer")), problem.get("points", 0))
+                + _text(problem.get("problem_text", "")) + _ints(problem.get("options", ())))
+        return self._record(PROBLEM, body, at)
+
+    def answer(self, number: int, player: int, answer, correct: bool, reaction: Optional[float] = None,
+               rtt: Optional[float] = None, at: Optional[float] = None) -> bool:
+        """
+        Record a player's answer.
+
+        Args:
+            number: Round number
+            player: Player index, as in start_match's player list
+            answer: The chosen option (None if unknown)
+            correct: Whether it was right
+            reaction: Seconds from problem to answer, if known
+            rtt: Player's round-trip time in seconds, if known
+            at: When it arrived, time.monotonic() (default: now)
+        """
+        body = _ANSWER.pack(number, player, _int32(answer), bool(correct), _ms(reaction), _ms(rtt))
+        return self._record(ANSWER, body, at)
+
+    def round_end(self, number: int, winner: Optional[int], scores: Sequence[int],
+                  at: Optional[float] = None) -> bool:
+        """Record who won a round (None: nobody) and the scores after it"""
+        body = _ROUND_END.pack(number, -1 if winner is None else winner) + _ints(scores)
+        return self._record(ROUND_END, body, at)
+
+    def end(self, reason: str, scores: Sequence[int], at: Optional[float] = None) -> bool:
+        """Record the match result. Only the first call for a match is kept"""
+        if self.ended:
+            return False
+        self.ended = True
+        return self._record(MATCH_END, _text(reason) + _ints(scores), at)
+
+
+class MatchRecorder:
+    """Appends match records to one file from a background writer thread.
+
+    Safe to use from any thread. Records are packed by the caller and
+    written in batches every `flush_interval` seconds, or sooner once
+    FLUSH_BYTES are waiting. If the disk falls so far behind that
+    MAX_PENDING bytes are waiting, new records are dropped (and counted)
+    rather than blocking the caller.
+
+    Only one recorder should write to a file at a time: opening one cuts
+    off any partly written record a crash left at the end of the file.
+    """
+
+    FLUSH_INTERVAL = 0.5
+    FLUSH_BYTES = 64 * 1024
+    MAX_PENDING = 4 * 1024 * 1024
+
+    def __init__(self, path: Union[str, Path, None] = None, flush_interval: float = FLUSH_INTERVAL):
+        """
+        Args:
+            path: Recordings file, appended to if it exists
+                  (default ~/.mathblat/matches.mbr)
+            flush_interval: Longest a record waits before being written, seconds
+
+        Raises:
+            ValueError: If the file exists but is not a match recording
+        """
+        self.path = Path(path).expanduser() if path else DEFAULT_PATH
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.flush_interval = flush_interval
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+        try:
+            self._trim_torn_tail()
+        except BaseException:
+            os.close(self._fd)
+            raise
+
+        self._cond = threading.Condition()
+        self._pending: List[bytes] = []
+        self._pending_bytes = 0
+        self._queued = 0
+        self._written = 0
+        self._flush_requested = False
+        self._closed = False
+        self._ids = random.SystemRandom()
+        self.records = 0
+        self.bytes_written = 0
+        self.batches = 0
+        self.dropped = 0
+        self._thread = threading.Thread(target=self._run, name="match-recorder", daemon=True)
+        self._thread.start()
+
+    def _trim_torn_tail(self) -> None:
+        """Write the header to a new file, or truncate a crashed writer's partial record"""
+        with open(self._fd, "rb", closefd=False) as f:
+            header = f.read(FILE_HEADER.size)
+            if len(header) < FILE_HEADER.size:
+                # Empty, or the crash came before the header was complete
+                os.ftruncate(self._fd, 0)
+                os.write(self._fd, FILE_HEADER.pack(MAGIC, VERSION, 0))
+                return
+            if FILE_HEADER.unpack(header)[0] != MAGIC:
+                raise ValueError(f"{self.path} is not a MathBlat match recording")
+            size = _complete_size(f)
+        if size < os.fstat(self._fd).st_size:
+            os.ftruncate(self._fd, size)
+
+    def __enter__(self) -> "MatchRecorder":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def start_match(self, players: Sequence[str], difficulty: str = "MEDIUM", seed: int = 0,
+                    rounds: Optional[int] = None, round_time: float = 15.0,
+                    match_id: Optional[int] = None, at: Optional[float] = None) -> MatchRecording:
+        """
+        Record the start of a match.
+
+        Args:
+            players: Player names; answers refer to players by index
+            difficulty: Difficulty name
+            seed: ProblemSchedule seed, so problems can be regenerated
+            rounds: Rounds in the match (None: unlimited)
+            round_time: Seconds per round
+            match_id: Id shared by every record of the match (default: random)
+            at: Match start, time.monotonic() (default: now); record
+                timestamps are milliseconds after it
+
+        Returns:
+            MatchRecording to record the rest of the match through
+        """
+        started = time.monotonic() if at is None else at
+        match = MatchRecording(self, self._ids.getrandbits(63) if match_id is None else match_id, started)
+        code = DIFFICULTY_CODES.get(normalize_difficulty(difficulty), 0)
+        body = _MATCH_START.pack(int(seed) & _MAX_SEED, code, rounds or 0, round_time,
+                                 time.time() - (time.monotonic() - started))
+        body += bytes([min(len(players), 255)]) + b"".join(_text(name) for name in players[:255])
+        match._record(MATCH_START, body, started)
+        return match
+
+    def _append(self, record: bytes) -> bool:
+        with self._cond:
+            if self._closed:
+                return False
+            if self._pending_bytes + len(record) > self.MAX_PENDING:
+                if not self.dropped:
+                    print(f"WARNING: Match recorder is behind; dropping records for {self.path}")
+                self.dropped += 1
+                return False
+            self._pending.append(record)
+            self._pending_bytes += len(record)
+            self._queued += 1
+            if self._pending_bytes >= self.FLUSH_BYTES:
+                self._cond.notify_all()
+        return True
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._closed or self._flush_requested
+                                    or self._pending_bytes >= self.FLUSH_BYTES, self.flush_interval)
+                batch, self._pending, self._pending_bytes = self._pending, [], 0
+                queued = self._queued
+                self._flush_requested = False
+                closing = self._closed
+            if batch:
+                data = memoryview(b"".join(batch))
+                try:
+                    while data:
+                        data = data[os.write(self._fd, data):]
+                    self.bytes_written += sum(len(record) for record in batch)
+                    self.records += len(batch)
+                    self.batches += 1
+                except OSError as e:
+                    print(f"WARNING: Could not write match records to {self.path}: {e}")
+                    self.dropped += len(batch)
+            with self._cond:
+                self._written = queued
+                self._cond.notify_all()
+            if closing:
+                return
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything recorded so far is written. Returns False on timeout"""
+        with self._cond:
+            target = self._queued
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: self._written >= target or not self._thread.is_alive(), timeout)
+
+    def close(self) -> None:
+        """Write what is pending and close the file"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        os.close(self._fd)
+
+
+def _read_text(body: bytes, offset: int):
+    length = body[offset]
+    return body[offset + 1:offset + 1 + length].decode("utf-8", "replace"), offset + 1 + length
+
+
+def _read_ints(body: bytes, offset: int):
+    count = body[offset]
+    values = struct.unpack_from(f"<{count}i", body, offset + 1)
+    return [None if v == NO_ANSWER else v for v in values], offset + 1 + 4 * count
+
+
+def _optional_ms(value: float) -> Optional[float]:
+    return None if math.isnan(value) else value
+
+
+def _decode(kind: int, body: bytes) -> Dict:
+    if kind == MATCH_START:
+        seed, difficulty, rounds, round_time, started = _MATCH_START.unpack_from(body)
+        offset = _MATCH_START.size + 1
+        players = []
+        for _ in range(body[_MATCH_START.size]):
+            name, offset = _read_text(body, offset)
+            players.append(name)
+        return {"seed": seed, "difficulty": DIFFICULTY_NAMES.get(difficulty, "UNKNOWN"),
+                "rounds": rounds or None, "round_time": round(round_time, 3), "started": started,
+                "players": players}
+    if kind == PROBLEM:
+        number, correct, points = _PROBLEM.unpack_from(body)
+        text, offset = _read_text(body, _PROBLEM.size)
+        options, _ = _read_ints(body, offset)
+        return {"round": number, "problem_text": text, "options": options,
+                "correct_answer": None if correct == NO_ANSWER else correct, "points": points}
+    if kind == ANSWER:
+        number, player, answer, correct, reaction, rtt = _ANSWER.unpack_from(body)
+        return {"round": number, "player": player, "answer": None if answer == NO_ANSWER else answer,
+                "correct": bool(correct), "reaction_ms": _optional_ms(reaction), "rtt_ms": _optional_ms(rtt)}
+    if kind == ROUND_END:
+        number, winner = _ROUND_END.unpack_from(body)
+        scores, _ = _read_ints(body, _ROUND_END.size)
+        return {"round": number, "winner": None if winner < 0 else winner, "scores": scores}
+    if kind == MATCH_END:
+        reason, offset = _read_text(body, 0)
+        scores, _ = _read_ints(body, offset)
+        return {"reason": reason, "scores": scores}
+    return {}
+
+
+def iter_records(path: Union[str, Path]) -> Iterator[Record]:
+    """
+    Stream every record in a recordings file, in file order.
+
+    Unknown record kinds (from newer versions) are skipped. A record cut off
+    by a crash ends the stream.
+
+    Raises:
+        ValueError: If the file is not a match recording
+    """
+    with open(Path(path).expanduser(), "rb") as f:
+        header = f.read(FILE_HEADER.size)
+        if len(header) < FILE_HEADER.size or FILE_HEADER.unpack(header)[0] != MAGIC:
+            raise ValueError(f"{path} is not a MathBlat match recording")
+        while True:
+            head = f.read(RECORD_HEADER.size)
+            if len(head) < RECORD_HEADER.size:
+                return
+            length, kind, match_id, t_ms = RECORD_HEADER.unpack(head)
+            body = f.read(length)
+            if len(body) < length:
+                return
+            if kind in KIND_NAMES:
+                try:
+                    data = _decode(kind, body)
+                except (struct.error, IndexError):
+                    continue
+                yield Record(KIND_NAMES[kind], match_id, t_ms, data)
+
+
+def iter_matches(path: Union[str, Path], match_id: Optional[int] = None) -> Iterator[Dict]:
+    """
+    Stream whole matches, each yielded when its last record is read.
+
+    Matches still open at the end of the file (crashed, or still being
+    played) are yielded last with reason "incomplete". Only matches whose
+    records overlap in the file are held in memory at once.
+
+    Args:
+        path: Recordings file
+        match_id: Only this match
+
+    Returns:
+        Iterator of dicts: match_id, players, difficulty, seed, started,
+        reason, scores, and rounds (each with its problem, answers,
+        winner and scores)
+    """
+    open_matches: Dict[int, Dict] = {}
+    for record in iter_records(path):
+        if match_id is not None and record.match_id != match_id:
+            continue
+        if record.kind == "match_start":
+            open_matches[record.match_id] = dict(record.data, match_id=record.match_id, rounds_played=[],
+                                                 reason=None, scores=None, duration_ms=0)
+            continue
+        match = open_matches.get(record.match_id)
+        if match is None:
+            continue
+        match["duration_ms"] = max(match["duration_ms"], record.t_ms)
+        data = record.data
+        if record.kind == "match_end":
+            match.update(reason=data["reason"], scores=data["scores"])
+            yield open_matches.pop(record.match_id)
+            continue
+        rounds = match["rounds_played"]
+        # A late answer can follow the next round's problem
+        current = next((r for r in reversed(rounds[-2:]) if r["round"] == data["round"]), None)
+        if current is None:
+            current = {"round": data["round"], "problem": None, "shown_ms": None, "answers": [],
+                       "winner": None, "scores": None}
+            rounds.append(current)
+        if record.kind == "problem":
+            current.update(problem=data, shown_ms=record.t_ms)
+        elif record.kind == "answer":
+            current["answers"].append(dict(data, t_ms=record.t_ms))
+        elif record.kind == "round_end":
+            current.update(winner=data["winner"], scores=data["scores"])
+    for match in open_matches.values():
+        match["reason"] = "incomplete"
+        yield match
+
+
+def summarize(path: Union[str, Path]) -> Dict:
+    """
+    Aggregate every match in a recordings file in one streaming pass.
+
+    Memory grows with the number of distinct players and of matches open
+    at the same point of the file, never with the file's length.
+
+    Returns:
+        Dictionary of match, round and answer totals, finish reasons,
+        difficulty counts, reaction time averages, and per-player figures
+    """
+    open_players: Dict[int, List[str]] = {}
+    totals = {"matches": 0, "rounds": 0, "answers": 0, "correct": 0, "reasons": {}, "difficulties": {}}
+    reaction_sum = 0.0
+    reaction_count = 0
+    players: Dict[str, Dict] = {}
+
+    def player_stats(name: str) -> Dict:
+        stats = players.get(name)
+        if stats is None:
+            stats = players[name] = {"matches": 0, "answers": 0, "correct": 0, "rounds_won": 0,
+                                     "matches_won": 0, "reaction_ms_total": 0.0, "reactions": 0}
+        return stats
+
+    for record in iter_records(path):
+        data = record.data
+        if record.kind == "match_start":
+            open_players[record.match_id] = data["players"]
+            totals["matches"] += 1
+            totals["difficulties"][data["difficulty"]] = totals["difficulties"].get(data["difficulty"], 0) + 1
+            for name in data["players"]:
+                player_stats(name)["matches"] += 1
+            continue
+        names = open_players.get(record.match_id)
+        if names is None:
+            continue
+        if record.kind == "problem":
+            totals["rounds"] += 1
+        elif record.kind == "answer":
+            totals["answers"] += 1
+            totals["correct"] += data["correct"]
+            if data["player"] < len(names):
+                stats = player_stats(names[data["player"]])
+                stats["answers"] += 1
+                stats["correct"] += data["correct"]
+                if data["reaction_ms"] is not None:
+                    stats["reaction_ms_total"] += data["reaction_ms"]
+                    stats["reactions"] += 1
+            if data["reaction_ms"] is not None:
+                reaction_sum += data["reaction_ms"]
+                reaction_count += 1
+        elif record.kind == "round_end":
+            if data["winner"] is not None and data["winner"] < len(names):
+                player_stats(names[data["winner"]])["rounds_won"] += 1
+        elif record.kind == "match_end":
+            del open_players[record.match_id]
+            totals["reasons"][data["reason"]] = totals["reasons"].get(data["reason"], 0) + 1
+            scores = [s for s in data["scores"] if s is not None]
+            if scores and data["reason"] == "finished" and scores.count(max(scores)) == 1:
+                player_stats(names[data["scores"].index(max(scores))])["matches_won"] += 1
+
+    totals["reasons"]["incomplete"] = len(open_players)
+    totals["accuracy"] = totals["correct"] / totals["answers"] if totals["answers"] else 0.0
+    totals["avg_reaction_ms"] = reaction_sum / reaction_count if reaction_count else None
+    for stats in players.values():
+        reactions = stats.pop("reactions")
+        total = stats.pop("reaction_ms_total")
+        stats["avg_reaction_ms"] = total / reactions if reactions else None
+    totals["players"] = players
+    return totals
+
+
+def format_replay(match: Dict) -> str:
+    """Readable round-by-round account of one match from iter_matches()"""
+    names = match["players"]
+    lines = [f"Match {match['match_id']}: {' vs '.join(names)} ({match['difficulty']}, seed {match['seed']}, "
+             f"started {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(match['started']))})"]
+    for rnd in match["rounds_played"]:
+        problem = rnd["problem"] or {}
+        lines.append(f"  Round {rnd['round']} at +{(rnd['shown_ms'] or 0) / 1000:.1f} s: "
+                     f"{problem.get('problem_text', '?')} options {problem.get('options')} "
+                     f"(answer {problem.get('correct_answer')})")
+        for answer in rnd["answers"]:
+            name = names[answer["player"]] if answer["player"] < len(names) else f"player {answer['player']}"
+            detail = "" if answer["reaction_ms"] is None else f" in {answer['reaction_ms']:.0f} ms"
+            if answer["rtt_ms"] is not None:
+                detail += f" (RTT {answer['rtt_ms']:.0f} ms)"
+            chosen = "" if answer["answer"] is None else f"{answer['answer']} "
+            lines.append(f"    {name}: {chosen}{'correct' if answer['correct'] else 'wrong'}{detail}")
+        if rnd["scores"] is not None:
+            winner = "nobody" if rnd["winner"] is None else names[rnd["winner"]]
+            lines.append(f"    won by {winner}, scores {rnd['scores']}")
+    lines.append(f"  Ended: {match['reason']}, scores {match['scores']}, after {match['duration_ms'] / 1000:.1f} s")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay or summarise MathBlat match recordings")
+    sub = parser.add_subparsers(dest="command")
+    summary_parser = sub.add_parser("summary", help="Totals and per-player figures")
+    summary_parser.add_argument("path", nargs="?", default=str(DEFAULT_PATH))
+    replay_parser = sub.add_parser("replay", help="Print matches round by round")
+    replay_parser.add_argument("path", nargs="?", default=str(DEFAULT_PATH))
+    replay_parser.add_argument("--match", type=int, help="Only this match id")
+    args = parser.parse_args()
+
+    if args.command == "summary":
+        print(json.dumps(summarize(args.path), indent=2))
+    elif args.command == "replay":
+        for match in iter_matches(args.path, args.match):
+            print(format_replay(match) + "\n")
+    else:
+        import tempfile
+        import tracemalloc
+        from problem_generator import ProblemSchedule
+
+        print("=== MathBlat Match Recorder (Python Backup) ===\n")
+        rng = random.Random(7)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "matches.mbr"
+            started = time.perf_counter()
+            with MatchRecorder(path) as recorder:
+                for m in range(1000):
+                    schedule = ProblemSchedule(rng.getrandbits(63), rng.choice(["EASY", "MEDIUM", "HARD"]), 10)
+                    names = [f"student{rng.randrange(60)}", f"student{rng.randrange(60)}"]
+                    t = time.monotonic()
+                    match = recorder.start_match(names, schedule.difficulty, schedule.seed, 10, at=t)
+                    scores = [0, 0]
+                    for n in range(1, 11):
+                        problem = schedule.problem(n)
+                        t += 1.0
+                        match.problem(n, problem, at=t)
+                        winner = None
+                        for player in (0, 1):
+                            reaction = rng.uniform(1.0, 6.0)
+                            correct = rng.random() < 0.8
+                            choice = problem["correct_answer"] if correct else problem["options"][0]
+                            match.answer(n, player, choice, choice == problem["correct_answer"],
+                                         reaction=reaction, rtt=0.02, at=t + reaction)
+                            if choice == problem["correct_answer"] and winner is None:
+                                winner = player
+                        if winner is not None:
+                            scores[winner] += problem["points"]
+                        t += 6.0
+                        match.round_end(n, winner, scores, at=t)
+                    match.end("finished", scores, at=t)
+            elapsed = time.perf_counter() - started
+            size = path.stat().st_size
+            print(f"Recorded 1000 matches in {elapsed:.2f} s (caller side, including problem generation): "
+                  f"{size / 1024:.0f} KB, {size / 1000:.0f} bytes per match, "
+                  f"{recorder.batches} writes, {recorder.dropped} dropped")
+
+            tracemalloc.start()
+            matches = sum(1 for _ in iter_matches(path))
+            summary = summarize(path)
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(f"Streamed {matches} matches back; peak memory {peak / 1024:.0f} KB")
+            print(f"Accuracy {summary['accuracy']:.0%}, avg reaction {summary['avg_reaction_ms']:.0f} ms, "
+                  f"{len(summary['players'])} players\n")
+            print(format_replay(next(iter_matches(path))))
@@ -0,0 +1,543 @@
+#!/usr/bin/env python3
+"""
+MathBlat Match Server - Python Backup
+Headless duel server with matchmaking and many concurrent rooms.
+
+The Tkinter game can only host one opponent from inside its window. This
+server runs without a GUI on one asyncio event loop: players connect,
+queue for a difficulty, are paired into rooms and play rounds of problems
+generated on the server (a problem_generator.ProblemSchedule with one seed
+per room). The server alone knows the answers and keeps the score.
+
+Rounds are decided by round_engine: the server pings every player, and
+the first correct answer is the one with the shortest reaction time once
+each player's measured round-trip time is taken off, not the first to
+arrive.
+
+Protocol (net_protocol frames):
+    client -> server
+        HELLO   {"name": str, "difficulty": "EASY" | "MEDIUM" | "HARD"}
+                join matchmaking (again after a match to play another)
+        WATCH   {}  become a read-only spectator of every room instead
+                (EVENT frames, see spectator_hub)
+        ANSWER  {"round": int, "answer": int}
+        BYE     {}  leave the queue or forfeit the current match
+        PONG    echo of a PING's payload
+        PING    {"t": any}  answered with a PONG echoing it plus "server_time",
+                for the client's own RTT and clock sync
+    server -> client
+        MATCH   {"room": int, "opponent": str, "difficulty": str, "rounds": int}
+        PROBLEM {"round": int, "problem": str, "options": [int], "time": float,
+                 "server_time": float}
+        RESULT  {"round": int, "correct_answer": int,
+                 "winner": "you" | "opponent" | None, "you": int, "opponent": int,
+                 "reaction_ms": float | None, "rtt_ms": float | None}
+        BYE     {"reason": "finished" | "opponent_left", "you": int, "opponent": int}
+        PING    {"t": float}  server monotonic time, to be echoed in a PONG
+
+server_time and t (in the server's PINGs) are the server's
+time.monotonic(); they only mean something relative to each other.
+
+With --record, every match is appended to a match_recorder file for
+review afterwards.
+
+Usage:
+    python3 match_server.py --port 12345 --rounds 10 --round-time 15
+    python3 match_server.py --record ~/.mathblat/matches.mbr
+"""
+
+import argparse
+import asyncio
+import itertools
+import random
+import time
+from typing import Dict, List, Optional, Set
+
+from match_recorder import MatchRecorder, MatchRecording
+from net_protocol import RECV_SIZE, FrameReader, MessageType, ProtocolError, encode_message
+from problem_generator import Difficulty, ProblemSchedule
+from round_engine import MAX_COMPENSATION, LatencyStats, Round, RttEstimator
+from spectator_hub import Spectator, SpectatorHub
+
+try:
+    import resource
+    HAS_RESOURCE = True
+except ImportError:
+    HAS_RESOURCE = False
+
+DEFAULT_PORT = 12345
+
+
+class Player:
+    """One connected client"""
+
+    # Queued output beyond this means the client stopped reading
+    MAX_WRITE_BUFFER = 256 * 1024
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.address = writer.get_extra_info("peername")
+        self.name = "Player"
+        self.difficulty = Difficulty.MEDIUM
+        self.room: Optional["Room"] = None
+        self.rtt = RttEstimator()
+        # Set by the first PONG
+        self.rtt_measured = asyncio.Event()
+        # Set once the client sends WATCH; spectators never play
+        self.spectator: Optional[Spectator] = None
+        self.closed = False
+
+    def send(self, msg_type: MessageType, payload: Optional[Dict] = None) -> bool:
+        """Queue one message. Returns False if the player is gone"""
+        return self.send_frame(encode_message(msg_type, payload))
+
+    def send_frame(self, frame: bytes) -> bool:
+        """Queue an encoded frame without waiting for the socket"""
+        if self.closed:
+            return False
+        if self.writer.transport.get_write_buffer_size() > self.MAX_WRITE_BUFFER:
+            print(f"WARNING: Dropping {self.name} at {self.address}: not reading")
+            self.close()
+            return False
+        self.writer.write(frame)
+        return True
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            self.writer.close()
+
+
+class Room:
+    """One duel between two players, run as its own task"""
+
+    # Seconds to wait at match start for players without an RTT sample
+    RTT_WAIT = 1.0
+
+    def __init__(self, server: "MatchServer", room_id: int, players: List[Player],
+                 difficulty: Difficulty, seed: int):
+        self.server = server
+        self.room_id = room_id
+        self.players = players
+        self.difficulty = difficulty
+        self.scores = [0] * len(players)
+        self.schedule = ProblemSchedule(seed, difficulty.value, server.rounds, server.round_time)
+        self.round = 0
+        self.current: Optional[Round] = None
+        self.closed = False
+        self.recording: Optional[MatchRecording] = None
+        self._wakeup: Optional[asyncio.Future] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def opponent_of(self, player: Player) -> Player:
+        return self.players[1] if player is self.players[0] else self.players[0]
+
+    async def run(self) -> None:
+        try:
+            for player in self.players:
+                player.send(MessageType.MATCH, {
+                    "room": self.room_id,
+                    "opponent": self.opponent_of(player).name,
+                    "difficulty": self.difficulty.value,
+                    "rounds": self.server.rounds,
+                })
+            self.server.spectators.publish("match", self.room_id, players=[p.name for p in self.players],
+                                           difficulty=self.difficulty.value, rounds=self.server.rounds)
+            if self.server.recorder:
+                self.recording = self.server.recorder.start_match(
+                    [p.name for p in self.players], self.difficulty.value, self.schedule.seed,
+                    self.server.rounds, self.server.round_time)
+            await self.wait_for_rtt()
+            for self.round in range(1, self.server.rounds + 1):
+                await self.play_round()
+                if self.closed:
+                    return
+                await asyncio.sleep(self.server.round_gap)
+            self.finish("finished")
+        finally:
+            if self.recording:
+                # Cancelled by server shutdown; no-op if the match already ended
+                self.recording.end("aborted", self.scores)
+            self.server.room_closed(self)
+
+    async def wait_for_rtt(self) -> None:
+        """Let unmeasured players answer their first PING before round 1"""
+        pending = [p.rtt_measured.wait() for p in self.players if not p.rtt_measured.is_set()]
+        if pending:
+            try:
+                await asyncio.wait_for(asyncio.gather(*pending), self.RTT_WAIT)
+            except asyncio.TimeoutError:
+                pass
+
+    async def play_round(self) -> None:
+        """Send a problem and wait until the round can be decided"""
+        server = self.server
+        problem = self.schedule.problem(self.round)
+        opened_at = time.monotonic()
+        rnd = self.current = Round(self.round, problem, opened_at, len(self.players),
+                                   server.round_time, server.max_compensation)
+        # Compensation is fixed for the round at the RTT known when it opens
+        for i, player in enumerate(self.players):
+            rnd.set_rtt(i, player.rtt.srtt)
+        self.broadcast(MessageType.PROBLEM, {
+            "round": self.round,
+            "problem": problem["problem_text"],
+            "options": problem["options"],
+            "time": server.round_time,
+            "server_time": opened_at,
+        })
+        server.spectators.publish("problem", self.room_id, round=self.round, problem=problem["problem_text"],
+                                  options=problem["options"], time=server.round_time)
+        if self.recording:
+            self.recording.problem(self.round, problem, at=opened_at)
+
+        loop = asyncio.get_running_loop()
+        while not self.closed:
+            wait = rnd.deadline() - time.monotonic()
+            if wait <= 0:
+                break
+            self._wakeup = loop.create_future()
+            try:
+                await asyncio.wait_for(self._wakeup, wait)
+            except asyncio.TimeoutError:
+                pass
+        if self.closed:
+            return
+
+        winner = rnd.close()
+        if winner is not None:
+            self.scores[winner.player] += problem["points"]
+        server.record_round(rnd)
+        server.spectators.publish("result", self.room_id, round=self.round,
+                                  correct_answer=problem["correct_answer"],
+                                  winner=None if winner is None else winner.player, scores=list(self.scores),
+                                  reaction_ms={i: round(a.reaction * 1000, 1) for i, a in rnd.answers.items()})
+        if self.recording:
+            self.record_round(rnd)
+        for i, player in enumerate(self.players):
+            answer = rnd.answers.get(i)
+            player.send(MessageType.RESULT, {
+                "round": self.round,
+                "correct_answer": problem["correct_answer"],
+                "winner": None if winner is None else ("you" if winner.player == i else "opponent"),
+                "you": self.scores[i],
+                "opponent": self.scores[1 - i],
+                "reaction_ms": None if answer is None else round(answer.reaction * 1000, 1),
+                "rtt_ms": None if player.rtt.srtt is None else round(player.rtt.srtt * 1000, 1),
+            })
+
+    def record_round(self, rnd: Round) -> None:
+        """Append the round's answers and result to the match recording"""
+        for i, answer in sorted(rnd.answers.items()):
+            self.recording.answer(rnd.number, i, answer.answer, answer.correct, answer.reaction,
+                                  self.players[i].rtt.srtt, at=answer.arrived_at)
+        winner = rnd.best.player if rnd.best else None
+        self.recording.round_end(rnd.number, winner, self.scores, at=rnd.closed_at)
+
+    def on_answer(self, player: Player, payload: Dict) -> None:
+        """Hand an ANSWER to the round engine and re-check the deadline"""
+        rnd = self.current
+        if rnd is None or payload.get("round") != rnd.number:
+            return
+        index = self.players.index(player)
+        if rnd.submit(index, payload.get("answer"), time.monotonic()):
+            self.server.spectators.publish("answered", self.room_id, round=rnd.number, player=index)
+            if self._wakeup and not self._wakeup.done():
+                self._wakeup.set_result(None)
+
+    def broadcast(self, msg_type: MessageType, payload: Dict) -> None:
+        """Send the same message to every player, encoding it once"""
+        frame = encode_message(msg_type, payload)
+        for player in self.players:
+            player.send_frame(frame)
+
+    def leave(self, player: Player) -> None:
+        """A player disconnected or forfeited: the other one is told and freed"""
+        if not self.closed:
+            self.finish("opponent_left", skip=player)
+            if self.task and self.task is not asyncio.current_task():
+                self.task.cancel()
+
+    def finish(self, reason: str, skip: Optional[Player] = None) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        for i, player in enumerate(self.players):
+            player.room = None
+            if player is not skip:
+                player.send(MessageType.BYE, {"reason": reason, "you": self.scores[i],
+                                              "opponent": self.scores[1 - i]})
+        if reason == "finished":
+            self.server.matches_finished += 1
+        self.server.spectators.publish("end", self.room_id, reason=reason, scores=list(self.scores))
+        if self.recording:
+            self.recording.end(reason, self.scores)
+
+
+class MatchServer:
+    """Accepts players, pairs them by difficulty and runs their rooms.
+
+    Everything runs on one asyncio loop, so rooms and the matchmaking
+    queue need no locks. Each room's problems come from a ProblemSchedule
+    with its own seed, so any round can be regenerated from (seed, round).
+    """
+
+    # Pending connections the OS queues before accept()
+    BACKLOG = 1024
+
+    def __init__(self, host: str = "0.0.0.0", port: int = DEFAULT_PORT, rounds: int = 10,
+                 round_time: float = 15.0, round_gap: float = 1.0, seed: Optional[int] = None,
+                 ping_interval: float = 2.0, max_compensation: float = MAX_COMPENSATION,
+                 record: Optional[str] = None):
+        """
+        Args:
+            host: Interface to listen on
+            port: TCP port (0 picks a free one)
+            rounds: Rounds per match
+            round_time: Seconds allowed per round
+            round_gap: Pause between rounds, seconds
+            seed: Seed for room problem sequences (None: random)
+            ping_interval: Seconds between RTT pings (0: no pings)
+            max_compensation: Most RTT credited to a player's answers, seconds
+            record: Match recordings file to append every match to (None: off)
+        """
+        self.host = host
+        self.port = port
+        self.rounds = rounds
+        self.round_time = round_time
+        self.round_gap = round_gap
+        self.ping_interval = ping_interval
+        self.max_compensation = max_compensation
+        self.latency = LatencyStats()
+        self.recorder = MatchRecorder(record) if record else None
+        self.spectators = SpectatorHub()
+        self._seeds = random.Random(seed)
+        self._room_ids = itertools.count(1)
+        self.players: Set[Player] = set()
+        self._handlers: Set[asyncio.Task] = set()
+        self.rooms: Dict[int, Room] = {}
+        self.waiting: Dict[Difficulty, Player] = {}
+        self.matches_finished = 0
+        self.rounds_played = 0
+        self.started = time.monotonic()
+        self._server: Optional[asyncio.base_events.Server] = None
+        self._pinger: Optional[asyncio.Task] = None
+
+    async def start(self) -> int:
+        """Start listening. Returns the bound port"""
+        self._server = await asyncio.start_server(self.handle_client, self.host, self.port,
+                                                  backlog=self.BACKLOG)
+        self.port = self._server.sockets[0].getsockname()[1]
+        if self.ping_interval > 0:
+            self._pinger = asyncio.get_running_loop().create_task(self._ping_players())
+        return self.port
+
+    async def _ping_players(self) -> None:
+        """Ping everyone each interval; one PING frame is shared by all players"""
+        while True:
+            await asyncio.sleep(self.ping_interval)
+            frame = encode_message(MessageType.PING, {"t": time.monotonic()})
+            for player in list(self.players):
+                player.send_frame(frame)
+
+    def on_pong(self, player: Player, payload: Dict) -> None:
+        sent = payload.get("t")
+        if not isinstance(sent, (int, float)) or isinstance(sent, bool):
+            return
+        sample = time.monotonic() - sent
+        # Ignore echoes of times we never sent
+        if 0 <= sample < 60:
+            player.rtt.update(sample)
+            player.rtt_measured.set()
+            self.latency.add_rtt(sample)
+
+    def record_round(self, rnd: Round) -> None:
+        self.rounds_played += 1
+        self.latency.add_round(rnd.stats())
+
+    async def serve_forever(self, stats_interval: float = 0) -> None:
+        """Serve until cancelled, printing stats every `stats_interval` seconds"""
+        if self._server is None:
+            await self.start()
+        print(f"MathBlat match server listening on {self.host}:{self.port}")
+        reporter = None
+        if stats_interval > 0:
+            reporter = asyncio.get_running_loop().create_task(self._report_stats(stats_interval))
+        try:
+            async with self._server:
+                await self._server.serve_forever()
+        finally:
+            if reporter:
+                reporter.cancel()
+
+    async def _report_stats(self, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            print(self.format_stats())
+
+    async def close(self) -> None:
+        """Stop accepting, end every room and disconnect everyone"""
+        if self._pinger:
+            self._pinger.cancel()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        for room in list(self.rooms.values()):
+            room.task.cancel()
+        for player in list(self.players):
+            player.close()
+        self.spectators.close()
+        # Closed connections read EOF, so the handlers finish on their own
+        if self._handlers:
+            await asyncio.wait(self._handlers)
+        if self.recorder:
+            self.recorder.close()
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        player = Player(reader, writer)
+        self.players.add(player)
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        frames = FrameReader()
+        try:
+            while not player.closed:
+                data = await reader.read(RECV_SIZE)
+                if not data:
+                    break
+                for msg_type, payload in frames.feed(data):
+                    self.handle_message(player, msg_type, payload)
+        except ProtocolError as e:
+            print(f"WARNING: Disconnecting {player.address}: {e}")
+        except ConnectionError:
+            pass
+        finally:
+            self.players.discard(player)
+            self._handlers.discard(handler)
+            self.leave(player)
+            if player.spectator:
+                self.spectators.unsubscribe(player.spectator)
+            player.close()
+
+    def handle_message(self, player: Player, msg_type: MessageType, payload: Dict) -> None:
+        if player.spectator:
+            if msg_type == MessageType.BYE:
+                player.close()
+            return
+        if msg_type == MessageType.ANSWER:
+            if player.room:
+                player.room.on_answer(player, payload)
+        elif msg_type == MessageType.PONG:
+            self.on_pong(player, payload)
+        elif msg_type == MessageType.PING:
+            player.send(MessageType.PONG, dict(payload, server_time=time.monotonic()))
+        elif msg_type == MessageType.HELLO:
+            if player.room is None:
+                player.name = str(payload.get("name") or "Player")[:50]
+                try:
+                    player.difficulty = Difficulty[str(payload.get("difficulty", "MEDIUM")).upper()]
+                except KeyError:
+                    player.difficulty = Difficulty.MEDIUM
+                # Measure RTT now so the first round already has a sample
+                player.send(MessageType.PING, {"t": time.monotonic()})
+                self.matchmake(player)
+        elif msg_type == MessageType.WATCH:
+            if player.room is None:
+                self.leave(player)
+                # Spectators get EVENTs from the hub only: no pings, no matchmaking
+                self.players.discard(player)
+                player.spectator = self.spectators.subscribe(player.writer, player.address)
+        elif msg_type == MessageType.BYE:
+            self.leave(player)
+
+    def matchmake(self, player: Player) -> None:
+        """Pair the player with whoever waits at the same difficulty, or wait"""
+        opponent = self.waiting.pop(player.difficulty, None)
+        if opponent is None or opponent.closed or opponent is player:
+            self.waiting[player.difficulty] = player
+            return
+        room = Room(self, next(self._room_ids), [opponent, player], player.difficulty,
+                    seed=self._seeds.getrandbits(64))
+        opponent.room = player.room = room
+        self.rooms[room.room_id] = room
+        room.task = asyncio.get_running_loop().create_task(room.run())
+
+    def leave(self, player: Player) -> None:
+        """Take a player out of the queue or their room"""
+        if self.waiting.get(player.difficulty) is player:
+            del self.waiting[player.difficulty]
+        if player.room:
+            player.room.leave(player)
+
+    def room_closed(self, room: Room) -> None:
+        self.rooms.pop(room.room_id, None)
+        self.spectators.forget(room.room_id)
+
+    def stats(self) -> Dict:
+        """Current load and totals since start"""
+        return {
+            "players": len(self.players),
+            "waiting": len(self.waiting),
+            "rooms": len(self.rooms),
+            "matches_finished": self.matches_finished,
+            "rounds_played": self.rounds_played,
+            "uptime": time.monotonic() - self.started,
+            "latency": self.latency.summary(),
+            "spectators": self.spectators.stats(),
+        }
+
+    def format_stats(self) -> str:
+        s = self.stats()
+        latency = s["latency"]
+        return (f"{s['players']} players, {s['rooms']} rooms, {s['waiting']} waiting, "
+                f"{s['matches_finished']} matches / {s['rounds_played']} rounds played; "
+                f"RTT p50 {latency['rtt_ms']['p50']:.1f} ms p99 {latency['rtt_ms']['p99']:.1f} ms, "
+                f"arbitration wait p95 {latency['arbitration_wait_ms']['p95']:.1f} ms, "
+                f"{latency['reordered_rounds']} of {latency['rounds']} recent rounds reordered, "
+                f"{s['spectators']['spectators']} spectators")
+
+
+def raise_open_file_limit() -> int:
+    """Raise the soft open-file limit to the hard limit (one fd per player). Returns the limit"""
+    if not HAS_RESOURCE:
+        return 0
+    try:
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        if hard == resource.RLIM_INFINITY or hard > soft:
+            target = 65536 if hard == resource.RLIM_INFINITY else hard
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+            return target
+        return soft
+
+    except (ValueError, OSError) as e:
+        print(f"WARNING: Could not raise open file limit: {e}")
+        return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless MathBlat match server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--rounds", type=int, default=10, help="Rounds per match")
+    parser.add_argument("--round-time", type=float, default=15.0, help="Seconds per round")
+    parser.add_argument("--round-gap", type=float, default=1.0, help="Seconds between rounds")
+    parser.add_argument("--seed", type=int, help="Seed for reproducible problem sequences")
+    parser.add_argument("--ping-interval", type=float, default=2.0, help="Seconds between RTT pings (0: off)")
+    parser.add_argument("--max-compensation", type=float, default=MAX_COMPENSATION,
+                        help="Most round-trip time credited to an answer, seconds")
+    parser.add_argument("--record", help="Append every match to this recordings file")
+    parser.add_argument("--stats-interval", type=float, default=30.0, help="Seconds between stats lines (0: off)")
+    args = parser.parse_args()
+
+    limit = raise_open_file_limit()
+    if limit:
+        print(f"Open file limit: {limit}")
+    server = MatchServer(args.host, args.port, args.rounds, args.round_time, args.round_gap, args.seed,
+                         args.ping_interval, args.max_compensation, args.record)
+    try:
+        asyncio.run(server.serve_forever(args.stats_interval))
+    except KeyboardInterrupt:
+        print(f"\nStopped. {server.format_stats()}")
+    finally:
+        if server.recorder:
+            server.recorder.close()
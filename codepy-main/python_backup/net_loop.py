@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+MathBlat Network Loop - Python Backup
+Event-driven socket handling for multiplayer duels.
+
+One background thread waits in a selector on every open socket. A message
+is decoded and handed to its callback as soon as its last byte arrives,
+instead of on the next tick of a polling loop, and one thread serves every
+connection and listener. Sends happen directly on the caller's thread, so
+local actions go out immediately too.
+
+Callbacks run on the network thread. GUI code must hand the work over to
+its own thread (for Tkinter, `root.after(0, ...)`).
+
+Usage:
+    from net_loop import NetworkLoop
+    loop = NetworkLoop()
+    conn = loop.add_connection(sock, on_message=lambda t, p: print(t, p))
+    conn.send(MessageType.ANSWER, {"correct": True, "score": 30})
+"""
+
+import selectors
+import socket
+import threading
+from collections import deque
+from typing import Callable, Optional, Tuple
+
+from net_protocol import FrameReader, MessageType, ProtocolError, encode_message
+
+MessageCallback = Callable[[MessageType, dict], None]
+CloseCallback = Callable[[Optional[Exception]], None]
+AcceptCallback = Callable[[socket.socket, Tuple], None]
+
+
+class Connection:
+    """One framed connection registered with a NetworkLoop.
+    
+    Create these with NetworkLoop.add_connection().
+    """
+    
+    def __init__(self, loop: "NetworkLoop", sock: socket.socket,
+                 on_message: MessageCallback, on_close: Optional[CloseCallback] = None):
+        self.loop = loop
+        self.sock = sock
+        self.on_message = on_message
+        self.on_close = on_close
+        self.reader = FrameReader()
+        self.closed = False
+        self._send_lock = threading.Lock()
+    
+    def send(self, msg_type: MessageType, payload: Optional[dict] = None) -> bool:
+        """
+        Send one message now, from the calling thread.
+        
+        Returns:
+            True if the message was handed to the OS, False if the
+            connection is closed or the send failed
+        """
+        if self.closed:
+            return False
+        frame = encode_message(msg_type, payload)
+        try:
+            with self._send_lock:
+                self.sock.sendall(frame)
+            return True
+        
+        except OSError as e:
+            print(f"WARNING: Failed to send {msg_type.name}: {e}")
+            self.close(e)
+            return False
+    
+    def close(self, error: Optional[Exception] = None) -> None:
+        """Close the connection. on_close runs once, on the network thread"""
+        if self.closed:
+            return
+        self.closed = True
+        self.loop.call_soon(self._finish_close, error)
+    
+    def _on_readable(self) -> None:
+        try:
+            messages = self.reader.read_from(self.sock)
+        except (OSError, ProtocolError) as e:
+            # ConnectionError (peer closed) is an OSError
+            self.closed = True
+            self._finish_close(e)
+            return
+        for msg_type, payload in messages:
+            if self.closed:
+                return
+            self.loop.run_callback(self.on_message, msg_type, payload)
+    
+    def _finish_close(self, error: Optional[Exception]) -> None:
+        self.loop.unregister(self.sock)
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+        if self.on_close:
+            self.loop.run_callback(self.on_close, error)
+            self.on_close = None
+
+
+class NetworkLoop:
+    """Selector loop running on one daemon thread.
+    
+    Registrations from other threads are queued and picked up after a
+    wakeup byte interrupts select(), so sockets are only ever registered
+    and unregistered on the loop thread.
+    """
+    
+    def __init__(self, name: str = "mathblat-net"):
+        self._selector = selectors.DefaultSelector()
+        self._pending = deque()
+        self._wake_read, self._wake_write = socket.socketpair()
+        self._wake_read.setblocking(False)
+        self._wake_write.setblocking(False)
+        self._selector.register(self._wake_read, selectors.EVENT_READ, self._drain_wakeups)
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+    
+    def add_connection(self, sock: socket.socket, on_message: MessageCallback,
+                       on_close: Optional[CloseCallback] = None) -> Connection:
+        """
+        Start dispatching messages from a connected socket.
+        
+        Args:
+            sock: Connected TCP socket
+            on_message: Called with (MessageType, payload) for each message
+            on_close: Called once with the error (or None) when the
+                      connection ends
+        
+        Returns:
+            Connection for sending and closing
+        """
+        # Small frames go out immediately instead of waiting to be coalesced
+        if sock.family in (socket.AF_INET, socket.AF_INET6):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.setblocking(True)
+        connection = Connection(self, sock, on_message, on_close)
+        self.call_soon(self._register, sock, connection._on_readable)
+        return connection
+    
+    def add_listener(self, sock: socket.socket, on_accept: AcceptCallback) -> None:
+        """
+        Accept connections on a listening socket without a dedicated thread.
+        
+        Args:
+            sock: Bound, listening socket
+            on_accept: Called with (socket, address) for each new connection
+        """
+        sock.setblocking(False)
+        
+        def accept():
+            try:
+                conn, addr = sock.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                print(f"WARNING: Stopped accepting connections: {e}")
+                self.unregister(sock)
+                return
+            self.run_callback(on_accept, conn, addr)
+        
+        self.call_soon(self._register, sock, accept)
+    
+    def remove_listener(self, sock: socket.socket) -> None:
+        """Stop accepting on a listening socket and close it"""
+        def close():
+            self.unregister(sock)
+            sock.close()
+        self.call_soon(close)
+    
+    def call_soon(self, callback: Callable, *args) -> None:
+        """Run a callback on the loop thread as soon as possible"""
+        self._pending.append((callback, args))
+        try:
+            self._wake_write.send(b"\0")
+        except (BlockingIOError, OSError):
+            # A full wakeup pipe already guarantees a wakeup
+            pass
+    
+    def run_callback(self, callback: Callable, *args) -> None:
+        """Run a user callback, keeping the loop alive if it raises"""
+        try:
+            callback(*args)
+        except Exception as e:
+            print(f"WARNING: Network callback failed: {e}")
+    
+    def unregister(self, sock: socket.socket) -> None:
+        """Stop watching a socket (loop thread only)"""
+        try:
+            self._selector.unregister(sock)
+        except (KeyError, ValueError):
+            pass
+    
+    def stop(self) -> None:
+        """Stop the loop thread. Open sockets are left to their owners"""
+        self._stopping = True
+        self.call_soon(lambda: None)
+        if threading.current_thread() is not self._thread:
+            self._thread.join()
+    
+    @property
+    def running(self) -> bool:
+        return self._thread.is_alive()
+    
+    def _register(self, sock: socket.socket, callback: Callable) -> None:
+        try:
+            self._selector.register(sock, selectors.EVENT_READ, callback)
+        except (KeyError, ValueError, OSError) as e:
+            print(f"WARNING: Failed to watch socket: {e}")
+    
+    def _drain_wakeups(self) -> None:
+        try:
+            while self._wake_read.recv(4096):
+                pass
+        except (BlockingIOError, InterruptedError):
+            pass
+    
+    def _run(self) -> None:
+        while not self._stopping:
+            # Blocks until a socket is readable or call_soon() wakes us
+            for key, _ in self._selector.select():
+                key.data()
+            while self._pending:
+                callback, args = self._pending.popleft()
+                self.run_callback(callback, *args)
+        self._selector.close()
+        self._wake_read.close()
+        self._wake_write.close()
+
+
+if __name__ == "__main__":
+    import time
+    
+    print("=== MathBlat Network Loop (Python Backup) ===\n")
+    
+    loop = NetworkLoop()
+    listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    listener.bind(("127.0.0.1", 0))
+    listener.listen(1)
+    replies = []
+    done = threading.Event()
+    
+    def on_accept(conn, addr):
+        # Echo every message straight back
+        host = {}
+        host["conn"] = loop.add_connection(conn, lambda t, p: host["conn"].send(t, p))
+    
+    def on_reply(msg_type, payload):
+        replies.append(time.perf_counter() - payload["sent"])
+        if len(replies) == 20:
+            done.set()
+    
+    loop.add_listener(listener, on_accept)
+    client = loop.add_connection(socket.create_connection(listener.getsockname()), on_reply,
+                                 on_close=lambda e: print(f"Client closed ({e})"))
+    for _ in range(20):
+        client.send(MessageType.ANSWER, {"correct": True, "sent": time.perf_counter()})
+        time.sleep(0.01)
+    done.wait(5)
+    
+    print(f"Echoed {len(replies)} messages, average round trip {sum(replies) / len(replies) * 1000:.3f} ms")
+    client.close()
+    loop.remove_listener(listener)
+    time.sleep(0.1)
+    loop.stop()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+MathBlat Network Protocol - Python Backup
+Length-prefixed message framing for multiplayer duels.
+
+TCP is a byte stream: one recv() can return half a message, or several
+messages run together. Every message is therefore sent as a frame with a
+fixed header giving its length, protocol version and message type,
+followed by a UTF-8 JSON payload:
+
+    length   uint32, bytes after the header
+    version  uint8, PROTOCOL_VERSION
+    type     uint8, a MessageType
+    payload  JSON object
+
+FrameReader buffers incoming bytes and returns every complete message in
+them, however the stream was split.
+
+Usage:
+    from net_protocol import FrameReader, MessageType, send_message
+    send_message(sock, MessageType.ANSWER, {"correct": True, "score": 30})
+
+    reader = FrameReader()
+    for msg_type, payload in reader.read_from(sock):
+        ...
+"""
+
+import json
+import socket
+import struct
+from enum import IntEnum
+from typing import Dict, List, Optional, Tuple
+
+PROTOCOL_VERSION = 1
+# length, version, message type (network byte order)
+HEADER = struct.Struct("!IBB")
+# Frames larger than this are treated as a corrupt stream
+MAX_PAYLOAD_SIZE = 1 << 20
+# Bytes asked for per recv() call
+RECV_SIZE = 65536
+
+Message = Tuple["MessageType", Dict]
+
+
+class MessageType(IntEnum):
+    """Message types. Never renumber - add new types at the end"""
+    HELLO = 1
+    PROBLEM = 2
+    ANSWER = 3
+    BYE = 4
+    # Match server (match_server.py)
+    MATCH = 5
+    RESULT = 6
+    # Round-trip time measurement: PONG echoes PING's payload
+    PING = 7
+    PONG = 8
+    # Peer duels: seed and round plan, see problem_generator.ProblemSchedule
+    SCHEDULE = 9
+    # Match server spectators (spectator_hub.py): WATCH subscribes, EVENT is pushed
+    WATCH = 10
+    EVENT = 11
+
+
+class ProtocolError(ValueError):
+    """The stream doesn't contain valid frames (wrong version, bad length or JSON)"""
+
+
+def encode_message(msg_type: MessageType, payload: Optional[Dict] = None) -> bytes:
+    """
+    Encode one message as a frame.
+    
+    Args:
+        msg_type: Message type
+        payload: JSON-serializable dict (default: empty)
+    
+    Returns:
+        Header and payload bytes, ready for sendall()
+    """
+    body = json.dumps(payload or {}, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    if len(body) > MAX_PAYLOAD_SIZE:
+        raise ProtocolError(f"Payload of {len(body)} bytes exceeds {MAX_PAYLOAD_SIZE}")
+    return HEADER.pack(len(body), PROTOCOL_VERSION, msg_type) + body
+
+
+def send_message(sock: socket.socket, msg_type: MessageType, payload: Optional[Dict] = None) -> None:
+    """Send one message, blocking until every byte is handed to the OS"""
+    sock.sendall(encode_message(msg_type, payload))
+
+
+class FrameReader:
+    """Reassembles frames from arbitrarily split stream data.
+    
+    Bytes are appended to one buffer and decoded in place; consumed bytes
+    are dropped once per feed() rather than once per message, so a read
+    holding hundreds of small messages costs one buffer shift.
+    """
+    
+    def __init__(self):
+        self._buffer = bytearray()
+    
+    def feed(self, data: bytes) -> List[Message]:
+        """
+        Add received bytes and decode every complete message.
+        
+        Returns:
+            List of (MessageType, payload) tuples, possibly empty
+        
+        Raises:
+            ProtocolError: On an unsupported version, unknown type,
+                           oversized frame or undecodable payload
+        """
+        buffer = self._buffer
+        buffer += data
+        messages = []
+        offset = 0
+        end = len(buffer)
+        while end - offset >= HEADER.size:
+            length, version, type_code = HEADER.unpack_from(buffer, offset)
+            if version != PROTOCOL_VERSION:
+                raise ProtocolError(f"Unsupported protocol version {version}")
+            if length > MAX_PAYLOAD_SIZE:
+                raise ProtocolError(f"Frame of {length} bytes exceeds {MAX_PAYLOAD_SIZE}")
+            start = offset + HEADER.size
+            if end - start < length:
+                break
+            try:
+                msg_type = MessageType(type_code)
+                payload = json.loads(buffer[start:start + length])
+            except ValueError as e:
+                raise ProtocolError(f"Bad frame: {e}") from e
+            messages.append((msg_type, payload))
+            offset = start + length
+        if offset:
+            del buffer[:offset]
+        return messages
+    
+    def read_from(self, sock: socket.socket) -> List[Message]:
+        """
+        recv() once and decode whatever complete messages are available.
+        
+        Raises:
+            ConnectionError: If the peer closed the connection
+            ProtocolError: See feed()
+        """
+        data = sock.recv(RECV_SIZE)
+        if not data:
+            raise ConnectionError("Connection closed by peer")
+        return self.feed(data)
+    
+    @property
+    def pending(self) -> int:
+        """Bytes buffered towards an incomplete frame"""
+        return len(self._buffer)
+
+
+if __name__ == "__main__":
+    print("=== MathBlat Network Protocol (Python Backup) ===\n")
+    
+    stream = b"".join([
+        encode_message(MessageType.HELLO, {"name": "Alice"}),
+        encode_message(MessageType.PROBLEM, {"problem": "7 * 6 = ?", "options": [42, 36, 48, 40]}),
+        encode_message(MessageType.ANSWER, {"correct": True, "score": 30, "note": "x" * 5000}),
+    ])
+    reader = FrameReader()
+    # Deliver the stream in awkward 7 byte pieces
+    for i in range(0, len(stream), 7):
+        for msg_type, payload in reader.feed(stream[i:i + 7]):
+            print(f"{msg_type.name}: {str(payload)[:60]}")
+    print(f"Leftover bytes: {reader.pending}")
@@ -7,12 +7,23 @@ Usage:
     from problem_generator import ProblemGenerator
     gen = ProblemGenerator(difficulty="MEDIUM")
     problem = gen.generate_problem()
+
+    # Per-call difficulty - safe to share one generator across threads
+    problem = gen.generate_problem("HARD")
+
+    # Reproducible sequence
+    gen = ProblemGenerator(seed=42)
+
+    # Same problem for round 3 on every machine that knows the seed
+    schedule = ProblemSchedule(seed=1234, difficulty="HARD", rounds=10)
+    problem = schedule.problem(3)
 """
 
 import random
 import json
+import threading
 from enum import Enum
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 
 class Difficulty(Enum):
@@ -27,6 +38,10 @@ class ProblemGenerator:
     
     Supports three difficulty levels (EASY, MEDIUM, HARD) with configurable
     number ranges and point values. Generates 4 multiple choice options.
+    
+    Generation doesn't change the generator: the difficulty can be passed
+    per call, and each generator draws from its own random.Random (or one
+    passed per call), so one instance can serve many threads at once.
     """
     
     # Number ranges for each difficulty level (matching Godot implementation)
@@ -39,11 +54,12 @@ class ProblemGenerator:
     # Basic arithmetic operations supported by problem generator
     OPERATIONS = ["+", "-", "*", "/"]
     
-    def __init__(self, difficulty: str = "MEDIUM"):
+    def __init__(self, difficulty: str = "MEDIUM", seed: Optional[int] = None):
         """Initialize generator with difficulty level.
         
         Args:
             difficulty: "EASY", "MEDIUM", or "HARD" (default: "MEDIUM")
+            seed: Seed for this generator's random.Random (None: OS entropy)
         """
         try:
             self.difficulty = Difficulty[difficulty]
@@ -51,19 +67,39 @@ class ProblemGenerator:
             print(f"WARNING: Unknown difficulty '{difficulty}', using MEDIUM")
             self.difficulty = Difficulty.MEDIUM
         
+        self.rng = random.Random(seed)
         self.problems_generated = 0
+        # Only guards the counter; generation itself takes no lock
+        self._stats_lock = threading.Lock()
+    
+    def _resolve_difficulty(self, difficulty: Optional[str]) -> Difficulty:
+        """Difficulty for one call, falling back to the generator's default"""
+        if difficulty is None:
+            return self.difficulty
+        try:
+            return Difficulty[difficulty]
+        except KeyError:
+            print(f"WARNING: Unknown difficulty '{difficulty}', using {self.difficulty.value}")
+            return self.difficulty
     
-    def generate_problem(self) -> Dict:
+    def generate_problem(self, difficulty: Optional[str] = None,
+                         rng: Optional[random.Random] = None) -> Dict:
         """
         Generate a single math problem.
         
+        Args:
+            difficulty: "EASY", "MEDIUM" or "HARD" for this problem only
+                        (default: the generator's difficulty)
+            rng: Random source for this problem (default: the generator's)
+        
         Returns:
             Dictionary with: operand1, operand2, operation, correct_answer,
                            options (list of 4), problem_text
         """
         try:
+            rng = rng or self.rng
             problem_data = self.DIFFICULTY_RANGES.get(
-                self.difficulty,
+                self._resolve_difficulty(difficulty),
                 self.DIFFICULTY_RANGES[Difficulty.MEDIUM]
             )
             
@@ -71,11 +107,11 @@ class ProblemGenerator:
             max_num = problem_data["max"]
             
             # Generate random operands
-            operand1 = random.randint(min_num, max_num)
-            operand2 = random.randint(max(1, min_num), max_num)
+            operand1 = rng.randint(min_num, max_num)
+            operand2 = rng.randint(max(1, min_num), max_num)
             
             # Choose random operation
-            operation = random.choice(self.OPERATIONS)
+            operation = rng.choice(self.OPERATIONS)
             
             # Calculate correct answer
             correct_answer = self._calculate_answer(operand1, operand2, operation)
@@ -87,9 +123,10 @@ class ProblemGenerator:
             problem_text = f"{operand1} {operation} {operand2} = ?"
             
             # Generate 4 options
-            options = self._generate_options(correct_answer)
+            options = self._generate_options(correct_answer, rng)
             
-            self.problems_generated += 1
+            with self._stats_lock:
+                self.problems_generated += 1
             
             return {
                 "operand1": operand1,
@@ -137,32 +174,36 @@ class ProblemGenerator:
         except Exception:
             return None  # Handle any calculation errors
     
-    def _generate_options(self, correct_answer: int, max_attempts: int = 50) -> List[int]:
+    def _generate_options(self, correct_answer: int, rng: random.Random,
+                          max_attempts: int = 50) -> List[int]:
         """Generate 4 unique answer options"""
         try:
             options = [correct_answer]
             attempts = 0
             
             while len(options) < 4 and attempts < max_attempts:
-                offset = random.randint(1, max(5, abs(correct_answer)))
+                offset = rng.randint(1, max(5, abs(correct_answer)))
                 
-                if random.random() < 0.5:
+                if rng.random() < 0.5:
                     wrong_answer = correct_answer + offset
                 else:
                     wrong_answer = correct_answer - offset
                 
-                if wrong_answer > 0 and wrong_answer not in options:
+                # Negative answers need negative distractors, or the
+                # only negative option gives the answer away
+                if (wrong_answer > 0 or correct_answer <= 0) and wrong_answer not in options:
                     options.append(wrong_answer)
                 
                 attempts += 1
             
             # Fallback if we couldn't generate enough
             while len(options) < 4:
-                fallback = correct_answer + random.randint(-correct_answer + 1, correct_answer * 2)
-                if fallback > 0 and fallback not in options:
+                offset = rng.randint(1, max(5, abs(correct_answer)) * 2)
+                fallback = correct_answer + offset if rng.random() < 0.5 else correct_answer - offset
+                if (fallback > 0 or correct_answer <= 0) and fallback not in options:
                     options.append(fallback)
             
-            random.shuffle(options)
+            rng.shuffle(options)
             return options[:4]
         
         except Exception as e:
@@ -183,7 +224,11 @@ class ProblemGenerator:
         }
     
     def set_difficulty(self, difficulty: str) -> bool:
-        """Change difficulty level"""
+        """Change the default difficulty level.
+        
+        Shared generators should pass the difficulty to generate_problem()
+        instead, so one caller's choice doesn't leak into another's.
+        """
         try:
             self.difficulty = Difficulty[difficulty]
             return True
@@ -191,10 +236,11 @@ class ProblemGenerator:
             print(f"WARNING: Unknown difficulty '{difficulty}'")
             return False
     
-    def generate_batch(self, count: int = 5) -> List[Dict]:
-        """Generate multiple problems at once"""
+    def generate_batch(self, count: int = 5, difficulty: Optional[str] = None,
+                       rng: Optional[random.Random] = None) -> List[Dict]:
+        """Generate multiple problems at once (see generate_problem)"""
         try:
-            return [self.generate_problem() for _ in range(count)]
+            return [self.generate_problem(difficulty, rng) for _ in range(count)]
         except Exception as e:
             print(f"WARNING: Failed to generate batch: {e}")
             return [self._generate_fallback_problem()]
@@ -208,6 +254,63 @@ class ProblemGenerator:
         }
 
 
+class ProblemSchedule:
+    """Deterministic problem sequence for a match, rebuilt from a seed.
+    
+    Round n's problem depends only on (seed, difficulty, n): each round
+    gets its own random.Random seeded from "seed:n". Peers that share the
+    schedule's to_dict() at match start generate identical problems
+    locally, in any order, without sending problems over the network.
+    Both sides must run the same ProblemGenerator code.
+    """
+    
+    def __init__(self, seed: int, difficulty: str = "MEDIUM", rounds: Optional[int] = None,
+                 round_time: float = 15.0):
+        """
+        Args:
+            seed: Shared match seed
+            difficulty: "EASY", "MEDIUM" or "HARD"
+            rounds: Rounds in the match (None: unlimited)
+            round_time: Seconds per round
+        """
+        self.seed = int(seed)
+        self.difficulty = difficulty if difficulty in Difficulty.__members__ else Difficulty.MEDIUM.value
+        self.rounds = rounds
+        self.round_time = round_time
+        self._generator = ProblemGenerator(self.difficulty)
+    
+    @classmethod
+    def new(cls, difficulty: str = "MEDIUM", rounds: Optional[int] = None,
+            round_time: float = 15.0) -> "ProblemSchedule":
+        """Schedule with a fresh random seed"""
+        return cls(random.SystemRandom().getrandbits(63), difficulty, rounds, round_time)
+    
+    def problem(self, number: int) -> Dict:
+        """Problem for round `number` (1-based)"""
+        return self._generator.generate_problem(self.difficulty, rng=random.Random(f"{self.seed}:{number}"))
+    
+    def to_dict(self) -> Dict:
+        """JSON-ready form, sent once at match start"""
+        return {"seed": self.seed, "difficulty": self.difficulty,
+                "rounds": self.rounds, "round_time": self.round_time}
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ProblemSchedule":
+        """
+        Rebuild a schedule from to_dict() output.
+        
+        Raises:
+            ValueError: If the seed is missing or a field is not a number
+        """
+        try:
+            seed = int(data["seed"])
+            rounds = data.get("rounds")
+            return cls(seed, str(data.get("difficulty", "MEDIUM")).upper(),
+                       int(rounds) if rounds else None, float(data.get("round_time", 15.0)))
+        except (AttributeError, KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Bad problem schedule: {e}") from e
+
+
 if __name__ == "__main__":
     # Example usage
     print("=== MathBlat Problem Generator (Python Backup) ===\n")
@@ -222,3 +325,8 @@ if __name__ == "__main__":
         print(f"  Points: {problem['points']}\n")
     
     print(f"Stats: {gen.get_stats()}")
+    
+    host = ProblemSchedule.new("HARD", rounds=5)
+    guest = ProblemSchedule.from_dict(json.loads(json.dumps(host.to_dict())))
+    same = all(host.problem(n) == guest.problem(n) for n in range(1, 6))
+    print(f"\nSchedule {host.to_dict()}: peers agree on every round: {same}")
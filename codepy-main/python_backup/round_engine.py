@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+MathBlat Round Engine - Python Backup
+Server-authoritative rounds with latency-compensated answer arbitration.
+
+Answers reach the server later from a player on a slow link, so "first
+answer to arrive" favours whoever sits closest to the server. The engine
+instead ranks answers by estimated reaction time: arrival time minus the
+moment the problem was sent, minus the player's measured round-trip time
+(the problem travels down and the answer travels up). Compensation is
+capped so a player can't gain by faking a slow connection.
+
+Because a slower player's earlier reaction can still be in flight when a
+faster player's answer arrives, a round is only decided once no pending
+answer could beat the best one so far.
+
+All times are time.monotonic() seconds on the server.
+
+Usage:
+    from round_engine import Round, RttEstimator
+    rtt = RttEstimator()
+    rtt.update(0.042)
+
+    rnd = Round(1, problem, opened_at=time.monotonic(), players=2, round_time=15.0)
+    rnd.submit(0, 42, arrived_at=time.monotonic(), rtt=rtt.srtt)
+    if time.monotonic() >= rnd.deadline():
+        result = rnd.close()
+"""
+
+import time
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Sequence
+
+# Compensation never exceeds this, however slow a player's link looks
+MAX_COMPENSATION = 0.25
+
+
+class RttEstimator:
+    """Smoothed round-trip time from ping/pong samples (RFC 6298 weights)"""
+
+    ALPHA = 0.125
+    BETA = 0.25
+
+    def __init__(self):
+        self.srtt: Optional[float] = None
+        self.rttvar = 0.0
+        self.samples = 0
+        self.last: Optional[float] = None
+
+    def update(self, sample: float) -> float:
+        """Add one measured round trip (seconds). Returns the new smoothed RTT"""
+        if self.srtt is None:
+            self.srtt = sample
+            self.rttvar = sample / 2
+        else:
+            self.rttvar = (1 - self.BETA) * self.rttvar + self.BETA * abs(self.srtt - sample)
+            self.srtt = (1 - self.ALPHA) * self.srtt + self.ALPHA * sample
+        self.samples += 1
+        self.last = sample
+        return self.srtt
+
+
+class Answer:
+    """One player's answer to a round"""
+
+    __slots__ = ("player", "answer", "correct", "arrived_at", "compensation", "reaction")
+
+    def __init__(self, player: int, answer, correct: bool, arrived_at: float,
+                 compensation: float, reaction: float):
+        self.player = player
+        self.answer = answer
+        self.correct = correct
+        self.arrived_at = arrived_at
+        self.compensation = compensation
+        self.reaction = reaction
+
+
+class Round:
+    """State of one round: OPEN until close(), then CLOSED.
+
+    Players are numbered 0..players-1. The caller supplies every
+    timestamp, so the engine itself never reads the clock.
+    """
+
+    OPEN = "open"
+    CLOSED = "closed"
+
+    def __init__(self, number: int, problem: Dict, opened_at: float, players: int,
+                 round_time: float, max_compensation: float = MAX_COMPENSATION):
+        """
+        Args:
+            number: Round number, echoed by clients in ANSWER
+            problem: ProblemGenerator problem (needs correct_answer)
+            opened_at: When the problem was sent
+            players: Number of players in the room
+            round_time: Seconds of (compensated) reaction time allowed
+            max_compensation: Cap on the RTT credited to any player
+        """
+        self.number = number
+        self.problem = problem
+        self.opened_at = opened_at
+        self.players = players
+        self.round_time = round_time
+        self.max_compensation = max_compensation
+        self.state = self.OPEN
+        self.answers: Dict[int, Answer] = {}
+        self.best: Optional[Answer] = None
+        self.late = 0
+        self.first_correct_at: Optional[float] = None
+        self.closed_at: Optional[float] = None
+        self._compensation = [0.0] * players
+
+    def set_rtt(self, player: int, rtt: Optional[float]) -> None:
+        """Record the player's current smoothed RTT (None: not measured yet)"""
+        self._compensation[player] = min(rtt or 0.0, self.max_compensation)
+
+    def submit(self, player: int, answer, arrived_at: float, rtt: Optional[float] = None) -> bool:
+        """
+        Record a player's answer. Each player gets one try.
+
+        Args:
+            player: Player index
+            answer: The chosen option
+            arrived_at: When the server received it
+            rtt: Player's smoothed RTT, if known (overrides set_rtt)
+
+        Returns:
+            True if the answer counted (not a repeat, late or after close)
+        """
+        if self.state != self.OPEN or player in self.answers:
+            return False
+        if rtt is not None:
+            self.set_rtt(player, rtt)
+        compensation = self._compensation[player]
+        reaction = max(0.0, arrived_at - self.opened_at - compensation)
+        if reaction > self.round_time:
+            self.late += 1
+            return False
+
+        correct = answer == self.problem["correct_answer"]
+        entry = Answer(player, answer, correct, arrived_at, compensation, reaction)
+        self.answers[player] = entry
+        if correct:
+            if self.first_correct_at is None:
+                self.first_correct_at = arrived_at
+            if self.best is None or reaction < self.best.reaction:
+                self.best = entry
+        return True
+
+    def deadline(self) -> float:
+        """
+        Earliest time the round can be decided.
+
+        That is when every player has answered, or when no answer still
+        in flight could have a shorter compensated reaction than the best
+        so far (or fit in the round time, if nobody is right yet).
+        """
+        pending = [p for p in range(self.players) if p not in self.answers]
+        if not pending:
+            return self.opened_at
+        bound = self.best.reaction if self.best else self.round_time
+        return self.opened_at + bound + max(self._compensation[p] for p in pending)
+
+    def close(self, now: Optional[float] = None) -> Optional[Answer]:
+        """Decide the round. Returns the winning answer, or None"""
+        if self.state == self.OPEN:
+            self.state = self.CLOSED
+            self.closed_at = time.monotonic() if now is None else now
+        return self.best
+
+    def stats(self) -> Dict:
+        """Latency figures for this round, in milliseconds"""
+        return {
+            "round": self.number,
+            "compensation_ms": [c * 1000 for c in self._compensation],
+            "reaction_ms": {p: a.reaction * 1000 for p, a in self.answers.items()},
+            # How long arbitration held the round open after the first correct answer
+            "arbitration_wait_ms": ((self.closed_at - self.first_correct_at) * 1000
+                                    if self.first_correct_at is not None and self.closed_at is not None
+                                    else None),
+            "late": self.late,
+            "winner": self.best.player if self.best else None,
+            # True when compensation changed who won versus arrival order
+            "reordered": bool(self.best and self.first_correct_at is not None
+                              and self.best.arrived_at != self.first_correct_at),
+        }
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """q-th percentile (0-100) of values by nearest rank; 0.0 if empty"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+class LatencyStats:
+    """Rolling latency figures over the most recent rounds, for tuning"""
+
+    def __init__(self, history: int = 1000):
+        self.rounds = deque(maxlen=history)
+        self.rtt_samples = deque(maxlen=history * 4)
+
+    def add_round(self, stats: Dict) -> None:
+        self.rounds.append(stats)
+
+    def add_rtt(self, rtt: float) -> None:
+        self.rtt_samples.append(rtt * 1000)
+
+    def summary(self, quantiles: Iterable[float] = (50, 95, 99)) -> Dict:
+        """Percentiles of RTT and arbitration wait, and how often compensation mattered"""
+        waits = [r["arbitration_wait_ms"] for r in self.rounds if r["arbitration_wait_ms"] is not None]
+        rtts = list(self.rtt_samples)
+        decided = sum(1 for r in self.rounds if r["winner"] is not None)
+        return {
+            "rounds": len(self.rounds),
+            "rtt_ms": {f"p{q:g}": percentile(rtts, q) for q in quantiles},
+            "arbitration_wait_ms": {f"p{q:g}": percentile(waits, q) for q in quantiles},
+            "reordered_rounds": sum(1 for r in self.rounds if r["reordered"]),
+            "decided_rounds": decided,
+            "late_answers": sum(r["late"] for r in self.rounds),
+        }
+
+
+if __name__ == "__main__":
+    print("=== MathBlat Round Engine (Python Backup) ===\n")
+
+    problem = {"problem_text": "7 * 6 = ?", "correct_answer": 42, "options": [42, 36, 48, 40]}
+    # Player 0 is on the LAN (5 ms), player 1 on a slow link (180 ms)
+    rtts: List[RttEstimator] = [RttEstimator(), RttEstimator()]
+    for sample in (0.004, 0.006, 0.005):
+        rtts[0].update(sample)
+    for sample in (0.170, 0.190, 0.180):
+        rtts[1].update(sample)
+
+    rnd = Round(1, problem, opened_at=100.0, players=2, round_time=15.0)
+    for player, rtt in enumerate(rtts):
+        rnd.set_rtt(player, rtt.srtt)
+    # Player 1 reacted in 1.90 s, player 0 in 2.00 s, but player 0's answer arrives first
+    rnd.submit(0, 42, arrived_at=100.0 + 2.00 + 0.005)
+    print(f"After LAN answer: can decide at +{rnd.deadline() - 100.0:.3f} s")
+    rnd.submit(1, 42, arrived_at=100.0 + 1.90 + 0.180)
+    winner = rnd.close(now=100.0 + 2.08)
+    print(f"Winner: player {winner.player} (reaction {winner.reaction * 1000:.0f} ms)")
+    print(f"Stats: {rnd.stats()}")
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+MathBlat Round Timer - Python Backup
+Drift-free round countdowns on time.monotonic() deadlines.
+
+Counting down by decrementing once per scheduled tick loses the scheduling
+jitter and render time of every tick. RoundTimer instead stores the
+round's deadline and computes what is left from the clock each time it is
+asked, so it can be redrawn at any refresh rate without drifting, and it
+reports each round's timeout exactly once.
+
+Against the match server, ClockSync turns the server's monotonic
+timestamps (PONG and PROBLEM "server_time") into local ones, so both
+players' countdowns end together however late the PROBLEM arrived.
+
+Usage:
+    from round_timer import ClockSync, RoundTimer
+    timer = RoundTimer()
+    timer.start(round_id=1, duration=15)
+    timer.seconds_left()      # 15, 14, ... computed from the deadline
+    if timer.poll() == 1:     # True once, when round 1 runs out
+        ...
+
+    sync = ClockSync()
+    sync.update(server_time=pong["server_time"], received_at=time.monotonic(), rtt=rtt)
+    timer.start_at_server_time(problem["round"], problem["time"], problem["server_time"], sync)
+"""
+
+import math
+import time
+from collections import deque
+from typing import Callable, Hashable, Optional
+
+
+class ClockSync:
+    """Estimated offset between the server's monotonic clock and ours.
+
+    Each sample assumes the server's timestamp was taken half a round trip
+    before it arrived. Samples with the smallest RTT have the least room
+    for error, so the estimate comes from the lowest-RTT sample among the
+    most recent `window` (the usual NTP-style minimum filter).
+    """
+
+    def __init__(self, window: int = 8):
+        self._samples = deque(maxlen=window)
+
+    def update(self, server_time: float, received_at: float, rtt: float) -> float:
+        """
+        Add one sample.
+
+        Args:
+            server_time: Server timestamp carried by the message
+            received_at: Local time.monotonic() when it arrived
+            rtt: Current round-trip estimate, seconds
+
+        Returns:
+            The current offset estimate (server - local), seconds
+        """
+        self._samples.append((rtt, server_time + rtt / 2 - received_at))
+        return self.offset
+
+    @property
+    def offset(self) -> Optional[float]:
+        """server clock - local clock, or None before the first sample"""
+        if not self._samples:
+            return None
+        return min(self._samples)[1]
+
+    def to_local(self, server_time: float) -> Optional[float]:
+        """Local monotonic time for a server timestamp, or None if unsynced"""
+        offset = self.offset
+        return None if offset is None else server_time - offset
+
+
+class RoundTimer:
+    """Countdown for one round at a time, measured against a deadline"""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            clock: Monotonic clock in seconds (swappable for replays)
+        """
+        self.clock = clock
+        self.round_id: Optional[Hashable] = None
+        self.duration = 0.0
+        self.deadline: Optional[float] = None
+        self._fired = True
+
+    def start(self, round_id: Hashable, duration: float, started_at: Optional[float] = None) -> None:
+        """
+        Start a round's countdown, replacing any running one.
+
+        Args:
+            round_id: Returned by poll() when this round times out
+            duration: Seconds allowed
+            started_at: When the round began on the local clock (default: now)
+        """
+        start = self.clock() if started_at is None else started_at
+        self.round_id = round_id
+        self.duration = duration
+        self.deadline = start + duration
+        self._fired = False
+
+    def start_at_server_time(self, round_id: Hashable, duration: float, server_time: float,
+                             sync: ClockSync) -> None:
+        """Start a round that began at `server_time` on the server's clock (now, if not synced yet)"""
+        self.start(round_id, duration, sync.to_local(server_time))
+
+    def stop(self) -> None:
+        """End the round early (answered); it will not time out"""
+        self._fired = True
+
+    @property
+    def running(self) -> bool:
+        """True until the round is stopped or has timed out"""
+        return not self._fired
+
+    def remaining(self, now: Optional[float] = None) -> float:
+        """Seconds left, never negative (0 when stopped)"""
+        if self._fired or self.deadline is None:
+            return 0.0
+        return max(0.0, self.deadline - (self.clock() if now is None else now))
+
+    def seconds_left(self, now: Optional[float] = None) -> int:
+        """Whole seconds to display: 15 until 14 are left, ... 1, then 0"""
+        return math.ceil(self.remaining(now))
+
+    def poll(self, now: Optional[float] = None) -> Optional[Hashable]:
+        """
+        Check for the timeout.
+
+        Returns:
+            The round id the first time it's called at or after the
+            deadline, otherwise None
+        """
+        if self._fired or self.deadline is None:
+            return None
+        if (self.clock() if now is None else now) >= self.deadline:
+            self._fired = True
+            return self.round_id
+        return None
+
+
+if __name__ == "__main__":
+    print("=== MathBlat Round Timer (Python Backup) ===\n")
+
+    # Ticks every ~50 ms with render time added, like a busy UI
+    timer = RoundTimer()
+    timer.start(round_id=1, duration=1.0)
+    naive = 1.0
+    started = time.monotonic()
+    timeouts = []
+    while time.monotonic() - started < 1.3:
+        time.sleep(0.05)
+        time.sleep(0.004)   # "render"
+        naive -= 0.05        # decrement-per-tick countdown
+        fired = timer.poll()
+        if fired is not None:
+            timeouts.append(fired)
+            elapsed = time.monotonic() - started
+            print(f"Round timeout after {elapsed:.3f} s; the per-tick countdown still shows {naive:.2f} s")
+    print(f"Timeout events fired: {timeouts}")
+
+    # The round started 100 ms (server clock) before a PONG that took
+    # half of a 40 ms round trip to reach us: 120 ms ago
+    sync = ClockSync()
+    sync.update(server_time=5000.0, received_at=time.monotonic(), rtt=0.040)
+    timer.start_at_server_time(2, 15, server_time=5000.0 - 0.100, sync=sync)
+    print(f"Round 2 synced to server: {timer.remaining():.2f} s left of 15")
@@ -8,14 +8,54 @@ Usage:
     manager = ScoreManager()
     manager.save_score("Player", 100, "MEDIUM")
     scores = manager.get_high_scores()
+
+    # Several processes sharing one scores file
+    manager = ScoreManager(shared=True)
+
+    # Bulk import (iterable of entries, or a .csv / .jsonl file)
+    manager.save_scores("tournament.csv")
+
+    # Rolling leaderboards
+    today = manager.get_windowed_scores("daily")
+
+    # Percentile over every score ever saved at a difficulty
+    beaten = manager.get_percentile(120, "MEDIUM")
+
+    # Fixed-record binary history, for very large score histories
+    manager = ScoreManager(storage="binary")
+
+    # Scores in the SQLite data store shared with config and profiles
+    manager = ScoreManager(storage="sqlite", data_store=store)
 """
 
+import csv
+import heapq
 import json
 import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 from datetime import datetime
 
+from data_store import DataStore, ScoreTable
+from leaderboards import WindowedLeaderboard
+from score_export import export_entries
+from score_sketch import ScoreSketch
+from score_store import MAX_SCORE, MIN_SCORE, BinaryScoreStore, normalize_difficulty
+
+# Advisory file locking is POSIX-only - shared mode degrades to unlocked
+# writes where it isn't available
+try:
+    import fcntl
+    FILE_LOCKING_AVAILABLE = True
+except ImportError:
+    fcntl = None
+    FILE_LOCKING_AVAILABLE = False
+
 
 class ScoreManager:
     """Manage high scores with persistent JSON storage.
@@ -23,6 +63,32 @@ class ScoreManager:
     Stores and retrieves player high scores with automatic ranking.
     Persists scores to ~/.mathblat/high_scores.json by default.
     Maintains a maximum of 10 high score entries.
+    
+    Every saved score is also appended to a history log next to the scores
+    file, which keeps every score for full-history exports. In shared mode
+    (with json storage) that log is the only thing a save writes: one
+    O_APPEND write under an exclusive advisory lock. The top 10 and the
+    sketch are built from the log lazily, when they are read, and saved to
+    a checkpoint (plus high_scores.json and score_sketch.json for other
+    readers) at most once per CHECKPOINT_INTERVAL, so several processes can
+    share one scores file without overwriting each other's entries.
+    
+    The history log feeds rolling daily/weekly/all-time leaderboards, which
+    are read incrementally from the last seen offset rather than rescanned.
+    A per-difficulty score histogram (score_sketch.json) is updated on every
+    save for percentile ranks over the full history in bounded memory.
+    
+    With storage="binary" the history is kept as fixed-size records in an
+    mmap-backed score_history.bin instead, and the top-10 list is read from
+    the front of that store, so startup cost doesn't grow with history size.
+    
+    With storage="sqlite" the history and the score sketch live in a
+    DataStore (mathblat.db), and each save commits once. Pass the same
+    data_store to ConfigManager to commit settings alongside scores.
+    
+    Thread-safe: writes serialize behind a lock and publish the high scores
+    as a new tuple, so readers get an immutable snapshot without locking or
+    copying. Treat the entry dicts inside a snapshot as read-only.
     """
     
     # Default storage directory (~/.mathblat/)
@@ -31,15 +97,71 @@ class ScoreManager:
     DEFAULT_SCORES_FILE = DEFAULT_SCORES_DIR / "high_scores.json"
     # Maximum number of high scores to keep
     MAX_HIGH_SCORES = 10
+    # Append-only log of every saved score, kept next to the scores file
+    # (see _companion_path)
+    HISTORY_FILENAME = "score_history.jsonl"
+    # Binary record store used instead of the log with storage="binary"
+    BINARY_HISTORY_FILENAME = "score_history.bin"
+    # SQLite data store used with storage="sqlite" (unless one is passed in)
+    DATABASE_FILENAME = "mathblat.db"
+    # Supported storage formats
+    STORAGE_FORMATS = ("json", "binary", "sqlite")
+    # Per-difficulty score distributions for percentile ranks
+    SKETCH_FILENAME = "score_sketch.json"
+    # Shared mode: top 10 and sketch as of a log offset, so startup only
+    # replays the log written since
+    CHECKPOINT_FILENAME = "score_checkpoint.json"
+    # Shared mode: least seconds between checkpoints from one process
+    CHECKPOINT_INTERVAL = 1.0
     
-    def __init__(self, scores_file: Optional[str] = None):
+    def __init__(self, scores_file: Optional[str] = None, shared: bool = False,
+                 storage: str = "json", data_store: Optional[DataStore] = None):
         """Initialize score manager with optional custom file path.
         
         Creates ~/.mathblat directory if needed and loads existing scores.
         
         Args:
             scores_file: Custom file path for scores. If None, uses default.
+            shared: If True, several processes can safely share the same
+                    scores file. With json storage saves only append to
+                    the history log; otherwise writes lock and re-read.
+            storage: "json" (default), "binary" for the mmap record store, or
+                     "sqlite" for the shared DataStore
+            data_store: DataStore to use with storage="sqlite". If None, opens
+                        mathblat.db next to the scores file.
         """
+        if storage not in self.STORAGE_FORMATS:
+            print(f"WARNING: Unknown storage format '{storage}', using json")
+            storage = "json"
+        self.shared = shared
+        self.storage = storage
+        # Shared json storage writes nothing but the history log
+        self._log_only = shared and storage == "json"
+        self.store: Optional[Union[BinaryScoreStore, ScoreTable]] = None
+        self.db: Optional[DataStore] = None
+        # Serializes writers (and leaderboard/sketch upkeep) across threads
+        self._lock = threading.RLock()
+        # Whether this process holds the shared-mode file lock (under _lock)
+        self._file_locked = False
+        # Immutable snapshot, replaced wholesale by writers
+        self.high_scores: Tuple[Dict, ...] = ()
+        self.leaderboards = WindowedLeaderboard(capacity=self.MAX_HIGH_SCORES)
+        # Leaderboards are filled from the history on first use
+        self._history_primed = False
+        # History already fed into the leaderboards: bytes of the log, or
+        # records of the store, within one generation (the log's inode, or
+        # the store's compaction counter)
+        self._history_offset = 0
+        self._history_generation = 0
+        self.sketch = ScoreSketch()
+        # (mtime_ns, size) of the sketch file when last loaded
+        self._sketch_stamp = None
+        # Log-only mode: log bytes folded into high_scores and the sketch,
+        # within one log generation (inode), and the offset last checkpointed
+        self._log_offset = 0
+        self._log_generation: Optional[int] = None
+        self._checkpoint_offset: Optional[Tuple[Optional[int], int]] = None
+        self._checkpoint_due = 0.0
         try:
             # Use custom path if provided, otherwise use default location
             if scores_file:
@@ -47,16 +169,61 @@ class ScoreManager:
             else:
                 self.scores_file = self.DEFAULT_SCORES_FILE
             
+            self.lock_file = self.scores_file.with_name(self.scores_file.name + ".lock")
+            if storage == "binary":
+                self.history_file = self._companion_path(self.BINARY_HISTORY_FILENAME)
+            elif storage == "sqlite":
+                self.history_file = data_store.path if data_store else \
+                    self._companion_path(self.DATABASE_FILENAME)
+            else:
+                self.history_file = self._companion_path(self.HISTORY_FILENAME)
+            self.sketch_file = self._companion_path(self.SKETCH_FILENAME)
+            self.checkpoint_file = self._companion_path(self.CHECKPOINT_FILENAME)
+            
             # Create directory structure if it doesn't exist
             self.scores_file.parent.mkdir(parents=True, exist_ok=True)
             
-            # Initialize scores list and load from file
-            self.high_scores: List[Dict] = []
+            if shared and not FILE_LOCKING_AVAILABLE:
+                print("WARNING: File locking unavailable, shared mode writes are unlocked")
+            
+            if storage == "binary":
+                self.store = BinaryScoreStore(self.history_file)
+            elif storage == "sqlite":
+                self.db = data_store or DataStore(self.history_file)
+                self.store = self.db.scores
+            
+            # Load scores from file
             self.load_scores()
+            
+            # Score files that predate the sketch get one built from history
+            if self.db is not None:
+                if self.db.get("scores", "sketch") is None and len(self.store):
+                    self._rebuild_sketch()
+                else:
+                    self._load_sketch()
+            elif self._log_only:
+                pass  # load_scores() rebuilt the sketch along with the top 10
+            elif not self.sketch_file.exists() and self.history_file.exists():
+                self._rebuild_sketch()
+            else:
+                self._load_sketch()
         
         except Exception as e:
             print(f"WARNING: Failed to initialize ScoreManager: {e}")
-            self.high_scores = []
+            self.high_scores = ()
+    
+    def _companion_path(self, filename: str) -> Path:
+        """
+        Path of a file kept next to the scores file.
+        
+        The default scores file uses `filename` as is. Any other scores file
+        prefixes it with its own name (tournament.json ->
+        tournament.score_history.jsonl), so score files sharing a directory
+        never share a history.
+        """
+        if self.scores_file.name == self.DEFAULT_SCORES_FILE.name:
+            return self.scores_file.with_name(filename)
+        return self.scores_file.with_name(f"{self.scores_file.stem}.{filename}")
     
     def save_score(self, player_name: str, score: int, difficulty: str) -> bool:
         """
@@ -65,7 +232,7 @@ class ScoreManager:
         Args:
             player_name: Name of the player
             score: Score achieved
-            difficulty: Difficulty level (EASY, MEDIUM, HARD)
+            difficulty: Difficulty level (EASY, MEDIUM, HARD), any case
         
         Returns:
             True if saved successfully, False otherwise
@@ -74,84 +241,216 @@ class ScoreManager:
             new_entry = {
                 "name": player_name[:50],  # Limit name length
                 "score": int(score),
-                "difficulty": difficulty,
+                "difficulty": normalize_difficulty(difficulty),
                 "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             }
             
-            self.high_scores.append(new_entry)
+            if self._log_only:
+                return self._append_to_shared_log([new_entry])
             
-            # Sort by score descending
-            self.high_scores.sort(key=lambda x: x["score"], reverse=True)
-            
-            # Keep only top 10
-            if len(self.high_scores) > self.MAX_HIGH_SCORES:
-                self.high_scores = self.high_scores[:self.MAX_HIGH_SCORES]
-            
-            return self._write_scores_to_file()
+            with self._write_lock():
+                # Merge into the latest on-disk list, not our stale copy
+                if self.shared:
+                    self.load_scores()
+                
+                # Build the new list on the side - readers keep the old snapshot
+                previous = self.high_scores
+                scores = list(previous)
+                scores.append(new_entry)
+                
+                # Sort by score descending
+                scores.sort(key=lambda x: x["score"], reverse=True)
+                
+                # Keep only top 10, then publish
+                self.high_scores = tuple(scores[:self.MAX_HIGH_SCORES])
+                
+                # In binary/sqlite storage the history is the only copy
+                if not self._append_history([new_entry]) and self.store is not None:
+                    self.high_scores = previous
+                    return False
+                self._record_in_sketch([new_entry])
+                return self._write_scores_to_file()
         
         except Exception as e:
             print(f"WARNING: Failed to save score: {e}")
             return False
     
-    def load_scores(self) -> List[Dict]:
+    def save_scores(self, entries: Union[Iterable[Any], str, Path]) -> int:
         """
-        Load high scores from file.
+        Save many score entries with a single merge and a single write.
+        
+        Entries may be dicts with name/score/difficulty (and optionally date)
+        keys, or (name, score, difficulty[, date]) tuples. A path ending in
+        .csv or .jsonl is read as a file of such entries; CSV files may use
+        either the export_scores header (Player, Score, ...) or lowercase keys.
+        Invalid entries are skipped.
+        
+        Args:
+            entries: Iterable of entries, or path to a CSV/JSONL file
         
         Returns:
-            List of high score entries, empty list if file doesn't exist
+            Number of entries saved, 0 if nothing was saved
         """
         try:
-            if not self.scores_file.exists():
-                self.high_scores = []
-                return self.high_scores
+            if isinstance(entries, (str, Path)):
+                entries = self._read_score_file(Path(entries))
             
-            with open(self.scores_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            batch = [e for e in (self._normalize_entry(raw, now) for raw in entries) if e]
+            if isinstance(self.store, BinaryScoreStore):
+                # Binary records hold a 32-bit score
+                batch = [e for e in batch if MIN_SCORE <= e["score"] <= MAX_SCORE]
+            if not batch:
+                return 0
+            
+            if self._log_only:
+                return len(batch) if self._append_to_shared_log(batch) else 0
             
-            if isinstance(data, list):
-                self.high_scores = data
+            # Stable sort keeps import order among equal scores
+            batch.sort(key=lambda x: x["score"], reverse=True)
+            
+            with self._write_lock():
+                if self.shared:
+                    self.load_scores()
+                
+                # Both inputs are sorted descending - merge and take the top
+                previous = self.high_scores
+                merged = heapq.merge(previous, batch, key=lambda x: x["score"], reverse=True)
+                self.high_scores = tuple(islice(merged, self.MAX_HIGH_SCORES))
+                
+                # In binary/sqlite storage the history is the only copy
+                if not self._append_history(batch) and self.store is not None:
+                    self.high_scores = previous
+                    return 0
+                self._record_in_sketch(batch)
+                if not self._write_scores_to_file():
+                    return 0
+            return len(batch)
+        
+        except Exception as e:
+            print(f"WARNING: Failed to save scores: {e}")
+            return 0
+    
+    @staticmethod
+    def _normalize_entry(raw: Any, default_date: str) -> Optional[Dict]:
+        """Validate one bulk entry and convert it to the stored dict format"""
+        try:
+            if isinstance(raw, dict):
+                name = raw.get("name", raw.get("Player"))
+                score = raw.get("score", raw.get("Score"))
+                difficulty = raw.get("difficulty", raw.get("Difficulty"))
+                date = raw.get("date", raw.get("Date"))
             else:
-                print("WARNING: High scores file format invalid")
-                self.high_scores = []
+                name, score, difficulty, *rest = raw
+                date = rest[0] if rest else None
+            
+            difficulty = normalize_difficulty(difficulty)
+            if not name or not difficulty:
+                return None
             
-            return self.high_scores
+            return {
+                "name": str(name)[:50],
+                "score": int(score),
+                "difficulty": difficulty,
+                "date": date or default_date,
+            }
         
-        except json.JSONDecodeError:
-            print("WARNING: High scores file corrupted, starting fresh")
-            self.high_scores = []
-            return self.high_scores
+        except (TypeError, ValueError):
+            return None
+    
+    @staticmethod
+    def _read_score_file(path: Path) -> Iterator[Any]:
+        """Stream entries from a CSV or JSONL score file"""
+        with open(path, 'r', encoding='utf-8', newline='') as f:
+            if path.suffix.lower() == ".csv":
+                yield from csv.DictReader(f)
+            else:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        try:
+                            yield json.loads(line)
+                        except json.JSONDecodeError:
+                            continue
+    
+    def load_scores(self) -> Tuple[Dict, ...]:
+        """
+        Load high scores from file.
         
-        except Exception as e:
-            print(f"WARNING: Failed to load scores: {e}")
-            self.high_scores = []
-            return self.high_scores
+        Returns:
+            Tuple of high score entries, empty if file doesn't exist
+        """
+        with self._locked():
+            try:
+                if self._log_only:
+                    self._load_checkpoint()
+                    self._refresh_from_log()
+                    return self.high_scores
+                
+                # The binary store keeps its best records at the front
+                if self.store is not None:
+                    self.high_scores = tuple(self.store.top(self.MAX_HIGH_SCORES))
+                    # The data store keeps the sketch alongside the scores
+                    if self.db is not None:
+                        self._load_sketch()
+                    return self.high_scores
+                
+                if not self.scores_file.exists():
+                    self.high_scores = ()
+                    return self.high_scores
+                
+                with open(self.scores_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                
+                if isinstance(data, list):
+                    self.high_scores = tuple(data)
+                else:
+                    print("WARNING: High scores file format invalid")
+                    self.high_scores = ()
+                
+                return self.high_scores
+            
+            except json.JSONDecodeError:
+                print("WARNING: High scores file corrupted, starting fresh")
+                self.high_scores = ()
+                return self.high_scores
+            
+            except Exception as e:
+                print(f"WARNING: Failed to load scores: {e}")
+                self.high_scores = ()
+                return self.high_scores
     
-    def get_high_scores(self, difficulty: Optional[str] = None) -> List[Dict]:
+    def get_high_scores(self, difficulty: Optional[str] = None) -> Tuple[Dict, ...]:
         """
         Get high scores, optionally filtered by difficulty.
         
+        Returns the current immutable snapshot without locking or copying.
+        
         Args:
             difficulty: Optional difficulty filter
         
         Returns:
-            List of high score entries
+            Tuple of high score entries
         """
         try:
+            scores = self._current_scores()
             if difficulty:
-                return [s for s in self.high_scores if s.get("difficulty") == difficulty]
-            return self.high_scores
+                difficulty = normalize_difficulty(difficulty)
+                return tuple(s for s in scores if s.get("difficulty") == difficulty)
+            return scores
         
         except Exception as e:
             print(f"WARNING: Failed to get scores: {e}")
-            return []
+            return ()
     
     def get_rank(self, score: int) -> int:
         """Get rank position for a given score (1-indexed)"""
         try:
-            for i, entry in enumerate(self.high_scores):
+            scores = self._current_scores()
+            for i, entry in enumerate(scores):
                 if score > entry["score"]:
                     return i + 1
-            return len(self.high_scores) + 1
+            return len(scores) + 1
         
         except Exception:
             return 1
@@ -159,18 +458,101 @@ class ScoreManager:
     def is_high_score(self, score: int) -> bool:
         """Check if score qualifies for high scores list"""
         try:
-            if len(self.high_scores) < self.MAX_HIGH_SCORES:
+            scores = self._current_scores()
+            if len(scores) < self.MAX_HIGH_SCORES:
                 return True
-            return score > self.high_scores[-1]["score"]
+            return score > scores[-1]["score"]
         
         except Exception:
             return False
     
+    def get_windowed_scores(self, window: str = "daily", difficulty: Optional[str] = None,
+                            count: int = 10) -> List[Dict]:
+        """
+        Get top scores for today, this week, or all time.
+        
+        Args:
+            window: "daily", "weekly" or "all"
+            difficulty: Optional difficulty filter
+            count: Maximum number of entries
+        
+        Returns:
+            List of score entries, best first
+        """
+        try:
+            with self._locked():
+                if self.shared or not self._history_primed:
+                    self._sync_history()
+                return self.leaderboards.top(window, normalize_difficulty(difficulty), count)
+        
+        except Exception as e:
+            print(f"WARNING: Failed to get {window} scores: {e}")
+            return []
+    
+    def get_daily_challenge_scores(self, day: str, difficulty: Optional[str] = None,
+                                   count: int = 10) -> List[Dict]:
+        """
+        Get top scores for a "YYYY-MM-DD" day.
+        
+        Takes the same date key daily_challenge_manager.gd uses when it marks
+        a daily challenge completed.
+        """
+        try:
+            with self._locked():
+                if self.shared or not self._history_primed:
+                    self._sync_history()
+                return self.leaderboards.top_for_day(day, normalize_difficulty(difficulty), count)
+        
+        except Exception as e:
+            print(f"WARNING: Failed to get scores for {day}: {e}")
+            return []
+    
+    def get_percentile(self, score: int, difficulty: str) -> float:
+        """
+        Percentage of all scores ever saved at a difficulty that `score` beats.
+        
+        Covers the full score history, not just the top-10 list. Accurate to
+        within one histogram bucket (about 6% of the score's value).
+        
+        Args:
+            score: Score to rank
+            difficulty: Difficulty level to rank against
+        
+        Returns:
+            Percentage from 0.0 to 100.0
+        """
+        try:
+            if self._log_only:
+                self._refresh_from_log()
+            elif self.shared:
+                with self._locked():
+                    self._load_sketch()
+            return self.sketch.percentile_rank(normalize_difficulty(difficulty), score)
+        
+        except Exception as e:
+            print(f"WARNING: Failed to get percentile: {e}")
+            return 0.0
+    
     def clear_scores(self) -> bool:
-        """Clear all high scores"""
+        """Clear all high scores and the score history"""
         try:
-            self.high_scores = []
-            return self._write_scores_to_file()
+            with self._write_lock():
+                self.high_scores = ()
+                if self.store is not None:
+                    self.store.clear()
+                else:
+                    # A new file (new inode), so other processes notice
+                    # even if more is appended before they next look
+                    self._atomic_write_text(self.history_file, "")
+                self._sync_history()
+                self.sketch = ScoreSketch()
+                if self._log_only:
+                    self._log_offset = 0
+                    self._log_generation = self.history_file.stat().st_ino
+                    self._write_checkpoint()
+                    return True
+                self._write_sketch()
+                return self._write_scores_to_file()
         
         except Exception as e:
             print(f"WARNING: Failed to clear scores: {e}")
@@ -178,27 +560,441 @@ class ScoreManager:
     
     def _write_scores_to_file(self) -> bool:
         """Write scores to persistent storage"""
+        # Binary storage persists records as they are appended to history
+        if self.store is not None:
+            return True
+        
         try:
-            with open(self.scores_file, 'w', encoding='utf-8') as f:
-                json.dump(self.high_scores, f, indent=2, ensure_ascii=False)
+            self._atomic_write_json(self.scores_file, self.high_scores, indent=2)
             return True
         
         except Exception as e:
             print(f"WARNING: Failed to write scores: {e}")
             return False
     
-    def get_top_scores(self, count: int = 5) -> List[Dict]:
+    @classmethod
+    def _atomic_write_json(cls, path: Path, data: Any, indent: Optional[int] = None) -> None:
+        """Write JSON to a temporary file and rename it over `path`.
+        
+        Readers in other processes never see a half-written file.
+        """
+        if indent is None:
+            text = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+        else:
+            text = json.dumps(data, indent=indent, ensure_ascii=False)
+        cls._atomic_write_text(path, text)
+    
+    @staticmethod
+    def _atomic_write_text(path: Path, text: str) -> None:
+        """Write text to a temporary file and rename it over `path`"""
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=path.name, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+    
+    def _append_to_shared_log(self, entries: List[Dict]) -> bool:
+        """
+        Save entries in log-only mode: append them to the history log and nothing else.
+        
+        The top 10 and the sketch catch up when next read, or here once a
+        checkpoint is due.
+        """
+        with self._write_lock():
+            if not self._append_history(entries):
+                return False
+        if time.monotonic() >= self._checkpoint_due:
+            self._refresh_from_log()
+        return True
+    
+    def _current_scores(self) -> Tuple[Dict, ...]:
+        """The high scores snapshot, with other writers' saves folded in first in log-only mode"""
+        if self._log_only:
+            self._refresh_from_log()
+        return self.high_scores
+    
+    def _refresh_from_log(self) -> None:
+        """Fold history appended since the last look into high_scores and the sketch (log-only mode)"""
+        try:
+            try:
+                st = self.history_file.stat()
+                size, generation = st.st_size, st.st_ino
+            except FileNotFoundError:
+                size, generation = 0, None
+            # Nothing new and nothing to checkpoint - one stat() and no lock
+            position = (generation, size)
+            if position == (self._log_generation, self._log_offset) and (
+                    position == self._checkpoint_offset or time.monotonic() < self._checkpoint_due):
+                return
+            
+            with self._locked():
+                # Cleared or replaced, possibly by another process - replay it all
+                if generation != self._log_generation or size < self._log_offset:
+                    self.high_scores = ()
+                    self.sketch = ScoreSketch()
+                    self._log_offset = 0
+                    self._log_generation = generation
+                
+                if size > self._log_offset:
+                    best = heapq.nlargest(self.MAX_HIGH_SCORES, self._read_new_log_entries(),
+                                          key=lambda x: x["score"])
+                    # Earlier entries win ties, as in save_score
+                    merged = heapq.merge(self.high_scores, best, key=lambda x: x["score"], reverse=True)
+                    self.high_scores = tuple(islice(merged, self.MAX_HIGH_SCORES))
+                
+                if time.monotonic() >= self._checkpoint_due:
+                    self._write_checkpoint()
+        
+        except Exception as e:
+            print(f"WARNING: Failed to read score history: {e}")
+    
+    def _read_new_log_entries(self) -> Iterator[Dict]:
+        """Entries from the log past _log_offset, adding each to the sketch as it goes"""
+        with open(self.history_file, 'rb') as f:
+            f.seek(self._log_offset)
+            for line in f:
+                # Stop at a line another process is still writing
+                if not line.endswith(b"\n"):
+                    break
+                self._log_offset += len(line)
+                try:
+                    entry = json.loads(line)
+                    self.sketch.add(entry["difficulty"], int(entry["score"]))
+                except (ValueError, KeyError, TypeError):
+                    continue
+                yield entry
+    
+    def _load_checkpoint(self) -> None:
+        """Start log-only mode from the last checkpoint, creating one if there is none"""
+        self.high_scores = ()
+        self.sketch = ScoreSketch()
+        self._log_offset = 0
+        self._log_generation = None
+        try:
+            with open(self.checkpoint_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            generation, offset = data["history"]
+            high_scores = tuple(data["high_scores"])
+            sketch = ScoreSketch.from_dict(data["sketch"])
+        
+        except FileNotFoundError:
+            self._adopt_existing_files()
+            return
+        
+        except (ValueError, KeyError, TypeError) as e:
+            print(f"WARNING: Score checkpoint unreadable, replaying the history: {e}")
+            return
+        
+        self.high_scores, self.sketch = high_scores, sketch
+        self._log_generation, self._log_offset = generation, offset
+        self._checkpoint_offset = (generation, offset)
+    
+    def _adopt_existing_files(self) -> None:
+        """First log-only start: take high_scores.json and the sketch as the state at the log's current end.
+        
+        Writers that rewrite those files on every save keep them in step
+        with the log, and scores saved before the log existed are only in them.
+        """
+        with self._write_lock():
+            if self.checkpoint_file.exists():
+                # Another process got there first
+                self._load_checkpoint()
+                return
+            if not self.scores_file.exists() and not self.sketch_file.exists():
+                return  # Replay the whole log
+            try:
+                with open(self.scores_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.high_scores = tuple(data) if isinstance(data, list) else ()
+            except (OSError, ValueError):
+                self.high_scores = ()
+            self._load_sketch()
+            try:
+                st = self.history_file.stat()
+                self._log_generation, self._log_offset = st.st_ino, st.st_size
+            except FileNotFoundError:
+                pass
+            self._write_checkpoint()
+    
+    def _write_checkpoint(self) -> None:
+        """Save the log-only state, unless another process already saved a later one"""
+        self._checkpoint_due = time.monotonic() + self.CHECKPOINT_INTERVAL
+        position = (self._log_generation, self._log_offset)
+        if position == self._checkpoint_offset:
+            return
+        try:
+            with self._write_lock():
+                try:
+                    with open(self.checkpoint_file, 'r', encoding='utf-8') as f:
+                        saved = json.load(f)["history"]
+                    if saved[0] == position[0] and saved[1] >= position[1]:
+                        self._checkpoint_offset = position
+                        return
+                except (OSError, ValueError, KeyError, TypeError):
+                    pass
+                
+                self._atomic_write_json(self.checkpoint_file, {
+                    "history": list(position),
+                    "high_scores": self.high_scores,
+                    "sketch": self.sketch.to_dict(),
+                })
+                self._checkpoint_offset = position
+                # Plain copies for readers that don't use the log
+                self._write_sketch()
+                self._write_scores_to_file()
+        
+        except Exception as e:
+            print(f"WARNING: Failed to write score checkpoint: {e}")
+    
+    def _load_sketch(self) -> None:
+        """Load the score sketch if the file changed since it was last read"""
+        try:
+            if self.db is not None:
+                data = self.db.get("scores", "sketch")
+                if data is not None:
+                    self.sketch = ScoreSketch.from_dict(data)
+                return
+            
+            try:
+                st = self.sketch_file.stat()
+            except FileNotFoundError:
+                return
+            
+            stamp = (st.st_mtime_ns, st.st_size)
+            if stamp == self._sketch_stamp:
+                return
+            
+            with open(self.sketch_file, 'r', encoding='utf-8') as f:
+                self.sketch = ScoreSketch.from_dict(json.load(f))
+            self._sketch_stamp = stamp
+        
+        except Exception as e:
+            print(f"WARNING: Failed to load score sketch: {e}")
+    
+    def _rebuild_sketch(self) -> None:
+        """Rebuild the score sketch with one pass over the history log"""
+        sketch = ScoreSketch()
+        for entry in self._iter_history():
+            try:
+                sketch.add(entry["difficulty"], entry["score"])
+            except (KeyError, TypeError):
+                continue
+        self.sketch = sketch
+        self._write_sketch()
+    
+    def _record_in_sketch(self, entries: List[Dict]) -> None:
+        """Add saved entries to the score sketch and persist it"""
+        if self.shared:
+            self._load_sketch()
+        for entry in entries:
+            self.sketch.add(entry["difficulty"], entry["score"])
+        self._write_sketch()
+    
+    def _write_sketch(self) -> None:
+        """Persist the score sketch"""
+        try:
+            if self.db is not None:
+                self.db.put("scores", "sketch", self.sketch.to_dict())
+                return
+            
+            self._atomic_write_json(self.sketch_file, self.sketch.to_dict())
+            st = self.sketch_file.stat()
+            self._sketch_stamp = (st.st_mtime_ns, st.st_size)
+        
+        except Exception as e:
+            print(f"WARNING: Failed to write score sketch: {e}")
+    
+    def _append_history(self, entries: List[Dict]) -> bool:
+        """
+        Append entries to the score history (the store, or the JSONL log).
+        
+        Returns:
+            True if the entries were written, False otherwise
+        """
+        try:
+            if self.store is not None:
+                self.store.append(entries)
+            else:
+                self._append_history_lines(entries)
+        
+        except Exception as e:
+            print(f"WARNING: Failed to append score history: {e}")
+            return False
+        
+        try:
+            if self._history_primed:
+                self._sync_history()
+        
+        except Exception as e:
+            print(f"WARNING: Failed to update leaderboards: {e}")
+        return True
+    
+    def _append_history_lines(self, entries: List[Dict]) -> None:
+        """Append entries to the JSONL history log"""
+        lines = "".join(json.dumps(e, ensure_ascii=False) + "\n" for e in entries)
+        # A single O_APPEND write keeps lines from concurrent writers intact
+        with open(self.history_file, 'a', encoding='utf-8') as f:
+            f.write(lines)
+    
+    def _iter_history(self) -> Iterator[Dict]:
+        """Stream every entry in the score history"""
+        if self.store is not None:
+            yield from self.store.iter_entries()
+            return
+        
+        if not self.history_file.exists():
+            return
+        with open(self.history_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+    
+    def _history_snapshot(self) -> Iterator[Dict]:
+        """
+        The score history as it is now, readable after the lock is released.
+        
+        Call with the lock held. Entries appended later are not included.
+        """
+        if self.store is not None:
+            return self.store.snapshot()
+        
+        try:
+            f = open(self.history_file, 'rb')
+        except FileNotFoundError:
+            return iter(())
+        return self._read_history_lines(f, os.fstat(f.fileno()).st_size)
+    
+    @staticmethod
+    def _read_history_lines(f, size: int) -> Iterator[Dict]:
+        """Parse the first `size` bytes of an open history log, then close it"""
+        with f:
+            for line in f:
+                size -= len(line)
+                if size < 0:
+                    return
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+    
+    def _sync_history(self) -> None:
+        """Feed history written since the last sync to the leaderboards"""
+        self._history_primed = True
+        if self.store is not None:
+            self._sync_binary_history()
+            return
+        
+        try:
+            try:
+                st = self.history_file.stat()
+                size, generation = st.st_size, st.st_ino
+            except FileNotFoundError:
+                size, generation = 0, 0
+            
+            # Log was truncated by clear_scores or replaced (possibly in
+            # another process)
+            if size < self._history_offset or generation != self._history_generation:
+                self.leaderboards.clear()
+                self._history_offset = 0
+                self._history_generation = generation
+            
+            if size == self._history_offset:
+                return
+            
+            with open(self.history_file, 'rb') as f:
+                f.seek(self._history_offset)
+                for line in f:
+                    # Stop at a line another process is still writing
+                    if not line.endswith(b"\n"):
+                        break
+                    self._history_offset += len(line)
+                    try:
+                        self.leaderboards.add(json.loads(line))
+                    except (ValueError, AttributeError):
+                        continue
+        
+        except Exception as e:
+            print(f"WARNING: Failed to read score history: {e}")
+    
+    def _sync_binary_history(self) -> None:
+        """Binary-store variant of _sync_history, tracking records instead of bytes"""
+        try:
+            total = len(self.store)
+            generation = self.store.generation
+            
+            # Compaction reorders records, and clear removes them - start over
+            if generation != self._history_generation or total < self._history_offset:
+                self.leaderboards.clear()
+                self._history_offset = 0
+                self._history_generation = generation
+            
+            for entry in self.store.iter_entries(self._history_offset, total):
+                self.leaderboards.add(entry)
+            self._history_offset = total
+        
+        except Exception as e:
+            print(f"WARNING: Failed to read score history: {e}")
+    
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """Take our lock, after the data store's (see DataStore.lock)"""
+        if self.db is None:
+            with self._lock:
+                yield
+            return
+        with self.db.lock, self._lock:
+            yield
+    
+    @contextmanager
+    def _write_lock(self) -> Iterator[None]:
+        """Serialize a write against other threads and, in shared mode, processes.
+        
+        The process-level part is an exclusive advisory lock, skipped when
+        fcntl is unavailable. It lives on a separate .lock file because the
+        scores file itself is replaced on every write. With storage="sqlite"
+        a database transaction does both jobs, and makes the write a single
+        commit.
+        """
+        if self.db is not None:
+            # Transaction first, then our lock: the order record_game and
+            # ConfigManager use too (see DataStore.lock)
+            with self.db.transaction(), self._lock:
+                yield
+            return
+        
+        with self._lock:
+            # A nested write (a checkpoint during a load) already holds the file lock
+            if not self.shared or not FILE_LOCKING_AVAILABLE or self._file_locked:
+                yield
+                return
+            
+            with open(self.lock_file, 'a') as lock:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+                self._file_locked = True
+                try:
+                    yield
+                finally:
+                    self._file_locked = False
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+    
+    def get_top_scores(self, count: int = 5) -> Tuple[Dict, ...]:
         """Get top N scores"""
         try:
-            return self.high_scores[:min(count, len(self.high_scores))]
+            return self._current_scores()[:max(count, 0)]
         
         except Exception:
-            return []
+            return ()
     
     def get_player_best(self, player_name: str) -> Optional[Dict]:
         """Get best score for a specific player"""
         try:
-            for entry in self.high_scores:
+            for entry in self._current_scores():
                 if entry.get("name", "").lower() == player_name.lower():
                     return entry
             return None
@@ -206,13 +1002,38 @@ class ScoreManager:
         except Exception:
             return None
     
-    def export_scores(self, filepath: str) -> bool:
-        """Export scores to CSV file"""
+    def export_scores(self, filepath: str, full_history: bool = False, fmt: Optional[str] = None,
+                      compress: Optional[bool] = None, difficulty: Optional[str] = None,
+                      start_date: Optional[str] = None, end_date: Optional[str] = None) -> bool:
+        """
+        Export scores to a CSV or JSONL file, optionally gzip-compressed.
+        
+        Rows are filtered and written as the source is scanned, so memory
+        stays constant however large the history is.
+        
+        Args:
+            filepath: Output path; .csv / .jsonl, with an optional .gz suffix
+            full_history: Export every saved score in save order instead of
+                          the ranked high scores list
+            fmt: "csv" or "jsonl" (default: from the file suffix)
+            compress: gzip the output (default: from a .gz suffix)
+            difficulty: Only export this difficulty
+            start_date: Only export scores on or after this "YYYY-MM-DD" day
+            end_date: Only export scores on or before this "YYYY-MM-DD" day
+        
+        Returns:
+            True if exported successfully
+        """
         try:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write("Rank,Player,Score,Difficulty,Date\n")
-                for i, entry in enumerate(self.high_scores, 1):
-                    f.write(f"{i},{entry.get('name','Unknown')},{entry.get('score',0)},{entry.get('difficulty','')},{entry.get('date','')}\n")
+            options = dict(fmt=fmt, compress=compress, difficulty=normalize_difficulty(difficulty),
+                           start_date=start_date, end_date=end_date)
+            if full_history:
+                # Pin down what to export under the lock, then stream it without blocking writers
+                with self._locked():
+                    entries = self._history_snapshot()
+                export_entries(entries, filepath, **options)
+            else:
+                export_entries(self._current_scores(), filepath, ranked=True, **options)
             return True
         
         except Exception as e:
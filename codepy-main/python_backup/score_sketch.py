@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+MathBlat Score Sketch - Python Backup
+Bounded-memory score distributions for percentile ranks.
+
+Rather than keeping every score ever saved, each difficulty keeps a
+log-linear histogram: scores below 16 get exact buckets, and every power of
+two above that is split into 16 buckets, so a bucket is never wider than
+1/16 of its values. Memory stays at a few hundred counters no matter how
+many scores are recorded.
+
+Usage:
+    from score_sketch import ScoreSketch
+    sketch = ScoreSketch()
+    sketch.add("MEDIUM", 120)
+    beaten = sketch.percentile_rank("MEDIUM", 120)  # % of scores below 120
+"""
+
+from typing import Dict, List, Optional
+
+# Buckets per power of two (and exact buckets below this value)
+SUB_BUCKETS = 16
+# log2(SUB_BUCKETS) + 1, the bit length of the first log-spaced value
+_SHIFT_BASE = SUB_BUCKETS.bit_length()
+
+
+def bucket_index(score: int) -> int:
+    """Histogram bucket for a score (negative scores count as 0)"""
+    if score < SUB_BUCKETS:
+        return max(score, 0)
+    shift = score.bit_length() - _SHIFT_BASE
+    return shift * SUB_BUCKETS + (score >> shift)
+
+
+def bucket_lower_bound(index: int) -> int:
+    """Smallest score that falls in a bucket"""
+    if index < 2 * SUB_BUCKETS:
+        return index
+    shift = index // SUB_BUCKETS - 1
+    return (index - shift * SUB_BUCKETS) << shift
+
+
+class ScoreHistogram:
+    """Log-linear histogram of one difficulty's scores.
+
+    Prefix sums are rebuilt lazily after writes, so percentile queries cost
+    a couple of list lookups however long the score history is.
+    """
+
+    def __init__(self):
+        self.counts: List[int] = []
+        self.total = 0
+        self._below: Optional[List[int]] = None
+
+    def add(self, score: int, count: int = 1) -> None:
+        """Record `count` occurrences of a score"""
+        index = bucket_index(int(score))
+        if index >= len(self.counts):
+            self.counts.extend([0] * (index + 1 - len(self.counts)))
+        self.counts[index] += count
+        self.total += count
+        self._below = None
+
+    def percentile_rank(self, score: int) -> float:
+        """
+        Percentage of recorded scores below `score`.
+
+        Scores sharing the query's bucket count as half below, half above.
+
+        Returns:
+            Value from 0.0 to 100.0 (0.0 if nothing recorded)
+        """
+        if not self.total:
+            return 0.0
+        below = self._prefix_sums()
+        index = bucket_index(int(score))
+        if index >= len(self.counts):
+            return 100.0
+        return 100.0 * (below[index] + self.counts[index] / 2) / self.total
+
+    def quantile(self, q: float) -> int:
+        """Approximate score at quantile q (0.0 - 1.0)"""
+        if not self.total:
+            return 0
+        target = min(max(q, 0.0), 1.0) * self.total
+        below = self._prefix_sums()
+        for index, count in enumerate(self.counts):
+            if count and below[index] + count >= target:
+                return bucket_lower_bound(index)
+        return bucket_lower_bound(len(self.counts) - 1)
+
+    def to_dict(self) -> Dict:
+        """Compact serializable form: sparse [bucket, count] pairs"""
+        return {
+            "total": self.total,
+            "buckets": [[i, c] for i, c in enumerate(self.counts) if c],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ScoreHistogram":
+        """Rebuild a histogram from to_dict() output"""
+        histogram = cls()
+        for index, count in data.get("buckets", []):
+            if index >= len(histogram.counts):
+                histogram.counts.extend([0] * (index + 1 - len(histogram.counts)))
+            histogram.counts[index] += int(count)
+        histogram.total = sum(histogram.counts)
+        return histogram
+
+    def _prefix_sums(self) -> List[int]:
+        """Number of scores in buckets strictly below each bucket"""
+        if self._below is None:
+            below = []
+            running = 0
+            for count in self.counts:
+                below.append(running)
+                running += count
+            self._below = below
+        return self._below
+
+
+class ScoreSketch:
+    """One ScoreHistogram per difficulty"""
+
+    def __init__(self):
+        self.histograms: Dict[str, ScoreHistogram] = {}
+
+    def add(self, difficulty: str, score: int) -> None:
+        """Record a score for a difficulty"""
+        self.histograms.setdefault(difficulty, ScoreHistogram()).add(score)
+
+    def percentile_rank(self, difficulty: str, score: int) -> float:
+        """Percentage of a difficulty's recorded scores below `score`"""
+        histogram = self.histograms.get(difficulty)
+        return histogram.percentile_rank(score) if histogram else 0.0
+
+    def total(self, difficulty: Optional[str] = None) -> int:
+        """Number of scores recorded, for one difficulty or all"""
+        if difficulty:
+            histogram = self.histograms.get(difficulty)
+            return histogram.total if histogram else 0
+        return sum(h.total for h in self.histograms.values())
+
+    def to_dict(self) -> Dict:
+        return {d: h.to_dict() for d, h in self.histograms.items()}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "ScoreSketch":
+        sketch = cls()
+        for difficulty, histogram in data.items():
+            if isinstance(histogram, dict):
+                sketch.histograms[difficulty] = ScoreHistogram.from_dict(histogram)
+        return sketch
+
+
+if __name__ == "__main__":
+    import random
+
+    print("=== MathBlat Score Sketch (Python Backup) ===\n")
+
+    sketch = ScoreSketch()
+    scores = [int(random.gauss(200, 60)) for _ in range(100000)]
+    for s in scores:
+        sketch.add("MEDIUM", s)
+
+    scores.sort()
+    for probe in (100, 200, 300):
+        exact = 100.0 * sum(1 for s in scores if s < probe) / len(scores)
+        print(f"Score {probe}: beats {sketch.percentile_rank('MEDIUM', probe):.1f}% (exact {exact:.1f}%)")
+    print(f"Buckets used: {len(sketch.histograms['MEDIUM'].counts)}")
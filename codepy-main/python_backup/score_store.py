@@ -0,0 +1,502 @@
+#!/usr/bin/env python3
+"""
+MathBlat Binary Score Store - Python Backup
+Fixed-size binary score records accessed through mmap.
+
+Opening a store reads a 32 byte header, never the whole file, and top-N
+reads walk the records from the front of the file, so they only touch the
+pages they return. Player names are interned into a separate name table
+(one JSON string per line) and records carry the name's line number.
+Difficulties outside DIFFICULTY_CODES are interned the same way, into a
+.difficulties table, and get codes from CUSTOM_DIFFICULTY_BASE up.
+
+File layout:
+    header   magic, version, sorted record count, generation
+    sorted   records ordered by score descending
+    tail     records appended since the last compaction, in arrival order
+
+When the tail grows past COMPACT_THRESHOLD records it is merged into the
+sorted section and the generation number is bumped, so readers holding a
+record offset know to start over.
+
+Usage:
+    from score_store import BinaryScoreStore, json_to_binary
+    store = BinaryScoreStore("~/.mathblat/score_history.bin")
+    store.append([{"name": "Alice", "score": 150, "difficulty": "HARD",
+                   "date": "2026-01-20 14:03:00"}])
+    best = store.top(10)
+"""
+
+import heapq
+import json
+import mmap
+import os
+import struct
+from datetime import datetime
+from itertools import islice
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from score_export import export_entries
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# magic, version, reserved, sorted record count, generation (padded to 32)
+HEADER = struct.Struct("<4sHHQQ8x")
+MAGIC = b"MBSC"
+VERSION = 1
+# score, difficulty code, timestamp (epoch seconds), player id
+RECORD = struct.Struct("<iB3xqI")
+# Scores must fit the record's signed 32-bit field
+MIN_SCORE = -(1 << 31)
+MAX_SCORE = (1 << 31) - 1
+
+# Difficulty codes - EASY/MEDIUM/HARD match the Tkinter game's enum values
+DIFFICULTY_CODES = {
+    "EASY": 1,
+    "MEDIUM": 2,
+    "HARD": 3,
+    "FOUNDATIONAL": 4,
+    "INTERMEDIATE": 5,
+    "ADVANCED": 6,
+    "MASTERY": 7,
+}
+DIFFICULTY_NAMES = {code: name for name, code in DIFFICULTY_CODES.items()}
+# First code for difficulties interned into a store's .difficulties table
+CUSTOM_DIFFICULTY_BASE = 128
+
+
+def normalize_difficulty(difficulty: Any) -> str:
+    """Canonical spelling of a difficulty name ("medium " -> "MEDIUM")"""
+    return str(difficulty if difficulty is not None else "").strip().upper()
+
+
+def _unpack(view: mmap.mmap, start: int, stop: int, chunk_size: int = 256) -> Iterator[Tuple[int, int, int, int]]:
+    """Lazily unpack records [start, stop) of a mapped file a chunk at a time"""
+    stop = min(stop, (len(view) - HEADER.size) // RECORD.size)
+    for chunk_start in range(start, stop, chunk_size):
+        chunk_stop = min(chunk_start + chunk_size, stop)
+        offset = HEADER.size + chunk_start * RECORD.size
+        yield from RECORD.iter_unpack(view[offset:HEADER.size + chunk_stop * RECORD.size])
+
+
+class _StringTable:
+    """Append-only table of strings, one JSON string per line.
+
+    A string's id is its line number. Other processes may append to the
+    same file, so lookups that miss re-read any lines added since.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._strings: Optional[List[str]] = None
+        self._ids: Dict[str, int] = {}
+
+    def load(self) -> List[str]:
+        """Read entries added since the last load"""
+        if self._strings is None:
+            self._strings = []
+            self._ids = {}
+        if self.path.exists():
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in islice(f, len(self._strings), None):
+                    value = json.loads(line)
+                    self._ids[value] = len(self._strings)
+                    self._strings.append(value)
+        return self._strings
+
+    def find(self, value: str) -> Optional[int]:
+        """Id of a string already in the table, or None"""
+        if self._strings is None or value not in self._ids:
+            # Another process may have added it since we loaded
+            self.load()
+        return self._ids.get(value)
+
+    def intern(self, value: str) -> int:
+        """Id of a string, adding it to the table if new"""
+        string_id = self.find(value)
+        if string_id is None:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(value, ensure_ascii=False) + "\n")
+            string_id = self._ids[value] = len(self._strings)
+            self._strings.append(value)
+        return string_id
+
+    def get(self, string_id: int) -> Optional[str]:
+        """String for an id, or None if the id is not in the table"""
+        strings = self._strings if self._strings is not None else self.load()
+        if string_id >= len(strings):
+            strings = self.load()
+        return strings[string_id] if string_id < len(strings) else None
+
+    def clear(self) -> None:
+        """Empty the table"""
+        open(self.path, 'w').close()
+        self._strings = None
+        self._ids = {}
+
+
+def _sort_key(record: Tuple[int, int, int, int]) -> int:
+    """Sort key putting higher scores first"""
+    return -record[0]
+
+
+class BinaryScoreStore:
+    """Append-friendly, mmap-backed store of fixed-size score records.
+
+    Not safe for concurrent writers on its own - ScoreManager serialises
+    writes with its shared-mode file lock.
+    """
+
+    # Tail records that trigger merging the tail into the sorted section
+    COMPACT_THRESHOLD = 4096
+
+    def __init__(self, path: Union[str, Path]):
+        """Open a store, creating an empty one if needed.
+
+        Args:
+            path: Records file. The name and custom difficulty tables
+                  live next to it with .names and .difficulties suffixes.
+        """
+        self.path = Path(path).expanduser()
+        self.names_path = self.path.with_name(self.path.name + ".names")
+        self.difficulties_path = self.path.with_name(self.path.name + ".difficulties")
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        self._file = None
+        self._map: Optional[mmap.mmap] = None
+        self._mapped_size = 0
+        # String tables, loaded on first use
+        self._names = _StringTable(self.names_path)
+        self._difficulties = _StringTable(self.difficulties_path)
+
+        if not self.path.exists() or self.path.stat().st_size < HEADER.size:
+            self._write_file([], generation=0)
+
+    # ------------------------------------------------------------------
+    # Reading
+
+    def __len__(self) -> int:
+        return (self.path.stat().st_size - HEADER.size) // RECORD.size
+
+    @property
+    def generation(self) -> int:
+        """Compaction counter - record offsets are only valid within one generation"""
+        return self._header()[1]
+
+    def top(self, count: int = 10, difficulty: Optional[str] = None) -> List[Dict]:
+        """
+        Get the highest scores without reading the whole store.
+
+        Args:
+            count: Maximum number of entries
+            difficulty: Optional difficulty filter
+
+        Returns:
+            List of score entries, best first
+        """
+        sorted_count, _ = self._header()
+        total = len(self)
+        sorted_part = self._scan(0, sorted_count)
+        tail = sorted(self._scan(sorted_count, total), key=_sort_key)
+        records = heapq.merge(sorted_part, tail, key=_sort_key)
+        if difficulty:
+            code = self._difficulty_code(difficulty, create=False)
+            if code is None:
+                return []
+            records = (r for r in records if r[1] == code)
+        return [self._to_entry(r) for r in islice(records, count)]
+
+    def iter_entries(self, start: int = 0, stop: Optional[int] = None,
+                     chunk_size: int = 4096) -> Iterator[Dict]:
+        """
+        Stream entries in file order, from record `start` up to `stop`.
+
+        Reads `chunk_size` records at a time, so memory stays constant.
+        """
+        stop = len(self) if stop is None else stop
+        for record in self._scan(start, stop, chunk_size):
+            yield self._to_entry(record)
+
+    def snapshot(self) -> Iterator[Dict]:
+        """
+        Stream every entry in file order as of this call.
+
+        The file is mapped separately straight away, so the entries can be
+        read later, without holding any lock, while records are appended or
+        the store is compacted or cleared.
+        """
+        with open(self.path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size <= HEADER.size:
+                return iter(())
+            view = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._iter_view(view)
+
+    def _iter_view(self, view: mmap.mmap) -> Iterator[Dict]:
+        """Entries from a private map, closing it when done"""
+        try:
+            for record in _unpack(view, 0, len(view)):
+                yield self._to_entry(record)
+        finally:
+            view.close()
+
+    def iter_sorted(self) -> Iterator[Dict]:
+        """Stream every entry, best score first (holds the tail in memory)"""
+        sorted_count, _ = self._header()
+        tail = sorted(self._scan(sorted_count, len(self)), key=_sort_key)
+        for record in heapq.merge(self._scan(0, sorted_count), tail, key=_sort_key):
+            yield self._to_entry(record)
+
+    # ------------------------------------------------------------------
+    # Writing
+
+    def append(self, entries: Iterable[Dict]) -> int:
+        """
+        Append score entries to the tail.
+
+        Every entry is validated before any name or difficulty is added to
+        the string tables, so an entry that can't be stored leaves the store
+        untouched. (If the record write itself fails, names it interned stay
+        in the tables, unused.) A partial record left at the end of the file
+        by a crashed append is cut off first, so it can't misalign the
+        records written after it.
+
+        Returns:
+            Number of records written
+
+        Raises:
+            ValueError: If a score does not fit in a record, or there are
+                        too many custom difficulties
+        """
+        parsed = [self._parse_entry(entry) for entry in entries]
+        if not parsed:
+            return 0
+        new_difficulties = {d for _, d, _, _ in parsed
+                            if d and d not in DIFFICULTY_CODES and self._difficulties.find(d) is None}
+        if CUSTOM_DIFFICULTY_BASE + len(self._difficulties.load()) + len(new_difficulties) > 0x100:
+            raise ValueError(f"Too many custom difficulties to store {len(new_difficulties)} more")
+
+        data = b"".join(RECORD.pack(*self._to_record(fields)) for fields in parsed)
+        with open(self.path, 'r+b') as f:
+            size = f.seek(0, os.SEEK_END)
+            whole = HEADER.size + (size - HEADER.size) // RECORD.size * RECORD.size
+            if whole != size:
+                f.truncate(whole)
+                f.seek(whole)
+            f.write(data)
+        sorted_count, _ = self._header()
+        if len(self) - sorted_count > self.COMPACT_THRESHOLD:
+            self.compact()
+        return len(parsed)
+
+    def compact(self) -> None:
+        """Merge the tail into the sorted section and bump the generation"""
+        sorted_count, generation = self._header()
+        tail = sorted(self._scan(sorted_count, len(self)), key=_sort_key)
+        merged = heapq.merge(self._scan(0, sorted_count), tail, key=_sort_key)
+        self._write_file(merged, generation + 1)
+
+    def clear(self) -> None:
+        """Remove every record, name and custom difficulty"""
+        _, generation = self._header()
+        self._write_file([], generation + 1)
+        self._names.clear()
+        self._difficulties.clear()
+
+    def close(self) -> None:
+        """Release the memory map"""
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._mapped_size = 0
+
+    # ------------------------------------------------------------------
+    # Conversion and export
+
+    def export_scores(self, filepath: str, **options) -> bool:
+        """Export every score in rank order, streaming (see score_export.export_entries)"""
+        try:
+            export_entries(self.iter_sorted(), filepath, ranked=True, **options)
+            return True
+
+        except Exception as e:
+            print(f"WARNING: Failed to export scores: {e}")
+            return False
+
+    # ------------------------------------------------------------------
+    # Internals
+
+    def _header(self) -> Tuple[int, int]:
+        """(sorted record count, generation) read straight from the file"""
+        with open(self.path, 'rb') as f:
+            magic, version, _, sorted_count, generation = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path} is not a version {VERSION} score store")
+        return sorted_count, generation
+
+    def _mapped(self) -> Optional[mmap.mmap]:
+        """Memory map covering the whole file, remapped when it grows"""
+        size = self.path.stat().st_size
+        if self._map is None or size != self._mapped_size or self._file_replaced():
+            self.close()
+            if size <= HEADER.size:
+                return None
+            self._file = open(self.path, 'rb')
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapped_size = size
+        return self._map
+
+    def _file_replaced(self) -> bool:
+        """True if compaction swapped in a new file since it was mapped"""
+        try:
+            return os.fstat(self._file.fileno()).st_ino != self.path.stat().st_ino
+        except (OSError, AttributeError):
+            return True
+
+    def _scan(self, start: int, stop: int, chunk_size: int = 256) -> Iterator[Tuple[int, int, int, int]]:
+        """Lazily unpack records [start, stop) a chunk at a time"""
+        view = self._mapped()
+        if view is None:
+            return
+        yield from _unpack(view, start, stop, chunk_size)
+
+    def _write_file(self, records: Iterable[Tuple[int, int, int, int]], generation: int) -> None:
+        """Write a fully sorted file atomically"""
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        count = 0
+        with open(tmp_path, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, VERSION, 0, 0, generation))
+            for record in records:
+                f.write(RECORD.pack(*record))
+                count += 1
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, VERSION, 0, count, generation))
+        self.close()
+        os.replace(tmp_path, self.path)
+
+    def _name(self, player_id: int) -> str:
+        name = self._names.get(player_id)
+        return name if name is not None else "Unknown"
+
+    def _difficulty_code(self, difficulty: Any, create: bool = True) -> Optional[int]:
+        """Record code for a difficulty, interning unknown ones if `create`"""
+        difficulty = normalize_difficulty(difficulty)
+        if difficulty in DIFFICULTY_CODES:
+            return DIFFICULTY_CODES[difficulty]
+        if not difficulty:
+            return 0
+        string_id = self._difficulties.intern(difficulty) if create else self._difficulties.find(difficulty)
+        if string_id is None:
+            return None
+        if CUSTOM_DIFFICULTY_BASE + string_id > 0xFF:
+            raise ValueError(f"Too many custom difficulties to store {difficulty!r}")
+        return CUSTOM_DIFFICULTY_BASE + string_id
+
+    def _difficulty(self, code: int) -> str:
+        if code >= CUSTOM_DIFFICULTY_BASE:
+            return self._difficulties.get(code - CUSTOM_DIFFICULTY_BASE) or ""
+        return DIFFICULTY_NAMES.get(code, "")
+
+    @staticmethod
+    def _parse_entry(entry: Dict) -> Tuple[int, str, int, str]:
+        """(score, difficulty, timestamp, name) of an entry, checked to fit a record"""
+        try:
+            timestamp = int(datetime.strptime(entry.get("date", ""), DATE_FORMAT).timestamp())
+        except (TypeError, ValueError):
+            timestamp = int(datetime.now().timestamp())
+        score = int(entry.get("score", 0))
+        if not MIN_SCORE <= score <= MAX_SCORE:
+            raise ValueError(f"Score {score} does not fit in a 32-bit record")
+        return (score, normalize_difficulty(entry.get("difficulty", "")), timestamp,
+                str(entry.get("name", "Unknown"))[:50])
+
+    def _to_record(self, fields: Tuple[int, str, int, str]) -> Tuple[int, int, int, int]:
+        score, difficulty, timestamp, name = fields
+        return (score, self._difficulty_code(difficulty), timestamp, self._names.intern(name))
+
+    def _to_entry(self, record: Tuple[int, int, int, int]) -> Dict:
+        score, code, timestamp, player_id = record
+        return {
+            "name": self._name(player_id),
+            "score": score,
+            "difficulty": self._difficulty(code),
+            "date": datetime.fromtimestamp(timestamp).strftime(DATE_FORMAT),
+        }
+
+
+def json_to_binary(json_path: Union[str, Path], store_path: Union[str, Path]) -> int:
+    """
+    Convert a high_scores.json list or a score_history.jsonl log to a binary store.
+
+    Returns:
+        Number of records written
+    """
+    json_path = Path(json_path)
+    store = BinaryScoreStore(store_path)
+    with open(json_path, 'r', encoding='utf-8') as f:
+        if json_path.suffix.lower() == ".jsonl":
+            entries = (json.loads(line) for line in f if line.strip())
+            written = store.append(entries)
+        else:
+            written = store.append(json.load(f))
+    store.compact()
+    store.close()
+    return written
+
+
+def binary_to_json(store_path: Union[str, Path], json_path: Union[str, Path]) -> int:
+    """
+    Convert a binary store back to JSON.
+
+    Writes a JSONL log (one entry per line, streamed) for a .jsonl path,
+    otherwise a high_scores.json style list in rank order.
+
+    Returns:
+        Number of entries written
+    """
+    json_path = Path(json_path)
+    store = BinaryScoreStore(store_path)
+    written = 0
+    with open(json_path, 'w', encoding='utf-8') as f:
+        if json_path.suffix.lower() == ".jsonl":
+            for entry in store.iter_entries():
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                written += 1
+        else:
+            entries = list(store.iter_sorted())
+            json.dump(entries, f, indent=2, ensure_ascii=False)
+            written = len(entries)
+    store.close()
+    return written
+
+
+if __name__ == "__main__":
+    import random
+    import tempfile
+    import time
+
+    print("=== MathBlat Binary Score Store (Python Backup) ===\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = BinaryScoreStore(Path(tmp) / "scores.bin")
+        now = datetime.now().strftime(DATE_FORMAT)
+        started = time.perf_counter()
+        for _ in range(100):
+            store.append(
+                {"name": f"Player{random.randint(1, 500)}", "score": random.randint(0, 5000),
+                 "difficulty": random.choice(["EASY", "MEDIUM", "HARD"]), "date": now}
+                for _ in range(1000)
+            )
+        print(f"Appended {len(store)} records in {time.perf_counter() - started:.2f}s")
+
+        started = time.perf_counter()
+        reopened = BinaryScoreStore(Path(tmp) / "scores.bin")
+        best = reopened.top(5)
+        print(f"Reopened and read top 5 in {(time.perf_counter() - started) * 1000:.1f}ms")
+        for i, entry in enumerate(best, 1):
+            print(f"{i}. {entry['name']}: {entry['score']} ({entry['difficulty']})")
+        reopened.close()
+        store.close()
@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+MathBlat Spectator Hub - Python Backup
+Live, read-only fan-out of every duel on the match server.
+
+A teacher's projector connects to the match server like a player but sends
+WATCH instead of HELLO. From then on it receives an EVENT frame for every
+round state change in every room. Each event is encoded once, and the
+events published during one pass of the event loop are joined and queued
+for every spectator as one write.
+
+Spectators must never slow the players down, so nothing here waits on a
+spectator's socket. Each spectator's queued output is bounded:
+
+- while it holds more than HIGH_WATER bytes, events are skipped for that
+  spectator and it is marked lagging;
+- once it drains below LOW_WATER it gets one "snapshot" event with the
+  current state of every room (the skipped events coalesced), then
+  the live stream again;
+- a spectator still lagging after MAX_LAG seconds is disconnected.
+
+Events (the EVENT payload; "seq" counts events, so gaps show skipped ones):
+    snapshot  {"rooms": [room state, ...]}  on WATCH and after lagging
+    match     {"room", "players", "difficulty", "rounds"}
+    problem   {"room", "round", "problem", "options", "time"}
+    answered  {"room", "round", "player"}   a player locked in an answer
+    result    {"room", "round", "correct_answer", "winner", "scores", "reaction_ms"}
+    end       {"room", "reason", "scores"}
+
+Players are referred to by index into the room's "players" list.
+
+Usage:
+    hub = SpectatorHub()
+    spectator = hub.subscribe(writer)                  # on WATCH
+    hub.publish("problem", room_id, round=1, problem="7 * 6 = ?", ...)
+    hub.unsubscribe(spectator)
+
+    python3 spectator_hub.py watch 127.0.0.1:12345     # text projector view
+"""
+
+import argparse
+import asyncio
+import socket
+import time
+from typing import Dict, List, Optional, Set
+
+from net_protocol import FrameReader, MessageType, ProtocolError, encode_message, send_message
+
+
+class Spectator:
+    """One read-only subscriber"""
+
+    __slots__ = ("writer", "address", "lagging_since", "closed", "sent", "skipped")
+
+    def __init__(self, writer: asyncio.StreamWriter, address=None):
+        self.writer = writer
+        self.address = address
+        self.lagging_since: Optional[float] = None
+        self.closed = False
+        self.sent = 0
+        self.skipped = 0
+
+    def buffered(self) -> int:
+        """Bytes queued in the transport and not yet taken by the OS"""
+        return self.writer.transport.get_write_buffer_size()
+
+    def close(self) -> None:
+        if not self.closed:
+            self.closed = True
+            if self.lagging_since is not None:
+                # A graceful close would wait for it to read the backlog
+                self.writer.transport.abort()
+            else:
+                self.writer.close()
+
+
+class SpectatorHub:
+    """Current state of every room, and the spectators watching them.
+
+    Runs on the match server's event loop; no locks.
+    """
+
+    # Queued bytes per spectator above which its events are skipped
+    HIGH_WATER = 64 * 1024
+    # ...and below which it is resynced with a snapshot
+    LOW_WATER = 16 * 1024
+    # Seconds a spectator may stay backed up before it is disconnected
+    MAX_LAG = 10.0
+
+    def __init__(self, high_water: int = HIGH_WATER, low_water: int = LOW_WATER, max_lag: float = MAX_LAG):
+        """
+        Args:
+            high_water: Per-spectator bound on queued output, bytes
+            low_water: Queued bytes at which a lagging spectator is resynced
+            max_lag: Seconds before a spectator that stays behind is dropped
+        """
+        self.high_water = high_water
+        self.low_water = low_water
+        self.max_lag = max_lag
+        self.spectators: Set[Spectator] = set()
+        self.rooms: Dict[int, Dict] = {}
+        self.seq = 0
+        self.events = 0
+        self.frames_sent = 0
+        self.frames_skipped = 0
+        self.snapshots = 0
+        self.dropped = 0
+        self.batches = 0
+        self._pending: List[bytes] = []
+
+    def subscribe(self, writer: asyncio.StreamWriter, address=None) -> Spectator:
+        """Start streaming to a connection, beginning with a snapshot"""
+        # Events already in the snapshot must not follow it
+        self.flush()
+        spectator = Spectator(writer, address)
+        self.spectators.add(spectator)
+        spectator.writer.write(self.snapshot_frame())
+        self.snapshots += 1
+        return spectator
+
+    def unsubscribe(self, spectator: Spectator) -> None:
+        self.spectators.discard(spectator)
+        spectator.close()
+
+    def close(self) -> None:
+        """Disconnect every spectator"""
+        for spectator in list(self.spectators):
+            self.unsubscribe(spectator)
+
+    def snapshot_frame(self) -> bytes:
+        """Every room's current state as one event, cut down to fit in a frame if need be"""
+        rooms = list(self.rooms.values())
+        while True:
+            try:
+                return encode_message(MessageType.EVENT, {"event": "snapshot", "seq": self.seq, "rooms": rooms,
+                                                          "truncated": len(rooms) < len(self.rooms)})
+            except ProtocolError:
+                rooms = rooms[:len(rooms) // 2]
+
+    def publish(self, event: str, room_id: int, **fields) -> None:
+        """
+        Apply one round state change and send it to every spectator.
+
+        The frame goes out with everything else published before the event
+        loop's next pass (immediately when called outside an event loop).
+
+        Args:
+            event: Event name (see the module docstring)
+            room_id: Room it happened in
+            fields: Event fields
+        """
+        self._apply(event, room_id, fields)
+        self.seq += 1
+        self.events += 1
+        if not self.spectators:
+            return
+        payload = {"event": event, "seq": self.seq, "room": room_id}
+        payload.update(fields)
+        self._pending.append(encode_message(MessageType.EVENT, payload))
+        if len(self._pending) == 1:
+            try:
+                asyncio.get_running_loop().call_soon(self.flush)
+            except RuntimeError:
+                self.flush()
+
+    def flush(self) -> None:
+        """Send the pending events to every spectator that keeps up"""
+        if not self._pending:
+            return
+        frame = b"".join(self._pending)
+        count = len(self._pending)
+        self._pending = []
+        self.batches += 1
+        snapshot = None
+        now = time.monotonic()
+        for spectator in list(self.spectators):
+            if spectator.closed:
+                self.spectators.discard(spectator)
+                continue
+            buffered = spectator.buffered()
+            if spectator.lagging_since is not None:
+                if buffered <= self.low_water:
+                    # Everything it missed, as current state; encoded once for all resyncing
+                    if snapshot is None:
+                        snapshot = self.snapshot_frame()
+                    spectator.writer.write(snapshot)
+                    spectator.lagging_since = None
+                    self.snapshots += 1
+                elif now - spectator.lagging_since > self.max_lag:
+                    print(f"WARNING: Dropping spectator {spectator.address}: not reading")
+                    self.unsubscribe(spectator)
+                    self.dropped += 1
+                else:
+                    spectator.skipped += count
+                    self.frames_skipped += count
+                continue
+            if buffered + len(frame) > self.high_water:
+                spectator.lagging_since = now
+                spectator.skipped += count
+                self.frames_skipped += count
+                continue
+            spectator.writer.write(frame)
+            spectator.sent += count
+            self.frames_sent += count
+
+    def forget(self, room_id: int) -> None:
+        """A room closed without an "end" event (server shutdown)"""
+        state = self.rooms.get(room_id)
+        if state is not None:
+            self.publish("end", room_id, reason="aborted", scores=state["scores"])
+
+    def _apply(self, event: str, room_id: int, fields: Dict) -> None:
+        """Fold an event into the room's coalesced state, used for snapshots"""
+        if event == "match":
+            self.rooms[room_id] = {"room": room_id, "players": fields["players"],
+                                   "difficulty": fields.get("difficulty"), "rounds": fields.get("rounds"),
+                                   "scores": [0] * len(fields["players"]), "round": 0, "problem": None,
+                                   "options": None, "answered": [], "last_result": None}
+            return
+        state = self.rooms.get(room_id)
+        if state is None:
+            return
+        if event == "problem":
+            state.update(round=fields["round"], problem=fields.get("problem"), options=fields.get("options"),
+                         answered=[])
+        elif event == "answered":
+            state["answered"] = state["answered"] + [fields["player"]]
+        elif event == "result":
+            state["scores"] = fields["scores"]
+            state["last_result"] = {"round": fields["round"], "correct_answer": fields.get("correct_answer"),
+                                    "winner": fields.get("winner")}
+        elif event == "end":
+            del self.rooms[room_id]
+
+    def stats(self) -> Dict:
+        return {
+            "spectators": len(self.spectators),
+            "lagging": sum(1 for s in self.spectators if s.lagging_since is not None),
+            "events": self.events,
+            "frames_sent": self.frames_sent,
+            "frames_skipped": self.frames_skipped,
+            "snapshots": self.snapshots,
+            "dropped": self.dropped,
+            "batches": self.batches,
+        }
+
+
+def format_event(event: Dict, names: Dict[int, list]) -> Optional[str]:
+    """One line of text for a projector view; `names` tracks each room's players"""
+    kind = event.get("event")
+    room = event.get("room")
+    if kind == "snapshot":
+        names.clear()
+        for state in event["rooms"]:
+            names[state["room"]] = state["players"]
+        return f"{len(event['rooms'])} duels in progress"
+    players = names.get(room, [])
+
+    def name(index):
+        return players[index] if index is not None and index < len(players) else "nobody"
+
+    if kind == "match":
+        names[room] = event["players"]
+        return f"[{room}] {' vs '.join(event['players'])} ({event['difficulty']})"
+    if kind == "problem":
+        return f"[{room}] round {event['round']}: {event['problem']}  {event['options']}"
+    if kind == "answered":
+        return f"[{room}]   {name(event['player'])} answered"
+    if kind == "result":
+        return (f"[{room}]   {event['correct_answer']} - won by {name(event['winner'])}, "
+                f"scores {event['scores']}")
+    if kind == "end":
+        names.pop(room, None)
+        return f"[{room}] {' vs '.join(players)}: {event['reason']}, final {event['scores']}"
+    return None
+
+
+def watch(host: str, port: int) -> None:
+    """Print every event from a match server until it disconnects"""
+    sock = socket.create_connection((host, port))
+    send_message(sock, MessageType.WATCH)
+    reader = FrameReader()
+    names: Dict[int, list] = {}
+    last_seq = None
+    try:
+        while True:
+            for msg_type, payload in reader.read_from(sock):
+                if msg_type != MessageType.EVENT:
+                    continue
+                seq = payload.get("seq")
+                if last_seq is not None and payload.get("event") != "snapshot" and seq != last_seq + 1:
+                    print(f"(skipped {seq - last_seq - 1} events)")
+                last_seq = seq
+                line = format_event(payload, names)
+                if line:
+                    print(line)
+    except (ConnectionError, KeyboardInterrupt):
+        pass
+    finally:
+        sock.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MathBlat match server spectator view")
+    sub = parser.add_subparsers(dest="command")
+    watch_parser = sub.add_parser("watch", help="Print live events from a match server")
+    watch_parser.add_argument("server", help="HOST:PORT")
+    args = parser.parse_args()
+
+    if args.command == "watch":
+        host, _, port = args.server.rpartition(":")
+        watch(host or "127.0.0.1", int(port))
+    else:
+        print("=== MathBlat Spectator Hub (Python Backup) ===\n")
+
+        class DemoTransport:
+            def __init__(self, stuck):
+                self.stuck = stuck
+                self.queued = 0
+
+            def get_write_buffer_size(self):
+                return self.queued
+
+        class DemoWriter:
+            """Counts bytes; a reading spectator's buffer empties instantly"""
+            def __init__(self, stuck=False):
+                self.transport = DemoTransport(stuck)
+                self.received = 0
+
+            def write(self, data):
+                self.received += len(data)
+                if self.transport.stuck:
+                    self.transport.queued += len(data)
+
+            def close(self):
+                pass
+
+        hub = SpectatorHub()
+        fast = [hub.subscribe(DemoWriter(), f"projector{i}") for i in range(50)]
+        slow = hub.subscribe(DemoWriter(stuck=True), "stalled")
+        for room in range(1, 201):
+            hub.publish("match", room, players=[f"p{room}a", f"p{room}b"], difficulty="EASY", rounds=10)
+        for rnd in range(1, 11):
+            for room in range(1, 201):
+                hub.publish("problem", room, round=rnd, problem="7 * 6 = ?", options=[42, 36, 48, 40], time=15)
+                hub.publish("answered", room, round=rnd, player=0)
+                hub.publish("result", room, round=rnd, correct_answer=42, winner=0, scores=[10 * rnd, 0],
+                            reaction_ms={"0": 1500})
+        print(f"{hub.events} events encoded once each, {hub.frames_sent} frames queued for "
+              f"{len(fast)} spectators")
+        print(f"Stalled spectator: {slow.sent} events then lagging with {slow.buffered() // 1024} KB queued, "
+              f"{slow.skipped} events skipped")
+        slow.writer.transport.queued = 0   # it catches up
+        hub.publish("end", 1, reason="finished", scores=[100, 0])
+        print(f"After draining it got one snapshot of {len(hub.rooms)} rooms "
+              f"({hub.snapshots - 51} resync) and is live again: lagging={slow.lagging_since is not None}")
@@ -69,20 +69,34 @@ class TeacherMode:
             print(f"WARNING: Unknown difficulty '{difficulty}'")
             return False
     
+    def _resolve_difficulty(self, difficulty: Optional[str]) -> Difficulty:
+        """Difficulty for one call, without changing current_difficulty"""
+        if difficulty is None:
+            return self.current_difficulty
+        try:
+            return Difficulty[difficulty]
+        except KeyError:
+            print(f"WARNING: Unknown difficulty '{difficulty}'")
+            return self.current_difficulty
+    
     # PEMDAS Problems
-    def generate_pemdas_problem(self) -> Dict:
+    def generate_pemdas_problem(self, difficulty: Optional[str] = None) -> Dict:
         """
         Generate PEMDAS (Order of Operations) problem.
         
+        Args:
+            difficulty: Difficulty for this problem only (default: current)
+        
         Returns:
             Problem dictionary with expression and correct answer
         """
         try:
-            if self.current_difficulty == Difficulty.FOUNDATIONAL:
+            level = self._resolve_difficulty(difficulty)
+            if level == Difficulty.FOUNDATIONAL:
                 return self._generate_simple_pemdas()
-            elif self.current_difficulty == Difficulty.INTERMEDIATE:
+            elif level == Difficulty.INTERMEDIATE:
                 return self._generate_intermediate_pemdas()
-            elif self.current_difficulty == Difficulty.ADVANCED:
+            elif level == Difficulty.ADVANCED:
                 return self._generate_advanced_pemdas()
             else:
                 return self._generate_mastery_pemdas()
@@ -188,19 +202,23 @@ class TeacherMode:
         }
     
     # Square Root Problems
-    def generate_square_root_problem(self) -> Dict:
+    def generate_square_root_problem(self, difficulty: Optional[str] = None) -> Dict:
         """
         Generate square root problem.
         
+        Args:
+            difficulty: Difficulty for this problem only (default: current)
+        
         Returns:
             Problem dictionary with radical and answer
         """
         try:
-            if self.current_difficulty == Difficulty.FOUNDATIONAL:
+            level = self._resolve_difficulty(difficulty)
+            if level == Difficulty.FOUNDATIONAL:
                 return self._generate_perfect_square()
-            elif self.current_difficulty == Difficulty.INTERMEDIATE:
+            elif level == Difficulty.INTERMEDIATE:
                 return self._generate_perfect_square_extended()
-            elif self.current_difficulty == Difficulty.ADVANCED:
+            elif level == Difficulty.ADVANCED:
                 return self._generate_square_root_approximation()
             else:
                 return self._generate_square_root_mixed()
@@ -288,19 +306,23 @@ class TeacherMode:
         }
     
     # Long Division Problems
-    def generate_long_division_problem(self) -> Dict:
+    def generate_long_division_problem(self, difficulty: Optional[str] = None) -> Dict:
         """
         Generate long division problem.
         
+        Args:
+            difficulty: Difficulty for this problem only (default: current)
+        
         Returns:
             Problem dictionary with division and quotient
         """
         try:
-            if self.current_difficulty == Difficulty.FOUNDATIONAL:
+            level = self._resolve_difficulty(difficulty)
+            if level == Difficulty.FOUNDATIONAL:
                 return self._generate_simple_long_division()
-            elif self.current_difficulty == Difficulty.INTERMEDIATE:
+            elif level == Difficulty.INTERMEDIATE:
                 return self._generate_intermediate_long_division()
-            elif self.current_difficulty == Difficulty.ADVANCED:
+            elif level == Difficulty.ADVANCED:
                 return self._generate_advanced_long_division()
             else:
                 return self._generate_mastery_long_division()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+MathBlat UI Events - Python Backup
+Thread-safe hand-off of events from network/worker threads to a GUI thread.
+
+Tkinter (like most GUI toolkits) must only be touched from the thread
+running its main loop. Worker threads post() events here instead; the GUI
+thread drains the whole backlog in one go from a single timer callback,
+applies every event to its state, and repaints once per batch rather than
+once per event.
+
+Events posted with a coalesce key replace any still-pending event with the
+same key, for updates where only the latest value matters.
+
+Usage:
+    from ui_events import UiEventQueue
+    events = UiEventQueue()
+    events.post("message", (msg_type, payload))        # any thread
+    events.post("timer", remaining, coalesce="timer")  # latest wins
+
+    for kind, payload in events.drain():                # GUI thread
+        ...
+"""
+
+import threading
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+Event = Tuple[str, Any]
+
+
+class UiEventQueue:
+    """FIFO of (kind, payload) events, safe to post to from any thread"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events: List[Optional[Event]] = []
+        self._coalesced: Dict[Hashable, int] = {}
+        self.posted = 0
+        self.coalesced = 0
+
+    def post(self, kind: str, payload: Any = None, coalesce: Optional[Hashable] = None) -> None:
+        """
+        Queue one event.
+
+        Args:
+            kind: Event name the GUI thread dispatches on
+            payload: Event data
+            coalesce: If given, drop any pending event posted with the same
+                      key; the new event goes to the back of the queue
+        """
+        with self._lock:
+            self.posted += 1
+            if coalesce is not None:
+                previous = self._coalesced.get(coalesce)
+                if previous is not None:
+                    self._events[previous] = None
+                    self.coalesced += 1
+                self._coalesced[coalesce] = len(self._events)
+            self._events.append((kind, payload))
+
+    def drain(self) -> List[Event]:
+        """Take every pending event, oldest first (GUI thread)"""
+        with self._lock:
+            if not self._events:
+                return []
+            events, self._events = self._events, []
+            self._coalesced.clear()
+        return [event for event in events if event is not None]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._events) - sum(1 for event in self._events if event is None)
+
+
+if __name__ == "__main__":
+    print("=== MathBlat UI Events (Python Backup) ===\n")
+
+    events = UiEventQueue()
+    opponent_score = 0
+    repaints = 0
+
+    def network_burst():
+        for i in range(100):
+            events.post("answer", {"correct": True})
+            events.post("timer", 15 - i % 15, coalesce="timer")
+
+    worker = threading.Thread(target=network_burst)
+    worker.start()
+    worker.join()
+
+    # One GUI tick: apply everything, then repaint once
+    batch = events.drain()
+    for kind, payload in batch:
+        if kind == "answer" and payload["correct"]:
+            opponent_score += 10
+    if batch:
+        repaints += 1
+
+    print(f"Posted {events.posted} events, {events.coalesced} coalesced away, "
+          f"{len(batch)} applied in one batch")
+    print(f"Opponent score {opponent_score} after {repaints} repaint")